@@ -0,0 +1,265 @@
+"""
+Unusual-activity detection on the tick pipeline, behind /api/alerts.
+
+ActivityDetector is a pipeline stage: every stored tick updates a few running
+baselines in O(1) and may raise an alert.
+
+    volume_spike  a contract trades far above its own baseline - z-score of
+                  log(1 + volume) against an EWMA mean/variance, reported with
+                  the z-score of the price change (same EWMA, on close-to-close returns)
+    sweep         elevated volume on several neighboring strikes of one chain,
+                  expiry and side within a few seconds
+    skew_shift    the put share of a chain's recent volume (decaying over
+                  ALERT_SKEW_FAST_SECONDS) moves away from its session baseline
+                  (decaying over ALERT_SKEW_SLOW_SECONDS)
+
+Baselines follow tick time, not wall time, so a replay raises the same alerts as
+the live session did. Alerts are kept in a bounded log with per-session ids;
+readers get an immutable snapshot without data_lock, like LatestQuotes.
+
+    ALERT_EWMA_ALPHA         weight of the newest tick in the per-contract baselines (default 0.05)
+    ALERT_WARMUP_TICKS       ticks a contract needs before its baseline is trusted (default 30)
+    ALERT_VOLUME_Z           volume z-score of a spike (default 3)
+    ALERT_MIN_VOLUME         smallest tick volume that can be a spike or sweep leg (default 50)
+    ALERT_SWEEP_Z            volume z-score of a sweep leg (default 2)
+    ALERT_SWEEP_STRIKES      distinct strikes that make a sweep (default 3)
+    ALERT_SWEEP_SECONDS      window the legs must fall in (default 2)
+    ALERT_SWEEP_RANGE_PCT    how close (percent of the strike) a leg must be to count as neighboring (default 0.25)
+    ALERT_SKEW_SHIFT         put-share move that is a skew shift (default 0.2)
+    ALERT_SKEW_MIN_VOLUME    recent volume a chain needs before its skew is judged (default 500)
+    ALERT_SKEW_FAST_SECONDS / ALERT_SKEW_SLOW_SECONDS   decay times of the two put shares (default 60 / 900)
+    ALERT_COOLDOWN_SECONDS   quiet time per alert kind and contract/chain after an alert (default 60)
+    ALERT_HISTORY            alerts kept in memory (default 1000)
+"""
+import math
+import os
+from collections import deque
+
+from occ_symbols import parse_option_symbol
+from tick_store import OPTION_TYPES
+
+NANOS_PER_SECOND = 1_000_000_000
+
+ALERT_EWMA_ALPHA = float(os.getenv('ALERT_EWMA_ALPHA', 0.05))
+ALERT_WARMUP_TICKS = int(os.getenv('ALERT_WARMUP_TICKS', 30))
+ALERT_VOLUME_Z = float(os.getenv('ALERT_VOLUME_Z', 3))
+ALERT_MIN_VOLUME = int(os.getenv('ALERT_MIN_VOLUME', 50))
+ALERT_SWEEP_Z = float(os.getenv('ALERT_SWEEP_Z', 2))
+ALERT_SWEEP_STRIKES = int(os.getenv('ALERT_SWEEP_STRIKES', 3))
+ALERT_SWEEP_SECONDS = float(os.getenv('ALERT_SWEEP_SECONDS', 2))
+ALERT_SWEEP_RANGE_PCT = float(os.getenv('ALERT_SWEEP_RANGE_PCT', 0.25))
+ALERT_SKEW_SHIFT = float(os.getenv('ALERT_SKEW_SHIFT', 0.2))
+ALERT_SKEW_MIN_VOLUME = float(os.getenv('ALERT_SKEW_MIN_VOLUME', 500))
+ALERT_SKEW_FAST_SECONDS = float(os.getenv('ALERT_SKEW_FAST_SECONDS', 60))
+ALERT_SKEW_SLOW_SECONDS = float(os.getenv('ALERT_SKEW_SLOW_SECONDS', 900))
+ALERT_COOLDOWN_SECONDS = float(os.getenv('ALERT_COOLDOWN_SECONDS', 60))
+ALERT_HISTORY = int(os.getenv('ALERT_HISTORY', 1000))
+
+ALERT_KINDS = ('volume_spike', 'sweep', 'skew_shift')
+
+SWEEP_LEGS_KEPT = 64  # Recent legs per chain side - bounds the work per tick
+MIN_VARIANCE = 1e-6   # Keeps a flat baseline from turning any change into an infinite z-score
+
+
+class Baseline:
+    """EWMA mean and variance of one contract's log volume and price change, plus what it belongs to"""
+    __slots__ = ('ticks', 'volume_mean', 'volume_var', 'change_mean', 'change_var', 'last_close',
+                 'root', 'expiry', 'skew')
+
+    def __init__(self, root, expiry, skew):
+        self.ticks = 0
+        self.volume_mean = 0.0
+        self.volume_var = 0.0
+        self.change_mean = 0.0
+        self.change_var = 0.0
+        self.last_close = None
+        self.root = root
+        self.expiry = expiry
+        self.skew = skew  # The SkewState of its chain and expiry
+
+
+class SkewState:
+    """Time-decayed put and call volume of one chain and expiry, over a fast and a slow horizon"""
+    __slots__ = ('fast_puts', 'fast_calls', 'slow_puts', 'slow_calls', 'timestamp_ns')
+
+    def __init__(self, timestamp_ns):
+        self.fast_puts = self.fast_calls = self.slow_puts = self.slow_calls = 0.0
+        self.timestamp_ns = timestamp_ns
+
+
+def _zscore(value, mean, var):
+    return (value - mean) / math.sqrt(var if var > MIN_VARIANCE else MIN_VARIANCE)
+
+
+class ActivityDetector:
+    """
+    Pipeline stage raising volume spike, sweep and skew shift alerts
+    Writers serialize through data_lock like every pipeline stage; readers only call snapshot()
+    on_alert(alert) is called for every alert raised (the ingestion process logs and counts them)
+    """
+
+    def __init__(self, history=ALERT_HISTORY, on_alert=None):
+        self.history = history
+        self.on_alert = on_alert
+        self.clear()
+
+    def clear(self):
+        self.baselines = {}     # symbol -> Baseline
+        self.sweep_legs = {}    # (root, expiry, option_type) -> deque of (timestamp_ns, strike, volume)
+        self.skews = {}         # (root, expiry) -> SkewState
+        self.quiet_until = {}   # (kind, contract or chain) -> timestamp_ns the cooldown ends
+        self.alerts = deque(maxlen=self.history)
+        self.last_id = 0        # Ids restart with every session
+        self._snapshot = (0, ())
+
+    def update(self, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap, volume,
+               accumulated_volume=0, contract=None):
+        baseline = self.baselines.get(symbol)
+        if baseline is None:
+            baseline = self._new_baseline(symbol, timestamp_ns, contract)
+
+        log_volume = math.log1p(volume)
+        last_close = baseline.last_close
+        change = (close - last_close) / last_close if last_close else 0.0
+        baseline.last_close = close
+
+        # Scored against the baseline before this tick joins it (the EWMA steps are inlined - hot path)
+        volume_mean, volume_var = baseline.volume_mean, baseline.volume_var
+        change_mean, change_var = baseline.change_mean, baseline.change_var
+        ticks = baseline.ticks
+        baseline.ticks = ticks + 1
+        if ticks == 0:
+            baseline.volume_mean = log_volume
+        else:
+            alpha = ALERT_EWMA_ALPHA
+            diff = log_volume - volume_mean
+            baseline.volume_mean = volume_mean + alpha * diff
+            baseline.volume_var = (1 - alpha) * (volume_var + alpha * diff * diff)
+            diff = change - change_mean
+            baseline.change_mean = change_mean + alpha * diff
+            baseline.change_var = (1 - alpha) * (change_var + alpha * diff * diff)
+
+        if volume >= ALERT_MIN_VOLUME and ticks >= ALERT_WARMUP_TICKS:
+            volume_z = _zscore(log_volume, volume_mean, volume_var)
+            if volume_z >= ALERT_VOLUME_Z:
+                self._raise('volume_spike', symbol, timestamp_ns, {
+                    'root': baseline.root, 'expiry': baseline.expiry, 'symbol': symbol, 'strike': strike,
+                    'option_type': option_type, 'volume': volume, 'close': close,
+                    'volume_z': round(volume_z, 2),
+                    'price_change_z': round(_zscore(change, change_mean, change_var), 2),
+                })
+            if volume_z >= ALERT_SWEEP_Z:
+                self._sweep_leg(baseline.root, baseline.expiry, option_type, strike, timestamp_ns, volume)
+
+        if option_type == 'PUT' or option_type == 'CALL':
+            self._update_skew(baseline, option_type, timestamp_ns, volume)
+
+    def _new_baseline(self, symbol, timestamp_ns, contract=None):
+        if contract is None:
+            contract = parse_option_symbol(symbol)
+        key = (contract.underlying, contract.expiry)
+        skew = self.skews.get(key)
+        if skew is None:
+            skew = self.skews[key] = SkewState(timestamp_ns)
+        baseline = self.baselines[symbol] = Baseline(contract.underlying, contract.expiry, skew)
+        return baseline
+
+    def _sweep_leg(self, root, expiry, option_type, strike, timestamp_ns, volume):
+        key = (root, expiry, option_type)
+        legs = self.sweep_legs.get(key)
+        if legs is None:
+            legs = self.sweep_legs[key] = deque(maxlen=SWEEP_LEGS_KEPT)
+        legs.append((timestamp_ns, strike, volume))
+
+        oldest = timestamp_ns - ALERT_SWEEP_SECONDS * NANOS_PER_SECOND
+        while legs[0][0] < oldest:
+            legs.popleft()
+
+        reach = strike * ALERT_SWEEP_RANGE_PCT / 100
+        neighbors = {}
+        for _, leg_strike, leg_volume in legs:
+            if abs(leg_strike - strike) <= reach:
+                neighbors[leg_strike] = neighbors.get(leg_strike, 0) + leg_volume
+        if len(neighbors) >= ALERT_SWEEP_STRIKES:
+            self._raise('sweep', key, timestamp_ns, {
+                'root': root, 'expiry': expiry, 'option_type': option_type,
+                'strikes': sorted(neighbors), 'volume': sum(neighbors.values()),
+            })
+
+    def _update_skew(self, baseline, option_type, timestamp_ns, volume):
+        skew = baseline.skew
+        elapsed = max(timestamp_ns - skew.timestamp_ns, 0) / NANOS_PER_SECOND
+        if elapsed:
+            fast = math.exp(-elapsed / ALERT_SKEW_FAST_SECONDS)
+            slow = math.exp(-elapsed / ALERT_SKEW_SLOW_SECONDS)
+            skew.fast_puts *= fast
+            skew.fast_calls *= fast
+            skew.slow_puts *= slow
+            skew.slow_calls *= slow
+            skew.timestamp_ns = timestamp_ns
+        if option_type == 'PUT':
+            skew.fast_puts += volume
+            skew.slow_puts += volume
+        else:
+            skew.fast_calls += volume
+            skew.slow_calls += volume
+
+        fast_total = skew.fast_puts + skew.fast_calls
+        if fast_total < ALERT_SKEW_MIN_VOLUME:
+            return
+        fast_share = skew.fast_puts / fast_total
+        slow_share = skew.slow_puts / (skew.slow_puts + skew.slow_calls)
+        if abs(fast_share - slow_share) >= ALERT_SKEW_SHIFT:
+            self._raise('skew_shift', (baseline.root, baseline.expiry), timestamp_ns, {
+                'root': baseline.root, 'expiry': baseline.expiry,
+                'put_share': round(fast_share, 3), 'baseline_put_share': round(slow_share, 3),
+                'direction': 'puts' if fast_share > slow_share else 'calls',
+            })
+
+    def _raise(self, kind, subject, timestamp_ns, details):
+        quiet_key = (kind, subject)
+        if timestamp_ns < self.quiet_until.get(quiet_key, 0):
+            return
+        self.quiet_until[quiet_key] = timestamp_ns + int(ALERT_COOLDOWN_SECONDS * NANOS_PER_SECOND)
+
+        self.last_id += 1
+        alert = {'id': self.last_id, 'kind': kind, 'timestamp_ns': timestamp_ns, **details}
+        self.alerts.append(alert)  # Never mutated once appended
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    def load(self, columns, symbols):
+        """Fold a TickStore read (oldest first) into the detector; replayed alerts skip on_alert"""
+        on_alert, self.on_alert = self.on_alert, None
+        try:
+            self._load(columns, symbols)
+        finally:
+            self.on_alert = on_alert
+
+    def _load(self, columns, symbols):
+        for timestamp_ns, contract_id, strike, option_type, open_price, high, low, close, vwap, volume in zip(
+            columns['timestamp_ns'].tolist(),
+            columns['contract_id'].tolist(),
+            columns['strike'].tolist(),
+            columns['option_type'].tolist(),
+            columns['open'].tolist(),
+            columns['high'].tolist(),
+            columns['low'].tolist(),
+            columns['close'].tolist(),
+            columns['vwap'].tolist(),
+            columns['volume'].tolist(),
+        ):
+            self.update(symbols[contract_id], OPTION_TYPES[option_type], strike, timestamp_ns,
+                        open_price, high, low, close, vwap, volume)
+
+    def snapshot(self):
+        """
+        (last id, (alert, ...)) oldest first - safe to call from any thread without data_lock
+        The tuple is built once per new alert and shared until the next one
+        """
+        last_id = self.last_id
+        cached_id, alerts = self._snapshot
+        if cached_id != last_id:
+            alerts = tuple(self.alerts)  # One C-level copy - no alert lands halfway through it
+            self._snapshot = (last_id, alerts)
+        return last_id, alerts
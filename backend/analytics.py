@@ -0,0 +1,296 @@
+"""
+Vectorized Black-Scholes analytics across the strike ladder.
+
+Every recompute takes the latest price of each subscribed contract and solves
+implied volatility for all of them at once: a batched Newton iteration on NumPy
+arrays, with a per-contract bisection bracket that takes over whenever a Newton
+step leaves it (deep ITM/OTM contracts where vega is tiny). Greeks and gamma
+exposure then follow in closed form. There is no per-strike Python loop.
+
+Deep in-the-money prices are mostly intrinsic value, so their small time value is
+lost in rounding and cannot pin a vol down. Those solves come back as NaN, and
+both contracts at a strike take the vol of the out-of-the-money side.
+
+AnalyticsEngine runs recomputes on its own thread. Ingestion only calls
+request(), so any number of batches arriving during a recompute coalesce into one.
+
+    ANALYTICS_RATE            risk-free rate used for pricing (default 0.04)
+    ANALYTICS_EXPIRY_HOUR     CST hour the contracts settle (default 15, i.e. 4pm ET)
+"""
+import datetime
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+import pytz
+
+logger = logging.getLogger('ndx_monitor.analytics')
+
+ANALYTICS_RATE = float(os.getenv('ANALYTICS_RATE', 0.04))
+ANALYTICS_EXPIRY_HOUR = int(os.getenv('ANALYTICS_EXPIRY_HOUR', 15))
+
+CST = pytz.timezone('America/Chicago')
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+MIN_TIME_TO_EXPIRY = 60.0 / SECONDS_PER_YEAR  # Floor at one minute so 0DTE math stays finite
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+IV_TOLERANCE = 1e-6
+IV_MAX_ITERATIONS = 60
+IV_PRICE_ULPS = 8  # Rounding error assumed in a price (and its intrinsic value), in units of its last place
+
+_SQRT_2 = math.sqrt(2.0)
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+def _erfc(x):
+    """
+    Vectorized erfc (Numerical Recipes erfcc, relative error < 1.2e-7 everywhere)
+    Relative accuracy keeps far out-of-the-money prices meaningful near expiry
+    """
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = (-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806
+            + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277)))))))))
+    result = t * np.exp(poly)
+    return np.where(x >= 0, result, 2.0 - result)
+
+
+def norm_cdf(x):
+    return 0.5 * _erfc(-x / _SQRT_2)
+
+
+def norm_pdf(x):
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def _d1_d2(spot, strike, t, rate, vol):
+    vol_sqrt_t = vol * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * vol * vol) * t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def bs_price(spot, strike, t, rate, vol, is_call):
+    """Black-Scholes price of calls (is_call True) and puts, elementwise"""
+    d1, d2 = _d1_d2(spot, strike, t, rate, vol)
+    forward_intrinsic = spot - strike * np.exp(-rate * t)
+    call = spot * norm_cdf(d1) - (spot - forward_intrinsic) * norm_cdf(d2)
+    put = (spot - forward_intrinsic) * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    # Price the in-the-money side through put-call parity from the out-of-the-money
+    # side - the direct formula loses the small time value to cancellation
+    call, put = (np.where(forward_intrinsic > 0, put + forward_intrinsic, call),
+                 np.where(forward_intrinsic > 0, put, call - forward_intrinsic))
+    return np.where(is_call, call, put)
+
+
+def bs_vega(spot, strike, t, rate, vol):
+    d1, _ = _d1_d2(spot, strike, t, rate, vol)
+    return spot * norm_pdf(d1) * np.sqrt(t)
+
+
+def implied_vol(price, spot, strike, t, rate, is_call):
+    """
+    Implied volatility for every contract at once
+    Contracts whose price is outside the no-arbitrage bounds come back as NaN, as
+    do those where the price's rounding error is worth more than IV_TOLERANCE of
+    vol (deep in the money) and those that do not converge
+    """
+    price = np.asarray(price, dtype=np.float64)
+    strike = np.asarray(strike, dtype=np.float64)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    discount = np.exp(-rate * t)
+    intrinsic = np.where(is_call, np.maximum(spot - strike * discount, 0.0),
+                         np.maximum(strike * discount - spot, 0.0))
+    upper = np.where(is_call, spot, strike * discount)
+    valid = np.isfinite(price) & (price > intrinsic) & (price < upper)
+
+    lo = np.full(price.shape, MIN_VOL)
+    hi = np.full(price.shape, MAX_VOL)
+    vol = np.full(price.shape, 0.3)
+    active = valid.copy()
+
+    for _ in range(IV_MAX_ITERATIONS):
+        if not active.any():
+            break
+        diff = bs_price(spot, strike, t, rate, vol, is_call) - price
+
+        # Price is increasing in vol - shrink each bracket around the root
+        too_high = diff > 0
+        hi = np.where(active & too_high, vol, hi)
+        lo = np.where(active & ~too_high, vol, lo)
+
+        vega = bs_vega(spot, strike, t, rate, vol)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = vol - diff / vega
+        # Bisection safeguard: fall back to the bracket midpoint when Newton leaves it
+        use_newton = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        step = np.where(use_newton, newton, 0.5 * (lo + hi))
+
+        # Converged once the Newton step is below the vol tolerance - a fixed price
+        # tolerance is far too loose where vega is tiny
+        converged = (np.abs(diff) < IV_TOLERANCE * vega) | (hi - lo < IV_TOLERANCE)
+        active &= ~converged
+        vol = np.where(active, step, vol)
+
+    resolvable = IV_PRICE_ULPS * np.spacing(price) < bs_vega(spot, strike, t, rate, vol) * IV_TOLERANCE
+    return np.where(valid & resolvable & ~active, vol, np.nan)
+
+
+def greeks(spot, strike, t, rate, vol, is_call):
+    """
+    Delta, gamma, theta (per calendar day) and vega (per vol point) for every contract
+    Returns a dict of arrays; NaN vols give NaN greeks
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, vol)
+    sqrt_t = np.sqrt(t)
+    pdf_d1 = norm_pdf(d1)
+    discount = np.exp(-rate * t)
+
+    delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+    gamma = pdf_d1 / (spot * vol * sqrt_t)
+    decay = -spot * pdf_d1 * vol / (2.0 * sqrt_t)
+    theta = np.where(is_call,
+                     decay - rate * strike * discount * norm_cdf(d2),
+                     decay + rate * strike * discount * norm_cdf(-d2)) / 365.0
+    vega = spot * pdf_d1 * sqrt_t / 100.0
+    return {'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega}
+
+
+def expiry_time(base_date, hour=ANALYTICS_EXPIRY_HOUR):
+    """Settlement time of a YYMMDD expiry code as an aware CST datetime"""
+    day = datetime.datetime.strptime(base_date, '%y%m%d')
+    return CST.localize(day.replace(hour=hour))
+
+
+def years_to_expiry(base_date, now=None):
+    now = now or datetime.datetime.now(CST)
+    seconds = (expiry_time(base_date) - now).total_seconds()
+    return max(seconds / SECONDS_PER_YEAR, MIN_TIME_TO_EXPIRY)
+
+
+def compute_chain_analytics(spot, strikes, is_call, prices, volumes, t, rate=ANALYTICS_RATE):
+    """
+    Implied vol, greeks and gamma exposure for one snapshot of the ladder
+    Both contracts at a strike use the out-of-the-money side's vol (calls at or above
+    spot, puts below) when it solved - put-call parity gives them the same one
+    Gamma exposure is weighted by session volume (open interest is not streamed):
+    gamma * volume * 100 * spot^2 * 1%, calls positive and puts negative
+    """
+    strikes = np.asarray(strikes, dtype=np.float64)
+    is_call = np.asarray(is_call, dtype=bool)
+    volumes = np.asarray(volumes, dtype=np.float64)
+
+    vol = implied_vol(prices, spot, strikes, t, rate, is_call)
+    otm = np.where(is_call, strikes >= spot, strikes < spot) & np.isfinite(vol)
+    otm_strikes = strikes[otm]
+    if otm_strikes.size:
+        order = np.argsort(otm_strikes)
+        otm_strikes, otm_vol = otm_strikes[order], vol[otm][order]
+        match = np.minimum(np.searchsorted(otm_strikes, strikes), otm_strikes.size - 1)
+        vol = np.where(otm_strikes[match] == strikes, otm_vol[match], vol)
+    result = greeks(spot, strikes, t, rate, vol, is_call)
+    result['iv'] = vol
+
+    gex = np.nan_to_num(result['gamma']) * volumes * 100.0 * spot * spot * 0.01
+    result['gex'] = np.where(is_call, gex, -gex)
+    return result
+
+
+def _finite(value, digits):
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def format_analytics(spot, strikes, is_call, result):
+    """Group per-contract results into the per-strike smile and GEX profile served by the API"""
+    by_strike = {}
+    for strike, call, iv, delta, gamma, theta, vega, gex in zip(
+        np.asarray(strikes).tolist(), np.asarray(is_call).tolist(),
+        result['iv'].tolist(), result['delta'].tolist(), result['gamma'].tolist(),
+        result['theta'].tolist(), result['vega'].tolist(), result['gex'].tolist(),
+    ):
+        entry = by_strike.setdefault(strike, {'strike': strike, 'gex': 0.0})
+        side = 'call' if call else 'put'
+        entry[f'{side}_iv'] = _finite(iv, 6)
+        entry[f'{side}_delta'] = _finite(delta, 6)
+        entry[f'{side}_gamma'] = _finite(gamma, 8)
+        entry[f'{side}_theta'] = _finite(theta, 4)
+        entry[f'{side}_vega'] = _finite(vega, 4)
+        entry['gex'] += gex
+
+    smile = [by_strike[strike] for strike in sorted(by_strike)]
+    for entry in smile:
+        entry['gex'] = round(entry['gex'], 2)
+    return {
+        'spot': spot,
+        'smile': smile,
+        'net_gex': round(float(result['gex'].sum()), 2)
+    }
+
+
+class AnalyticsEngine:
+    """
+    Recomputes the ladder analytics on a background thread
+    get_inputs() returns (spot, base_date, strikes, is_call, prices, volumes) or None
+    when there is nothing to price yet
+    """
+
+    def __init__(self, get_inputs, rate=ANALYTICS_RATE):
+        self.get_inputs = get_inputs
+        self.rate = rate
+        self.latest = None
+        self.recomputes = 0
+        self.last_compute_ms = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def request(self):
+        """Ask for a recompute (cheap, safe to call from the ingestion thread)"""
+        self._wakeup.set()
+
+    def recompute(self):
+        inputs = self.get_inputs()
+        if inputs is None:
+            return None
+        spot, base_date, strikes, is_call, prices, volumes = inputs
+
+        start = time.perf_counter()
+        t = years_to_expiry(base_date)
+        result = compute_chain_analytics(spot, strikes, is_call, prices, volumes, t, self.rate)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        snapshot = format_analytics(spot, strikes, is_call, result)
+        snapshot['expiry'] = base_date
+        snapshot['years_to_expiry'] = t
+        snapshot['compute_ms'] = round(elapsed_ms, 3)
+        snapshot['computed_at'] = datetime.datetime.now(CST).isoformat()
+        self.latest = snapshot
+        self.recomputes += 1
+        self.last_compute_ms = elapsed_ms
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.recompute()
+            except Exception as e:
+                logger.error(f"❌ Error computing analytics: {e}")
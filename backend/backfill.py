@@ -0,0 +1,63 @@
+"""
+REST backfill of the minute aggregates missed while the options WebSocket was down.
+
+Once a gap closes (supervisor.py), the minute bars that ended inside it are
+fetched for every subscribed contract from the Polygon aggregates endpoint -
+one request per contract, BACKFILL_CONCURRENCY at a time on a thread pool of
+that size, over the pooled keep-alive session shared with the price feeds
+(which keeps up to 16 connections per host). A bar is stored
+like a live one, stamped with its end (when the stream would have delivered it).
+
+    BACKFILL              'false' records gaps without backfilling them (default true)
+    BACKFILL_CONCURRENCY  REST requests in flight at once (default 8)
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from underlying import REST_BASE_URL, http_session
+
+logger = logging.getLogger('ndx_monitor.backfill')
+
+BACKFILL = os.getenv('BACKFILL', 'true').lower() != 'false'
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 8))
+
+MINUTE_MS = 60_000
+NANOS_PER_MS = 1_000_000
+
+
+def fetch_minute_aggs(api_key, symbol, start_ms, end_ms, base_url=REST_BASE_URL, timeout=10):
+    """Minute aggregates of one contract starting in [start_ms, end_ms], oldest first ([] if unavailable)"""
+    response = http_session.get(
+        f"{base_url}/v2/aggs/ticker/{symbol}/range/1/minute/{start_ms}/{end_ms}",
+        params={'adjusted': 'true', 'sort': 'asc', 'limit': 50000, 'apiKey': api_key},
+        timeout=timeout
+    )
+    if response.status_code != 200:
+        return []
+    return response.json().get('results') or []
+
+
+async def fetch_gap_bars(api_key, symbols, start_ns, end_ns, concurrency=BACKFILL_CONCURRENCY,
+                         base_url=REST_BASE_URL, fetch=fetch_minute_aggs):
+    """
+    {symbol: [bar, ...]} of the minute bars that ended within (start_ns, end_ns], oldest first
+    A contract whose request fails is logged and left out
+    """
+    start_ms = start_ns // NANOS_PER_MS - MINUTE_MS  # The first bar ending in the gap started a minute earlier
+    end_ms = end_ns // NANOS_PER_MS
+    loop = asyncio.get_running_loop()
+
+    async def fetch_one(symbol):
+        try:
+            bars = await loop.run_in_executor(executor, fetch, api_key, symbol, start_ms, end_ms, base_url)
+        except Exception as e:
+            logger.warning(f"⚠️ Backfill of {symbol} failed: {e}")
+            return symbol, []
+        return symbol, [bar for bar in bars if start_ns < (bar['t'] + MINUTE_MS) * NANOS_PER_MS <= end_ns]
+
+    # requests is blocking - an own pool, since the default executor may have fewer threads than that
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='backfill') as executor:
+        results = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+    return {symbol: bars for symbol, bars in results if bars}
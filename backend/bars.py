@@ -0,0 +1,247 @@
+"""
+Rolling OHLCV + VWAP bars per contract, built incrementally as ticks are stored.
+
+Each stored tick touches one open bar per interval (O(1) per interval); when a
+tick lands in a new time bucket the open bar is closed and kept in a bounded
+per-contract history. /api/bars reads these directly instead of rescanning raw
+ticks.
+
+    BAR_INTERVALS   comma-separated bar sizes (default 1m,5m,15m)
+    BAR_HISTORY     completed bars kept per contract and interval (default 500)
+
+Time windows and a memory cap on top of BAR_HISTORY are applied by retention.py.
+"""
+import os
+from collections import deque
+
+from tick_store import OPTION_TYPES
+
+NANOS_PER_SECOND = 1_000_000_000
+
+INTERVAL_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600}
+
+BAR_INTERVALS = tuple(name.strip() for name in os.getenv('BAR_INTERVALS', '1m,5m,15m').split(',') if name.strip())
+BAR_HISTORY = int(os.getenv('BAR_HISTORY', 500))
+
+
+class Bar:
+    """One OHLCV bar; notional is sum(vwap * volume) for the bar VWAP"""
+    __slots__ = ('start_ns', 'open', 'high', 'low', 'close', 'volume', 'notional', 'ticks')
+
+    def __init__(self, start_ns, open_price, high, low, close, vwap, volume):
+        self.start_ns = start_ns
+        self.open = open_price
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.notional = vwap * volume
+        self.ticks = 1
+
+    def add(self, high, low, close, vwap, volume):
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.close = close
+        self.volume += volume
+        self.notional += vwap * volume
+        self.ticks += 1
+
+    def as_dict(self, interval_ns, complete):
+        return {
+            'start_ns': self.start_ns,
+            'end_ns': self.start_ns + interval_ns,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'vwap': self.notional / self.volume if self.volume else self.close,
+            'ticks': self.ticks,
+            'complete': complete
+        }
+
+
+class BarSeries:
+    """Completed bars plus the open bar of one contract at one interval"""
+    __slots__ = ('completed', 'current')
+
+    def __init__(self, history):
+        self.completed = deque(maxlen=history)
+        self.current = None
+
+
+class BarBuilder:
+    """
+    Pipeline stage that maintains bars for every contract and interval
+    Not thread-safe on its own - callers serialize access (see data_lock in main.py)
+    """
+
+    def __init__(self, intervals=BAR_INTERVALS, history=BAR_HISTORY):
+        unknown = [name for name in intervals if name not in INTERVAL_SECONDS]
+        if unknown:
+            raise ValueError(f"Unknown bar interval(s): {', '.join(unknown)}")
+        self.intervals = {name: INTERVAL_SECONDS[name] * NANOS_PER_SECOND for name in intervals}
+        self.history = history
+        self.series = {}      # (symbol, interval name) -> BarSeries
+        self.contracts = {}   # symbol -> (option_type, strike)
+
+    def update(self, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap, volume,
+               accumulated_volume=0, contract=None):
+        if symbol not in self.contracts:
+            self.contracts[symbol] = (option_type, strike)
+
+        for name, interval_ns in self.intervals.items():
+            key = (symbol, name)
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = BarSeries(self.history)
+
+            start_ns = timestamp_ns - timestamp_ns % interval_ns
+            bar = series.current
+            if bar is not None and bar.start_ns == start_ns:
+                bar.add(high, low, close, vwap, volume)
+                continue
+            if bar is not None and start_ns < bar.start_ns:
+                self._add_late(series, start_ns, open_price, high, low, close, vwap, volume)
+                continue
+            if bar is not None:
+                series.completed.append(bar)
+            series.current = Bar(start_ns, open_price, high, low, close, vwap, volume)
+
+    @staticmethod
+    def _add_late(series, start_ns, open_price, high, low, close, vwap, volume):
+        """A tick for an already closed bucket (e.g. a REST backfill): fold it in, keeping the bars in order"""
+        completed = series.completed
+        position = len(completed)
+        while position and completed[position - 1].start_ns > start_ns:
+            position -= 1
+        if position and completed[position - 1].start_ns == start_ns:
+            completed[position - 1].add(high, low, close, vwap, volume)
+            return
+        if len(completed) == completed.maxlen:
+            if position == 0:
+                return  # Older than the whole history
+            completed.popleft()
+            position -= 1
+        completed.insert(position, Bar(start_ns, open_price, high, low, close, vwap, volume))
+
+    def load(self, columns, symbols):
+        """Replay a TickStore read (oldest first) through the builder"""
+        for timestamp_ns, contract_id, strike, option_type, open_price, high, low, close, vwap, volume in zip(
+            columns['timestamp_ns'].tolist(),
+            columns['contract_id'].tolist(),
+            columns['strike'].tolist(),
+            columns['option_type'].tolist(),
+            columns['open'].tolist(),
+            columns['high'].tolist(),
+            columns['low'].tolist(),
+            columns['close'].tolist(),
+            columns['vwap'].tolist(),
+            columns['volume'].tolist(),
+        ):
+            self.update(symbols[contract_id], OPTION_TYPES[option_type], strike, timestamp_ns,
+                        open_price, high, low, close, vwap, volume)
+
+    def clear(self):
+        self.series.clear()
+        self.contracts.clear()
+
+    def bar_count(self):
+        """Completed bars held across every contract and interval"""
+        return sum(len(series.completed) for series in self.series.values())
+
+    def evict_before(self, cutoffs):
+        """
+        Drop bars (the open one included) that ended at or before their interval's
+        cutoff ({interval: epoch ns}, None keeps everything); contracts left without
+        any bars are forgotten. Returns how many bars were dropped
+        """
+        evicted = 0
+        for key, series in list(self.series.items()):
+            cutoff = cutoffs.get(key[1])
+            if cutoff is None:
+                continue
+            interval_ns = self.intervals[key[1]]
+            completed = series.completed
+            while completed and completed[0].start_ns + interval_ns <= cutoff:
+                completed.popleft()
+                evicted += 1
+            if series.current is not None and series.current.start_ns + interval_ns <= cutoff:
+                series.current = None
+                evicted += 1
+            if not completed and series.current is None:
+                del self.series[key]
+
+        if evicted:
+            live = {symbol for symbol, _ in self.series}
+            for symbol in [symbol for symbol in self.contracts if symbol not in live]:
+                del self.contracts[symbol]
+        return evicted
+
+    def evict_to_fit(self, max_bars, policy='finest'):
+        """
+        Drop the oldest completed bars until at most max_bars remain; returns how many
+        'finest' takes them from the finest interval first (coarser bars still cover
+        that time), 'oldest' takes the bars that ended first whatever their interval
+        """
+        excess = self.bar_count() - max_bars
+        if excess <= 0:
+            return 0
+
+        if policy == 'oldest':
+            groups = [tuple(self.intervals)]
+        else:
+            groups = [(interval,) for interval in sorted(self.intervals, key=self.intervals.get)]
+
+        evicted = 0
+        for group in groups:
+            if evicted >= excess:
+                break
+            ends = sorted(
+                bar.start_ns + self.intervals[interval]
+                for (_, interval), series in self.series.items() if interval in group
+                for bar in series.completed
+            )
+            if not ends:
+                continue
+            # Everything ending by the cutoff goes (ties may take a few more)
+            cutoff = ends[min(excess - evicted, len(ends)) - 1]
+            evicted += self.evict_before({interval: cutoff for interval in group})
+        return evicted
+
+    def query(self, interval, symbol=None, strike=None, option_type=None, limit=100, min_volume=0):
+        """
+        Newest-last bars per matching contract, as plain dicts (safe to serialize outside the lock)
+        Returns {symbol: {'option_type', 'strike', 'bars': [...]}}
+        """
+        if interval not in self.intervals:
+            raise ValueError(f"Unknown interval {interval!r} (available: {', '.join(self.intervals)})")
+        if limit < 0:
+            raise ValueError(f"limit must not be negative, got {limit}")
+        interval_ns = self.intervals[interval]
+
+        result = {}
+        for contract, (contract_type, contract_strike) in self.contracts.items():
+            if symbol is not None and contract != symbol:
+                continue
+            if strike is not None and contract_strike != strike:
+                continue
+            if option_type is not None and contract_type != option_type:
+                continue
+            series = self.series.get((contract, interval))
+            if series is None:
+                continue
+
+            bars = [bar.as_dict(interval_ns, True) for bar in series.completed]
+            if series.current is not None:
+                bars.append(series.current.as_dict(interval_ns, False))
+            if min_volume:
+                bars = [bar for bar in bars if bar['volume'] >= min_volume]
+            result[contract] = {
+                'option_type': contract_type,
+                'strike': contract_strike,
+                'bars': bars[-limit:] if limit else bars
+            }
+        return result
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the aggregate decoder in handle_msg
+
+Decodes synthetic AM aggregate batches for the full strike ladder with the
+previous decoder (hasattr/getattr chain, strike parsed by splitting on C/P,
+timezone and clock re-read per message) and with the current one (one getattr
+for the symbol, cached OCC parse, direct field reads), and reports
+messages/second for each. Both produce the same values and do nothing else,
+so the comparison is the decoding alone.
+
+The full main.handle_msg - decoding plus the tick store, every pipeline stage,
+metrics, the broadcast and the tick log - is reported separately; it is the
+ingestion cost per message, not a decoder number.
+
+Usage: python backend/bench_handle_msg.py [batches]
+"""
+import contextlib
+import datetime
+import os
+import sys
+import time
+
+import pytz
+from massive.websocket.models import EquityAgg
+
+import main
+from occ_symbols import parse_option_symbol
+
+BASE_DATE = '251017'
+CENTER_STRIKE = 25650
+
+
+def build_batch():
+    """One AM aggregate for every contract in the default ladder"""
+    batch = []
+    for i in range(-115, 116):
+        strike = CENTER_STRIKE + i * 10
+        side = 'C' if i % 2 == 0 else 'P'
+        symbol = f"O:NDXP{BASE_DATE}{side}{strike:05d}000"
+        batch.append(EquityAgg('AM', symbol, 25 + (i % 7), 1000, None, 12.4, 12.0, 12.5, 13.0, 11.5))
+    return batch
+
+
+def legacy_decode(msgs):
+    """The decoder handle_msg used before the OCC parser, kept for comparison"""
+    decoded = []
+    for m in msgs:
+        if hasattr(m, 'symbol') and hasattr(m, 'volume') and hasattr(m, 'close'):
+            symbol = getattr(m, 'symbol', 'Unknown')
+            volume = getattr(m, 'volume', 0)
+            close = getattr(m, 'close', 0)
+            accumulated_volume = getattr(m, 'accumulated_volume', 0)
+            high = getattr(m, 'high', 0)
+            low = getattr(m, 'low', 0)
+            open_price = getattr(m, 'open', 0)
+            vwap = getattr(m, 'vwap', 0)
+
+            if 'NDXP' in symbol:
+                if 'C' in symbol and symbol.count('C') == 1:
+                    option_type = 'CALL'
+                    strike_part = symbol.split('C')[1]
+                elif 'P' in symbol and symbol.count('P') >= 2:
+                    option_type = 'PUT'
+                    parts = symbol.split('P')
+                    strike_part = parts[-1]
+                else:
+                    option_type = 'UNK'
+                    strike_part = '0'
+
+                strike_price = int(strike_part[:5])
+                cst = pytz.timezone('America/Chicago')
+                timestamp = datetime.datetime.now(cst)
+                decoded.append((symbol, option_type, strike_price, timestamp, open_price, high, low, close,
+                                vwap, volume, accumulated_volume))
+    return decoded
+
+
+def current_decode(msgs):
+    """The decoding part of main.handle_msg (one clock read per batch), without storing anything"""
+    timestamp_ns = time.time_ns()
+    decoded = []
+    for m in msgs:
+        symbol = getattr(m, 'symbol', None)
+        if symbol is None:
+            continue
+        contract = parse_option_symbol(symbol)
+        if contract is None or contract.underlying not in main.CHAIN_ROOTS:
+            continue
+        decoded.append((symbol, contract.option_type, contract.strike, timestamp_ns, m.open or 0, m.high or 0,
+                        m.low or 0, m.close, m.vwap or 0, m.volume or 0, m.accumulated_volume or 0))
+    return decoded
+
+
+def measure(handler, batch, batches):
+    """Run handler over the batch repeatedly and return messages/second"""
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        handler(batch)  # Warm-up (fills symbol caches)
+        start = time.perf_counter()
+        for _ in range(batches):
+            handler(batch)
+        elapsed = time.perf_counter() - start
+    return batches * len(batch) / elapsed
+
+
+if __name__ == "__main__":
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    batch = build_batch()
+    assert [row[:3] for row in legacy_decode(batch)] == [row[:3] for row in current_decode(batch)]
+
+    print("=" * 60)
+    print("HANDLE_MSG DECODER BENCHMARK")
+    print("=" * 60)
+    print(f"Batches: {batches} x {len(batch)} aggregates")
+
+    before = measure(legacy_decode, batch, batches)
+    after = measure(current_decode, batch, batches)
+    full = measure(main.handle_msg, batch, batches)
+
+    print(f"Decoder before (hasattr/split): {before:,.0f} msg/s")
+    print(f"Decoder after  (OCC fast path): {after:,.0f} msg/s")
+    print(f"Decoder speedup: {after / before:.2f}x")
+    print(f"Full handle_msg (store, stages, metrics, broadcast): {full:,.0f} msg/s")
+    print("=" * 60)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Ingestion benchmark suite and regression gate
+
+Runs a recording (replay.py; a deterministic synthetic ladder by default)
+through the real ingestion path - ReplayServer -> WebSocketClient ->
+create_subscriptions / handle_msg -> store_data - and reports:
+
+    throughput   messages/second with the replay server sending as fast as it can
+    latency      p50/p99 tick-to-store latency (frame sent -> batch stored) at recorded pace
+    memory       bytes allocated by the store and pipeline stages per 1M ticks
+
+Results can be saved as a baseline, and a later run compared against it: the
+run fails (exit code 1) when any metric regresses by more than --tolerance.
+Persistence is off and console output is discarded, so the numbers reflect
+decoding and storage only.
+
+Usage: python backend/bench_ingest.py [--recording file] [--save results.json]
+                                      [--baseline results.json] [--tolerance 0.2]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Benchmark the in-memory path only (read by tick_log at import)
+os.environ.setdefault('TICK_PERSIST', 'false')
+
+import numpy as np
+from massive.websocket.models import Market, parse
+
+import main
+from replay import ReplayServer, read_recording, synthetic_batches, write_recording
+from subscriptions import build_ladder_tickers
+from tick_store import TickStore
+
+CENTER_STRIKE = 25650
+BASE_DATE = '251017'
+
+# metric -> True when higher is better
+METRICS = {
+    'throughput_msgs_per_sec': True,
+    'paced_p50_ms': False,
+    'paced_p99_ms': False,
+    'bytes_per_million_ticks': False,
+}
+
+
+def replay_through_client(recording, speed, limit=None):
+    """
+    Replay a recording into main's WebSocket client and ingestion path
+    Returns (messages, elapsed seconds, per-batch latencies in ns)
+    """
+    sent_ns = {}
+    latencies = []
+    server = ReplayServer(recording, port=0, speed=speed, limit=limit,
+                          on_send=lambda index, now_ns: sent_ns.__setitem__(index, now_ns)).start()
+
+    # Same construction and subscription path as a live session, pointed at the replay server
+    main.WS_FEED, main.WS_SECURE = server.feed, False
+    main.create_subscriptions(build_ladder_tickers(CENTER_STRIKE, BASE_DATE))
+    client = main.shard_clients[0]
+
+    async def process(msgs):
+        main.handle_msg(msgs)
+        latencies.append(time.perf_counter_ns() - sent_ns[len(latencies)])
+
+    start = time.perf_counter()
+    asyncio.run(client.connect(process))
+    elapsed = time.perf_counter() - start
+    server.stop()
+    return server.message_count, elapsed, np.array(latencies)
+
+
+def measure_memory(recording, ticks):
+    """Bytes allocated by a fresh store and pipeline stages while ingesting ticks rows"""
+    batches = [parse(msgs, logging.getLogger('bench'), Market.Options) for _, msgs in read_recording(recording)]
+
+    # The production stages themselves, emptied - whatever main feeds every tick is measured
+    for stage in main.pipeline_stages:
+        stage.clear()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    main.tick_store = TickStore(capacity=ticks)
+
+    stored = 0
+    while stored < ticks:
+        for batch in batches:
+            batch = batch[:ticks - stored]
+            main.handle_msg(batch)
+            stored += len(batch)
+            if stored >= ticks:
+                break
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated * 1_000_000 / ticks
+
+
+def compare(results, baseline, tolerance):
+    """Names of metrics that regressed more than tolerance against the baseline"""
+    regressions = []
+    for metric, higher_is_better in METRICS.items():
+        old, new = baseline.get(metric), results.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{metric}: {old:,.2f} -> {new:,.2f} ({change:+.1%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion path against a replayed recording")
+    parser.add_argument('--recording', help="Recording to replay (default: synthetic ladder)")
+    parser.add_argument('--batches', type=int, default=2000, help="Synthetic batches to generate")
+    parser.add_argument('--paced-batches', type=int, default=300, help="Batches replayed at 1x for latency")
+    parser.add_argument('--ticks', type=int, default=1_000_000, help="Ticks ingested for the memory measurement")
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Fail if results regress against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    # Only the report goes to the console
+    logging.getLogger('ndx_monitor').setLevel(logging.ERROR)
+    logging.getLogger('websockets').setLevel(logging.ERROR)
+
+    recording = args.recording
+    if recording is None:
+        recording = os.path.join(tempfile.mkdtemp(), 'synthetic.jsonl')
+        write_recording(recording, synthetic_batches(args.batches, interval_ms=10))
+
+    print("=" * 60)
+    print("INGESTION BENCHMARK")
+    print("=" * 60)
+    print(f"Recording: {recording}")
+
+    messages, elapsed, latencies = replay_through_client(recording, speed=0)
+    throughput = messages / elapsed
+    print(f"Throughput (max speed):  {throughput:,.0f} msg/s ({messages:,} messages in {elapsed:.2f} s)")
+    print(f"  latency under load:    p50 {np.percentile(latencies, 50) / 1e6:.2f} ms | "
+          f"p99 {np.percentile(latencies, 99) / 1e6:.2f} ms")
+
+    main.clear_options_data()
+    _, _, latencies = replay_through_client(recording, speed=1, limit=args.paced_batches)
+    p50, p99 = np.percentile(latencies, 50) / 1e6, np.percentile(latencies, 99) / 1e6
+    print(f"Tick-to-store (1x pace): p50 {p50:.3f} ms | p99 {p99:.3f} ms ({len(latencies)} batches)")
+
+    bytes_per_million = measure_memory(recording, args.ticks)
+    column_bytes = sum(column.itemsize for column in main.tick_store.columns.values()) * 1_000_000
+    print(f"Memory per 1M ticks:     {bytes_per_million / 2**20:,.1f} MiB "
+          f"(store columns {column_bytes / 2**20:,.1f} MiB)")
+    print("=" * 60)
+
+    results = {
+        'throughput_msgs_per_sec': throughput,
+        'paced_p50_ms': p50,
+        'paced_p99_ms': p99,
+        'bytes_per_million_ticks': bytes_per_million,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
@@ -0,0 +1,92 @@
+"""
+Fan-out of stored records to streaming (Server-Sent Events) subscribers.
+
+Publishing never blocks: every subscriber owns a bounded queue, and a subscriber
+that falls behind has its backlog dropped and is flagged so it can catch up from
+the store in one coalesced read instead of stalling ingestion.
+"""
+import threading
+from collections import deque
+
+
+class Subscription:
+    """Bounded, drop-on-overflow queue for a single streaming client"""
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.overflowed = False
+        self.dropped = 0
+        self._wakeup = threading.Event()
+
+    def offer(self, record):
+        """Queue a record for this subscriber (called from the ingestion thread)"""
+        if self.overflowed:
+            self.dropped += 1
+            return
+        if len(self.pending) >= self.max_pending:
+            # Too far behind - discard the backlog, the reader will resync from the store
+            self.dropped += len(self.pending) + 1
+            self.pending.clear()
+            self.overflowed = True
+        else:
+            self.pending.append(record)
+        self._wakeup.set()
+
+    def invalidate(self):
+        """Force the reader to resync from the store (e.g. after the store was cleared)"""
+        self.pending.clear()
+        self.overflowed = True
+        self._wakeup.set()
+
+    def wait(self, timeout):
+        """Block until something was published; returns False on timeout"""
+        return self._wakeup.wait(timeout)
+
+    def drain(self):
+        """
+        Take everything queued so far
+        Returns (records, overflowed) - when overflowed is True the records are
+        incomplete and the caller must re-read from the store
+        """
+        self._wakeup.clear()
+        overflowed = self.overflowed
+        self.overflowed = False
+        records = []
+        while self.pending:
+            records.append(self.pending.popleft())
+        return records, overflowed
+
+
+class TickBroadcaster:
+    """Registry of streaming subscribers fed by store_data"""
+
+    def __init__(self, max_pending=500):
+        self.max_pending = max_pending
+        self._subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, limit=None):
+        """A new Subscription, or None when limit subscribers are already connected"""
+        subscription = Subscription(self.max_pending)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def publish(self, record):
+        # The tuple is swapped on (un)subscribe, so iterating it needs no lock
+        for subscription in self._subscribers:
+            subscription.offer(record)
+
+    def invalidate_all(self):
+        for subscription in self._subscribers:
+            subscription.invalidate()
+
+    def subscriber_count(self):
+        return len(self._subscribers)
@@ -0,0 +1,87 @@
+"""
+Option chains to follow: one (root, underlying, expiries, ladder) spec per chain.
+
+    OPTION_CHAINS   comma-separated chain specs, each "ROOT PRICE_TICKER [EXPIRIES] [LADDER]"
+                      ROOT          OCC root of the contracts (NDXP, SPXW, SPX, QQQ, ...)
+                      PRICE_TICKER  Polygon ticker of the underlying value (I:NDX, I:SPX, QQQ)
+                      EXPIRIES      daily or weekly, optionally *N for the next N expiries
+                                    (default: OPTIONS_EXPIRY, one expiry)
+                      LADDER        interval/puts_below/puts_above/calls_below/calls_above
+                                    (default: STRIKE_INTERVAL and the LADDER_* settings)
+                    default "NDXP I:NDX"; the first chain is the primary one (health,
+                    analytics and the dashboard's default view)
+    e.g. OPTION_CHAINS="NDXP I:NDX daily*2, SPXW I:SPX daily 5/40/40/40/40, QQQ QQQ weekly 1/20/20/20/20"
+"""
+import os
+from collections import namedtuple
+
+from market_calendar import OPTIONS_EXPIRY, options_expiries
+from subscriptions import DEFAULT_LADDER, LadderSpec, build_ladder_tickers
+from underlying import AtmTracker
+
+ChainSpec = namedtuple('ChainSpec', ['root', 'price_ticker', 'expiry_mode', 'expiry_count', 'ladder'])
+
+
+def parse_chain_spec(text):
+    fields = text.split()
+    if len(fields) < 2 or len(fields) > 4:
+        raise ValueError(f"Chain spec {text!r} must be 'ROOT PRICE_TICKER [EXPIRIES] [LADDER]'")
+    root, price_ticker = fields[0].upper(), fields[1].upper()
+
+    expiry_mode, expiry_count = OPTIONS_EXPIRY, 1
+    if len(fields) > 2:
+        expiry_mode, _, count = fields[2].lower().partition('*')
+        expiry_count = int(count) if count else 1
+        if expiry_mode not in ('daily', 'weekly') or expiry_count < 1:
+            raise ValueError(f"Chain spec {text!r}: expiries must be daily or weekly, optionally *N")
+
+    ladder = DEFAULT_LADDER
+    if len(fields) > 3:
+        ladder = LadderSpec(*(int(value) for value in fields[3].split('/')))
+
+    return ChainSpec(root, price_ticker, expiry_mode, expiry_count, ladder)
+
+
+def parse_chain_specs(text):
+    specs = [parse_chain_spec(part) for part in text.split(',') if part.strip()]
+    if not specs:
+        raise ValueError("OPTION_CHAINS lists no chains")
+    return specs
+
+
+OPTION_CHAINS = parse_chain_specs(os.getenv('OPTION_CHAINS', 'NDXP I:NDX'))
+
+
+class Chain:
+    """Live state of one chain: the ATM center its ladder follows and the expiries it covers"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.tracker = AtmTracker(spec.ladder.strike_interval)
+        self.center = None
+        self.expiries = []  # YYMMDD codes, nearest first
+
+    def set_session(self, session_date):
+        self.expiries = [day.strftime('%y%m%d')
+                         for day in options_expiries(session_date, self.spec.expiry_mode, self.spec.expiry_count)]
+
+    def recenter(self, strike):
+        self.center = strike
+        self.tracker.reset(strike)
+
+    def tickers(self):
+        """Every subscription ticker of the chain (empty until the first price sets a center)"""
+        if self.center is None:
+            return []
+        tickers = []
+        for base_date in self.expiries:
+            tickers.extend(build_ladder_tickers(self.center, base_date, self.spec.ladder, self.spec.root))
+        return tickers
+
+    def describe(self):
+        return {
+            'root': self.spec.root,
+            'underlying': self.spec.price_ticker,
+            'center_strike': self.center,
+            'expiries': list(self.expiries),
+        }
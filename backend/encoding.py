@@ -0,0 +1,109 @@
+"""
+Response encoding and content negotiation for the data endpoints.
+
+    format      ?format=rows|columnar|msgpack, or the Accept header:
+                application/json (rows, the default), application/vnd.ndx.columnar+json,
+                application/msgpack (columnar, needs the optional msgpack package)
+    compression Accept-Encoding br (optional brotli package) or gzip,
+                only for bodies of at least COMPRESS_MIN_BYTES
+
+JSON is encoded with orjson when it is installed (NumPy columns are serialized
+natively), otherwise with the standard library.
+"""
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+
+COLUMNAR_MIMETYPE = 'application/vnd.ndx.columnar+json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+FORMATS = ('rows', 'columnar', 'msgpack')
+FORMAT_MIMETYPES = {
+    'rows': 'application/json',
+    'columnar': COLUMNAR_MIMETYPE,
+    'msgpack': MSGPACK_MIMETYPE,
+}
+
+
+def _plain(value):
+    """Fallback for values the encoders do not handle natively"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def dumps(obj):
+    """Compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_plain, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_plain, separators=(',', ':')).encode()
+
+
+def dumps_text(obj):
+    return dumps(obj).decode()
+
+
+def negotiate_format(request):
+    """Response format for a request: explicit ?format= wins, then the Accept header"""
+    requested = request.args.get('format')
+    if requested:
+        requested = requested.lower()
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown format {requested!r} (available: {', '.join(FORMATS)})")
+    else:
+        best = request.accept_mimetypes.best_match(
+            [FORMAT_MIMETYPES['rows'], COLUMNAR_MIMETYPE, MSGPACK_MIMETYPE], default=FORMAT_MIMETYPES['rows'])
+        # Rows are listed first, so a browser's */* keeps meaning plain JSON rows
+        requested = {COLUMNAR_MIMETYPE: 'columnar', MSGPACK_MIMETYPE: 'msgpack'}.get(best, 'rows')
+
+    if requested == 'msgpack' and msgpack is None:
+        raise LookupError("msgpack responses need the msgpack package on the server")
+    return requested
+
+
+def encode_body(payload, fmt):
+    if fmt == 'msgpack':
+        return msgpack.packb(payload, default=_plain, use_bin_type=True)
+    return dumps(payload)
+
+
+def compress_body(body, request):
+    """(body, content_encoding) - br preferred over gzip when the client accepts both"""
+    if len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return brotli.compress(body, quality=4), 'br'
+    if accepted['gzip']:
+        return gzip.compress(body, compresslevel=5), 'gzip'
+    return body, None
+
+
+def make_response(response_class, request, payload, fmt='rows'):
+    """Encode, compress and wrap a payload in a response with the right headers"""
+    body, content_encoding = compress_body(encode_body(payload, fmt), request)
+    response = response_class(body, mimetype=FORMAT_MIMETYPES[fmt])
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
@@ -0,0 +1,127 @@
+"""
+Link between the ingestion process and API worker processes (production mode).
+
+The ingestion process writes ticks into a SharedTickStore (shm_ring.py) and
+publishes its scalar state (strike, live price, market status, ...) into the
+ring's status block once a second. API workers read the ring directly; each one
+runs a SharedStoreFollower that notices new rows, clears, session rollovers and
+status updates and feeds its own pipeline stages and stream subscribers.
+Neither side ever waits on the other.
+
+    INGEST_STATUS_SECONDS   how often the ingestion process publishes its status (default 1)
+    FOLLOW_POLL_SECONDS     how often workers check the ring for new ticks (default 0.05)
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('ndx_monitor.follower')
+
+INGEST_STATUS_SECONDS = float(os.getenv('INGEST_STATUS_SECONDS', 1.0))
+FOLLOW_POLL_SECONDS = float(os.getenv('FOLLOW_POLL_SECONDS', 0.05))
+
+
+class StatusPublisher:
+    """Ingestion side: hands get_status() to publish() every INGEST_STATUS_SECONDS"""
+
+    def __init__(self, get_status, publish, interval=INGEST_STATUS_SECONDS):
+        self.get_status = get_status
+        self.publish = publish
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                status = self.get_status()
+                status['written_at'] = time.time()
+                self.publish(status)
+            except Exception as e:
+                logger.error(f"❌ Error publishing ingest status: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+
+class SharedStoreFollower:
+    """
+    API-worker side: watches a shared store for changes made by the ingestion process
+    on_rows(columns, symbols)  rows appended since the last poll
+    on_reset(store)            the store was cleared, reset or replaced - rebuild from it
+    on_rollover(store)         cursors were invalidated for a new session but the rows kept
+                               (delivered through on_rows first)
+    on_status(status)          a newly published status dict
+    """
+
+    def __init__(self, store, on_rows, on_reset, on_rollover, on_status, poll_seconds=FOLLOW_POLL_SECONDS):
+        self.store = store
+        self.on_rows = on_rows
+        self.on_reset = on_reset
+        self.on_rollover = on_rollover
+        self.on_status = on_status
+        self.poll_seconds = poll_seconds
+        self.seen_seq = store.last_seq
+        self.cleared_seq = store.cleared_seq
+        self.wiped_seq = store.wiped_seq
+        self.status_written_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def poll(self):
+        store = self.store
+        if store.replaced():
+            # Ingestion restarted - map the new ring
+            store = self.store = type(store).attach(store.path)
+            self._reset(store)
+
+        # Read before last_seq: the rows delivered below then reach at least the rollover point
+        cleared_seq = store.cleared_seq
+        last_seq = store.last_seq
+        if store.wiped_seq != self.wiped_seq or last_seq < self.seen_seq:
+            self._reset(store)
+        else:
+            if last_seq > self.seen_seq:
+                columns = store.read_range(self.seen_seq + 1, last_seq)
+                self.seen_seq = last_seq
+                self.on_rows(columns, store.symbols)
+            if cleared_seq != self.cleared_seq:
+                self.cleared_seq = cleared_seq
+                self.on_rollover(store)
+
+        status = store.read_status()
+        if status is not None and status.get('written_at') != self.status_written_at:
+            self.status_written_at = status.get('written_at')
+            self.on_status(status)
+
+    def _reset(self, store):
+        self.seen_seq = store.last_seq
+        self.cleared_seq = store.cleared_seq
+        self.wiped_seq = store.wiped_seq
+        self.on_reset(store)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"❌ Error following the shared tick store: {e}")
+            self._stop.wait(self.poll_seconds)
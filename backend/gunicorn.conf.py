@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for the production API (see wsgi.py)
+
+    WEB_CONCURRENCY   worker processes (default: 1 per CPU, at most 2) - each one follows
+                      the ring and rebuilds every pipeline stage and the analytics itself,
+                      so concurrency comes from threads rather than more workers
+    API_THREADS       threads per worker - /api/stream clients each hold one, and at most
+                      STREAM_MAX_SUBSCRIBERS of them (default API_THREADS - 4) are
+                      accepted, so ordinary requests always find a thread (default 16)
+    API_PORT          port the Node proxy forwards /api to (default 5000)
+"""
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = 'wsgi:app'
+bind = f"0.0.0.0:{os.getenv('API_PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 2)))
+worker_class = 'gthread'
+threads = int(os.getenv('API_THREADS', 16))
+# gthread workers heartbeat from their main thread, so long-lived SSE responses
+# do not trip the worker timeout
+graceful_timeout = 10
+accesslog = None
@@ -0,0 +1,174 @@
+"""
+Historical queries over the persisted tick segments.
+
+Every segment is summarized in blocks of HISTORY_BLOCK_ROWS records: row range,
+min/max timestamp, min/max strike and a bitmask of the option types present.
+A query first checks those summaries and only reads the blocks that can contain
+matches, so narrow time/strike ranges over many days skip most of the data.
+
+Summaries of sealed segments (full, or from a past day) are saved next to the
+segment as segment-NNNNNN.idx.npy the first time they are needed. The segment
+still being written today is summarized in memory; as it grows, only the blocks
+past the last complete one are re-summarized.
+"""
+import datetime
+import os
+import threading
+
+import numpy as np
+
+from tick_log import TICK_DATA_DIR, SEGMENT_ROWS, CST, map_segment, read_symbols, segment_paths, day_key
+from tick_store import OPTION_TYPE_CODES
+
+HISTORY_BLOCK_ROWS = int(os.getenv('HISTORY_BLOCK_ROWS', 4096))
+
+INDEX_SUFFIX = '.idx.npy'
+
+BLOCK_INDEX_DTYPE = np.dtype([
+    ('first_row', np.int64),
+    ('rows', np.int64),
+    ('ts_min', np.int64),
+    ('ts_max', np.int64),
+    ('strike_min', np.int32),
+    ('strike_max', np.int32),
+    ('type_mask', np.int8),
+])
+
+# Segment path -> (row count, block index): one entry per segment, replaced as it grows
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def build_block_index(records, block_rows=HISTORY_BLOCK_ROWS):
+    """Summarize records in fixed-size blocks (vectorized, one pass per column)"""
+    count = len(records)
+    starts = np.arange(0, count, block_rows, dtype=np.int64)
+    index = np.zeros(len(starts), dtype=BLOCK_INDEX_DTYPE)
+    if count == 0:
+        return index
+
+    index['first_row'] = starts
+    index['rows'] = np.minimum(block_rows, count - starts)
+    timestamps = records['timestamp_ns']
+    strikes = records['strike']
+    index['ts_min'] = np.minimum.reduceat(timestamps, starts)
+    index['ts_max'] = np.maximum.reduceat(timestamps, starts)
+    index['strike_min'] = np.minimum.reduceat(strikes, starts)
+    index['strike_max'] = np.maximum.reduceat(strikes, starts)
+    type_bits = np.left_shift(1, records['option_type'].astype(np.int8)).astype(np.int8)
+    index['type_mask'] = np.bitwise_or.reduceat(type_bits, starts)
+    return index
+
+
+def segment_block_index(path, records, sealed):
+    """Block index for one segment, loaded from / saved to disk once the segment is sealed"""
+    with _index_lock:
+        cached_rows, index = _index_cache.get(path, (None, None))
+    if cached_rows == len(records):
+        return index
+
+    index_path = path[:-len('.ticks')] + INDEX_SUFFIX
+    loaded = None
+    if sealed and os.path.exists(index_path):
+        loaded = np.load(index_path)
+        if int(loaded['rows'].sum()) != len(records):
+            loaded = None  # Stale summary - rebuild below
+    if loaded is None:
+        if cached_rows is not None and cached_rows < len(records):
+            # The segment grew - its complete blocks are unchanged, summarize the rest
+            complete = cached_rows // HISTORY_BLOCK_ROWS
+            tail = build_block_index(records[complete * HISTORY_BLOCK_ROWS:])
+            tail['first_row'] += complete * HISTORY_BLOCK_ROWS
+            loaded = np.concatenate((index[:complete], tail))
+        else:
+            loaded = build_block_index(records)
+        if sealed:
+            np.save(index_path, loaded)
+
+    with _index_lock:
+        _index_cache[path] = (len(records), loaded)
+    return loaded
+
+
+def days_between(start_day, end_day):
+    """'YYYYMMDD' strings for every calendar day from start_day to end_day inclusive"""
+    day = start_day
+    while day <= end_day:
+        yield day.strftime('%Y%m%d')
+        day += datetime.timedelta(days=1)
+
+
+def parse_cst_time(value, default_date):
+    """
+    Parse a query time in CST: 'YYYY-MM-DD HH:MM[:SS]', ISO 'YYYY-MM-DDTHH:MM[:SS]',
+    'YYYY-MM-DD' or 'HH:MM[:SS]' (on default_date). Returns an aware datetime.
+    """
+    value = value.strip().replace('T', ' ')
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return CST.localize(datetime.datetime.strptime(value, fmt))
+        except ValueError:
+            pass
+    for fmt in ('%H:%M:%S', '%H:%M'):
+        try:
+            parsed = datetime.datetime.strptime(value, fmt).time()
+            return CST.localize(datetime.datetime.combine(default_date, parsed))
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognized time: {value!r}")
+
+
+def query_history(start_ns, end_ns, strike_min=None, strike_max=None, option_type=None, min_volume=0,
+                  data_dir=TICK_DATA_DIR, stats=None):
+    """
+    Yield (records, symbols) chunks of persisted ticks matching the filters, oldest day first
+    records is a RECORD_DTYPE array (at most one block); symbols maps its contract ids
+    stats, if given, is a dict updated with blocks_scanned / blocks_skipped
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('blocks_scanned', 0)
+    stats.setdefault('blocks_skipped', 0)
+
+    type_mask = 0x7 if option_type is None else 1 << OPTION_TYPE_CODES[option_type]
+    today = day_key(datetime.datetime.now(CST).timestamp() * 1e9)
+    start_day = datetime.datetime.fromtimestamp(start_ns / 1e9, CST).date()
+    end_day = datetime.datetime.fromtimestamp(end_ns / 1e9, CST).date()
+
+    for day in days_between(start_day, end_day):
+        day_dir = os.path.join(data_dir, day)
+        paths = segment_paths(day_dir)
+        if not paths:
+            continue
+        symbols = read_symbols(day_dir)
+
+        for i, path in enumerate(paths):
+            records = map_segment(path)
+            sealed = len(records) >= SEGMENT_ROWS or day != today or i < len(paths) - 1
+            index = segment_block_index(path, records, sealed)
+
+            candidates = (index['ts_max'] >= start_ns) & (index['ts_min'] <= end_ns) & ((index['type_mask'] & type_mask) != 0)
+            if strike_min is not None:
+                candidates &= index['strike_max'] >= strike_min
+            if strike_max is not None:
+                candidates &= index['strike_min'] <= strike_max
+
+            stats['blocks_skipped'] += int(len(index) - candidates.sum())
+            for block in index[candidates]:
+                stats['blocks_scanned'] += 1
+                first = int(block['first_row'])
+                chunk = records[first:first + int(block['rows'])]
+
+                keep = (chunk['timestamp_ns'] >= start_ns) & (chunk['timestamp_ns'] <= end_ns)
+                if strike_min is not None:
+                    keep &= chunk['strike'] >= strike_min
+                if strike_max is not None:
+                    keep &= chunk['strike'] <= strike_max
+                if option_type is not None:
+                    keep &= chunk['option_type'] == OPTION_TYPE_CODES[option_type]
+                if min_volume:
+                    keep &= chunk['volume'] >= min_volume
+
+                matched = chunk[keep]
+                if len(matched):
+                    yield matched, symbols
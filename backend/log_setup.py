@@ -0,0 +1,100 @@
+"""
+Logging setup for the backend.
+
+Records are handed to a bounded queue and written by a background listener
+thread, so a slow stdout pipe (server.js inherits our stdio) never stalls the
+WebSocket callback. When the queue is full, records are dropped and counted
+instead of blocking.
+
+Environment:
+    LOG_LEVEL           DEBUG / INFO / WARNING / ERROR (default INFO)
+    LOG_FORMAT          text or json (default text)
+    LOG_QUEUE_SIZE      records buffered before dropping (default 10000)
+    TICK_LOG_INTERVAL   minimum seconds between tick lines per symbol (default 60)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+TICK_LOG_INTERVAL = float(os.getenv('TICK_LOG_INTERVAL', 60))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log sinks that parse structured records"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of raising"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimiter:
+    """Allows an event at most once per interval for each key (e.g. per option symbol)"""
+
+    def __init__(self, interval_seconds):
+        self.interval_ns = int(interval_seconds * 1_000_000_000)
+        self._last_allowed = {}
+
+    def allow(self, key, now_ns):
+        last = self._last_allowed.get(key)
+        if last is not None and now_ns - last < self.interval_ns:
+            return False
+        self._last_allowed[key] = now_ns
+        return True
+
+
+_listener = None
+
+
+def configure_logging():
+    """Route all logging through the background queue listener (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers = [DroppingQueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def dropped_log_records():
+    """Number of records discarded because the log queue was full"""
+    return sum(getattr(h, 'dropped', 0) for h in logging.getLogger().handlers)
@@ -1,561 +1,1466 @@
 from massive import WebSocketClient
-from massive.websocket.models import WebSocketMessage, Feed, Market
+from massive.websocket.models import WebSocketMessage, Market
 from typing import List
 import datetime
 import os
 import time
 import pytz
-import requests
 import threading
-import json
-from collections import deque
-from flask import Flask, jsonify
+import logging
+import asyncio
+import functools
+import numpy as np
+from broadcast import TickBroadcaster
+from tick_store import TickStore, select_rows
+from tick_log import TickLogWriter, load_day, day_key, TICK_PERSIST, TICK_DATA_DIR
+from history import query_history, parse_cst_time
+from follower import StatusPublisher, SharedStoreFollower
+from shm_ring import SharedTickStore, TICK_SHM_PATH
+from serialization import format_option_rows, format_option_columns, format_chain_rows
+from encoding import negotiate_format, make_response, dumps_text
+from summary import StrikeSummary
+from quotes import LatestQuotes
+from alerts import ActivityDetector, ALERT_KINDS
+from bars import BarBuilder
+from retention import RetentionPolicy, ring_capacity, SESSION_ROLLOVER, RETENTION_SWEEP_SECONDS
+from analytics import AnalyticsEngine
+from market_calendar import in_session, next_session
+from scheduler import Scheduler
+from replay import TickRecorder, TICK_RECORD_PATH
+from metrics import Registry, Counter, Gauge, Histogram, TimedLock, BYTES_BUCKETS, CONTENT_TYPE
+from occ_symbols import parse_option_symbol, warm_cache
+from underlying import UnderlyingPriceFeed, http_session, REST_BASE_URL, WS_FEED, WS_SECURE, INDEX_TICKER
+from subscriptions import SubscriptionManager
+from chains import OPTION_CHAINS, Chain
+from supervisor import ConnectionSupervisor
+from backfill import BACKFILL, fetch_gap_bars, fetch_minute_aggs
+from log_setup import configure_logging, dropped_log_records, RateLimiter, TICK_LOG_INTERVAL
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 
+logger = logging.getLogger('ndx_monitor')
+
 # Configuration
 POLYGON_API_KEY = os.getenv('POLYGON_API_KEY', 'wsWMG2p9vhDDjVxAHSRz6qbSR_a7B1wL')
+# Option chains followed (OPTION_CHAINS); the first is the primary one behind the
+# legacy current_strike / live_ndx_price fields, analytics and the default summary
+chains = [Chain(spec) for spec in OPTION_CHAINS]
+primary_chain = chains[0]
+CHAIN_ROOTS = frozenset(chain.spec.root for chain in chains)
+CST = pytz.timezone('America/Chicago')
+# 'dev': one process ingests and serves the Flask dev server (python backend/main.py)
+# 'production': main.py only ingests; gunicorn workers (wsgi.py) serve the API
+SERVE_MODE = os.getenv('SERVE_MODE', 'dev').lower()
+# Session timing around the market calendar: warm up, connect just before the open,
+# disconnect just after the close (defaults keep the 8:29 AM - 3:01 PM CST window)
+PREOPEN_WARMUP = datetime.timedelta(seconds=float(os.getenv('PREOPEN_WARMUP_SECONDS', 300)))
+CONNECT_LEAD = datetime.timedelta(seconds=float(os.getenv('CONNECT_LEAD_SECONDS', 60)))
+CLOSE_GRACE = datetime.timedelta(seconds=float(os.getenv('CLOSE_GRACE_SECONDS', 60)))
 
 # Global variables for dynamic strike management
 current_strike = None
 last_strike = None
 live_ndx_price = None
-next_refresh_time = None
-reconnect_flag = False
+current_base_date = None  # Nearest expiry code (YYMMDD) of the primary chain
 websocket_running = False
+websocket_connections = 0  # Live shard connections of the options WebSocket
 market_status = 'closed'  # 'open', 'closed', or 'pre-market'
 last_market_date = None  # Track the last trading day
-
-# In-memory data storage (keep last 1000 records)
-options_data = deque(maxlen=1000)
-data_lock = threading.Lock()
+prepared_session = None  # Date of the session the pre-open warmup ran for
+# Ingestion runs on one asyncio event loop (run_ingestion): the timers driving
+# warmup/connect/close, the session, every shard connection and the price feeds are
+# tasks on it. session_wakeup is what the session task sleeps on (both are created on the loop)
+session_scheduler = None
+session_wakeup = None
+
+# Metrics for /metrics. Ingestion-side metrics are rendered by the ingesting process
+# (and mirrored to API workers through the ingest status in production mode);
+# API metrics are per serving process.
+ingest_metrics = Registry()
+api_metrics = Registry()
+MESSAGES_RECEIVED = Counter('ndx_messages_received_total', "WebSocket messages handed to handle_msg",
+                            registry=ingest_metrics)
+MESSAGES_STORED = Counter('ndx_messages_stored_total', "Option aggregates stored", registry=ingest_metrics)
+MESSAGES_FILTERED = Counter('ndx_messages_filtered_total', "Messages not stored, by reason", ['reason'],
+                            registry=ingest_metrics)
+HANDLE_MSG_SECONDS = Histogram('ndx_handle_msg_seconds', "Time handle_msg spends on one batch",
+                               registry=ingest_metrics)
+DATA_LOCK_WAIT_SECONDS = Histogram('ndx_data_lock_wait_seconds', "Time spent waiting to acquire data_lock",
+                                   registry=ingest_metrics)
+WS_CONNECTS = Counter('ndx_ws_connects_total', "WebSocket connection attempts", registry=ingest_metrics)
+WS_RECONNECTS = Counter('ndx_ws_reconnects_total', "WebSocket reconnects after a failed connection",
+                        registry=ingest_metrics)
+WS_RECONNECT_SECONDS = Histogram('ndx_ws_reconnect_seconds', "Time from a connection failing to the next attempt",
+                                 registry=ingest_metrics, buckets=(1, 5, 10, 30, 60, 120, 300))
+WS_GAPS = Counter('ndx_ws_gaps_total', "Outages of the options stream, by cause (error, closed, stall)", ['reason'],
+                  registry=ingest_metrics)
+WS_GAP_SECONDS = Histogram('ndx_ws_gap_seconds', "Time from the last batch before an outage to the first one after it",
+                           registry=ingest_metrics, buckets=(1, 5, 10, 30, 60, 120, 300, 900))
+BACKFILLED_BARS = Counter('ndx_backfilled_bars_total', "Minute aggregates stored from the REST backfill",
+                          registry=ingest_metrics)
+REST_REQUEST_SECONDS = Histogram('ndx_rest_request_seconds', "Polygon REST request latency", ['endpoint'],
+                                 registry=ingest_metrics)
+WEBSOCKET_RUNNING = Gauge('ndx_websocket_running', "1 while the options WebSocket client runs",
+                          registry=ingest_metrics)
+LAST_MESSAGE_AGE = Gauge('ndx_last_message_age_seconds', "Seconds since the last WebSocket batch",
+                         registry=ingest_metrics)
+ALERTS_RAISED = Counter('ndx_alerts_total', "Unusual-activity alerts raised, by kind", ['kind'],
+                        registry=ingest_metrics)
+EVICTED = Counter('ndx_evicted_total', "Ticks and bars aged out of memory by retention", ['tier'],
+                  registry=ingest_metrics)
+API_REQUESTS = Counter('ndx_api_requests_total', "API requests served", ['endpoint', 'status'],
+                       registry=api_metrics)
+API_REQUEST_SECONDS = Histogram('ndx_api_request_seconds', "API request latency (streamed bodies: until headers)",
+                                ['endpoint'], registry=api_metrics)
+API_RESPONSE_BYTES = Histogram('ndx_api_response_bytes', "API response body size (as sent, after compression)",
+                               ['endpoint'], registry=api_metrics, buckets=BYTES_BUCKETS)
+TICKS_STORED = Gauge('ndx_ticks_stored', "Ticks held in the in-memory store", registry=api_metrics)
+STREAM_SUBSCRIBERS = Gauge('ndx_stream_subscribers', "Open /api/stream connections", registry=api_metrics)
+LOG_RECORDS_DROPPED = Gauge('ndx_log_records_dropped', "Log records dropped by the full log queue",
+                            registry=api_metrics)
+# Latest ingestion metrics text and data gaps published by the ingestion process (production API workers)
+mirrored_ingest_metrics = ''
+mirrored_data_gaps = []
+
+# In-memory data storage: columnar ring buffer sized for a full trading session
+# (TICK_STORE_CAPACITY rows, or as many as TICK_MEMORY_MB holds - see retention.py)
+TICK_STORE_CAPACITY = int(os.getenv('TICK_STORE_CAPACITY', 0)) or ring_capacity()
+# Most rows returned by /api/options in one response (snapshot or delta)
+MAX_RESPONSE_ROWS = 1000
+# Every tick is stored; the volume filter is applied per request (?min_volume=)
+DEFAULT_MIN_VOLUME = int(os.getenv('MIN_VOLUME', 20))
+tick_store = TickStore(TICK_STORE_CAPACITY)
+data_lock = TimedLock(DATA_LOCK_WAIT_SECONDS)
+
+def report_alert(alert):
+    """Ingestion process: log and count every unusual-activity alert (API workers raise the same ones silently)"""
+    ALERTS_RAISED.labels(alert['kind']).inc()
+    subject = alert.get('symbol') or f"{alert['root']} {alert['expiry']} {alert.get('option_type', '')}".rstrip()
+    logger.info(f"🚨 {alert['kind']}: {subject} - {dumps_text(alert)}")
+
+# Incremental stages fed every stored tick, guarded by data_lock like the store:
+# per-(strike, type) aggregates behind /api/summary, rolling bars behind /api/bars,
+# the latest quote of every contract behind /api/chain and the unusual-activity
+# detector behind /api/alerts
+strike_summary = StrikeSummary()
+bar_builder = BarBuilder()
+latest_quotes = LatestQuotes()
+activity_detector = ActivityDetector(on_alert=report_alert)
+pipeline_stages = (strike_summary, bar_builder, latest_quotes, activity_detector)
+# The session aggregates restart with every trading day; the bars age out by time instead
+session_stages = (strike_summary, latest_quotes, activity_detector)
+
+# Time windows and memory caps for the ticks and bars held in memory
+retention = RetentionPolicy.from_env()
+last_retention_sweep = 0.0  # time.monotonic() of an API worker's last bar sweep
+
+# Append-only on-disk copy of every stored tick (written off-thread)
+tick_writer = TickLogWriter() if TICK_PERSIST else None
+
+# Raw batch recorder for offline replay (see replay.py) - opened by the ingestion
+# process only, never by the API workers importing this module
+recorder = None
+
+# Push delivery to /api/stream subscribers (bounded queue per client). Each open
+# stream holds a server thread for as long as it is connected, so only so many are
+# accepted per process - the rest of API_THREADS stays free for ordinary requests
+STREAM_QUEUE_SIZE = 500
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_MAX_SUBSCRIBERS = int(os.getenv('STREAM_MAX_SUBSCRIBERS', max(int(os.getenv('API_THREADS', 16)) - 4, 1)))
+broadcaster = TickBroadcaster(max_pending=STREAM_QUEUE_SIZE)
 
 # Flask app for API
 flask_app = Flask(__name__)
 CORS(flask_app)  # Enable CORS for frontend access
 
+def data_version():
+    """Version tag of the stored data, changes on every store, eviction and clear"""
+    return f"{tick_store.cleared_seq}-{tick_store.first_seq}-{tick_store.last_seq}"
+
+def read_options_since(since, limit=MAX_RESPONSE_ROWS, min_volume=DEFAULT_MIN_VOLUME, formatter=format_option_rows):
+    """
+    Read the stored records newer than the ?since= cursor with volume >= min_volume
+    formatter turns the columns into the response shape (rows or columnar)
+    Returns (records, seq, reset, version) - reset is True when the cursor was
+    missing or no longer valid and records holds the latest snapshot instead
+    """
+    with data_lock:
+        # Fall back to a snapshot when the cursor is missing or no longer valid
+        # (older than the retained window, from before a clear, from a previous run,
+        # or so far behind that the delta would exceed the response limit)
+        reset = (
+            since is None
+            or since <= tick_store.cleared_seq
+            or since > tick_store.last_seq
+            or since < tick_store.first_seq - 1
+            or tick_store.last_seq - since > limit
+        )
+
+        if reset:
+            columns = tick_store.read_last_matching(limit, min_volume)
+        else:
+            columns = tick_store.read_since(since)
+            if min_volume > 0:
+                columns = select_rows(columns, columns['volume'] >= min_volume)
+
+        seq = tick_store.last_seq
+        version = data_version()
+        symbols = tick_store.symbols
+
+    # Strings are only built here, outside the lock
+    return formatter(columns, symbols), seq, reset, version
+
 @flask_app.route('/api/options', methods=['GET'])
 def get_options_data():
-    """API endpoint to get options data"""
+    """
+    API endpoint to get options data
+    Pass ?since=<seq> to receive only the records stored after that cursor,
+    ?limit=<n> to change the maximum number of rows (default 1000) and
+    ?min_volume=<n> to change the volume filter (default MIN_VOLUME).
+    ?format=columnar|msgpack (or the Accept header) selects a compact one-array-per-field
+    encoding, and responses are gzip/brotli compressed when the client accepts it.
+    Responds 304 when the client's ETag matches the current data version and query.
+    """
+    try:
+        fmt = negotiate_format(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 406
+
+    since = request.args.get('since', type=int)
+    limit = min(request.args.get('limit', MAX_RESPONSE_ROWS, type=int), TICK_STORE_CAPACITY)
+    min_volume = request.args.get('min_volume', DEFAULT_MIN_VOLUME, type=int)
+
+    # The body depends on the query as much as on the data - a changed filter or format never gets a 304
+    query = f"{fmt}-{min_volume}-{limit}-{since}"
+    etag = f"{data_version()}-{query}"
+    if request.if_none_match.contains(etag):
+        response = flask_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    if fmt == 'rows':
+        data_list, seq, reset, version = read_options_since(since, limit, min_volume)
+        payload = {'data': data_list, 'count': len(data_list)}
+    else:
+        payload, seq, reset, version = read_options_since(since, limit, min_volume, format_option_columns)
+        payload['count'] = len(payload['columns']['seq'])
+    etag = f"{version}-{query}"
+
+    payload.update({
+        'seq': seq,
+        'reset': reset,
+        'last_update': datetime.datetime.now().isoformat()
+    })
+    response = make_response(flask_app.response_class, request, payload, fmt)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def format_sse_event(data_list, seq, reset):
+    """Encode a batch of records as one Server-Sent Event (same shape as /api/options)"""
+    payload = dumps_text({'data': data_list, 'count': len(data_list), 'seq': seq, 'reset': reset})
+    return f"id: {seq}\nevent: ticks\ndata: {payload}\n\n"
+
+@flask_app.route('/api/stream', methods=['GET'])
+def stream_options_data():
+    """
+    Server-Sent Events endpoint pushing records as soon as they are stored
+    Resumes from ?since=<seq> or the Last-Event-ID header sent on reconnect;
+    ?min_volume=<n> changes the volume filter (default MIN_VOLUME).
+    Responds 503 once STREAM_MAX_SUBSCRIBERS streams are open - the client polls /api/options instead.
+    """
+    since = request.args.get('since', type=int)
+    min_volume = request.args.get('min_volume', DEFAULT_MIN_VOLUME, type=int)
+    if since is None and request.headers.get('Last-Event-ID', '').isdigit():
+        since = int(request.headers['Last-Event-ID'])
+
+    # Subscribe before reading the backlog so nothing stored in between is missed
+    subscription = broadcaster.subscribe(limit=STREAM_MAX_SUBSCRIBERS)
+    if subscription is None:
+        response = jsonify({'error': f"Too many open streams (limit {STREAM_MAX_SUBSCRIBERS}) - poll /api/options"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '60'
+        return response
+
+    def generate():
+        try:
+            data_list, last_seq, reset, _ = read_options_since(since, min_volume=min_volume)
+            yield format_sse_event(data_list, last_seq, reset)
+
+            while True:
+                if not subscription.wait(STREAM_KEEPALIVE_SECONDS):
+                    yield ": keep-alive\n\n"
+                    continue
+
+                # The queue only carries sequence numbers - everything new (including
+                # a backlog dropped on overflow or a clear) is read from the store in one go
+                published, overflowed = subscription.drain()
+                if not overflowed and published and published[-1] <= last_seq:
+                    continue  # Already covered by the initial backlog read
+
+                data_list, last_seq, reset, _ = read_options_since(last_seq, min_volume=min_volume)
+                if data_list or reset:
+                    yield format_sse_event(data_list, last_seq, reset)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return flask_app.response_class(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@flask_app.route('/api/history', methods=['GET'])
+def get_history():
+    """
+    Query persisted ticks across sessions
+    ?date=YYYY-MM-DD (default today, CST), ?from= / ?to= as 'HH:MM[:SS]' on that date
+    or full 'YYYY-MM-DD HH:MM[:SS]' times spanning several days, ?strike_min= / ?strike_max=,
+    ?type=CALL|PUT, ?min_volume=<n> (default MIN_VOLUME) and ?limit=<n>. Rows are streamed in chunks as matching blocks are read.
+    """
+    try:
+        date_arg = request.args.get('date')
+        base_date = (datetime.datetime.strptime(date_arg, '%Y-%m-%d').date() if date_arg
+                     else datetime.datetime.now(CST).date())
+        start = parse_cst_time(request.args['from'], base_date) if 'from' in request.args \
+            else CST.localize(datetime.datetime.combine(base_date, datetime.time.min))
+        end = parse_cst_time(request.args['to'], base_date) if 'to' in request.args \
+            else CST.localize(datetime.datetime.combine(base_date, datetime.time.max))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    option_type = request.args.get('type', '').upper() or None
+    if option_type not in (None, 'CALL', 'PUT'):
+        return jsonify({'error': f"Unknown type: {option_type!r}"}), 400
+
+    strike_min = request.args.get('strike_min', type=int)
+    strike_max = request.args.get('strike_max', type=int)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        return jsonify({'error': f"limit must not be negative, got {limit}"}), 400
+    min_volume = request.args.get('min_volume', DEFAULT_MIN_VOLUME, type=int)
+    start_ns = int(start.timestamp() * 1e9)
+    end_ns = int(end.timestamp() * 1e9)
+
+    def generate():
+        stats = {}
+        count = 0
+        yield '{"data":['
+        for records, symbols in query_history(start_ns, end_ns, strike_min, strike_max, option_type, min_volume, stats=stats):
+            if limit is not None:
+                records = records[:limit - count]
+            rows = format_option_rows(records, symbols)
+            if rows:
+                yield (',' if count else '') + dumps_text(rows)[1:-1]
+                count += len(rows)
+            if limit is not None and count >= limit:
+                break
+        yield '],' + dumps_text({
+            'count': count,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'blocks_scanned': stats['blocks_scanned'],
+            'blocks_skipped': stats['blocks_skipped']
+        })[1:]
+
+    return flask_app.response_class(generate(), mimetype='application/json')
+
+@flask_app.route('/api/summary', methods=['GET'])
+def get_summary():
+    """
+    Per-(strike, type) aggregates of everything stored this session: cumulative
+    volume, last price, VWAP, high/low and tick count, plus put/call totals.
+    ?underlying=<root> and ?expiry=YYMMDD select the chain (default: the primary
+    chain's nearest expiry; ?expiry=all covers every expiry of the root).
+    Responds 304 when the client's ETag matches the current data version.
+    """
+    root = request.args.get('underlying', primary_chain.spec.root).upper()
+    expiry = request.args.get('expiry', current_base_date if root == primary_chain.spec.root else 'all')
+    if expiry == 'all':
+        expiry = None
+    etag = f"{data_version()}-{root}-{expiry or 'all'}"
+
+    if request.if_none_match.contains(etag):
+        response = flask_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
     with data_lock:
-        data_list = list(options_data)
-    return jsonify({
-        'data': data_list,
-        'count': len(data_list),
+        strikes, totals = strike_summary.snapshot(root, expiry)
+        seq = tick_store.last_seq
+        etag = f"{data_version()}-{root}-{expiry or 'all'}"
+
+    response = jsonify({
+        'underlying': root,
+        'expiry': expiry,
+        'strikes': strikes,
+        'totals': totals,
+        'count': len(strikes),
+        'seq': seq,
+        'last_update': datetime.datetime.now().isoformat()
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@flask_app.route('/api/chain', methods=['GET'])
+def get_chain():
+    """
+    Latest state of every strike: one row per strike of the chain's ladder with the
+    newest CALL and PUT quote (null until the contract trades), centered on the ATM strike
+    ?underlying=<root> (default the primary chain), ?expiry=YYMMDD (default its nearest
+    expiry) and ?width=<n> to keep only n strikes either side of the center.
+    Reads a versioned snapshot without taking data_lock; responds 304 when the
+    client's ETag matches it.
+    """
+    root = request.args.get('underlying', primary_chain.spec.root).upper()
+    chain = next((chain for chain in chains if chain.spec.root == root), None)
+    if chain is None:
+        return jsonify({'error': f"Unknown underlying: {root!r}"}), 400
+    if chain.center is None or not chain.expiries:
+        return jsonify({'status': 'pending', 'underlying': root, 'strikes': [], 'count': 0})
+
+    center = chain.center
+    expiry = request.args.get('expiry', chain.expiries[0])
+    ladder = chain.spec.ladder
+    below = max(ladder.puts_below, ladder.calls_below)
+    above = max(ladder.puts_above, ladder.calls_above)
+    width = request.args.get('width', type=int)
+    if width is not None:
+        below, above = min(below, width), min(above, width)
+    strikes = [center + i * ladder.strike_interval for i in range(-below, above + 1)]
+
+    version, quotes = latest_quotes.snapshot()
+    etag = f"{version}-{root}-{expiry}-{center}-{below}-{above}"
+    if request.if_none_match.contains(etag):
+        response = flask_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    rows = format_chain_rows(quotes, root, expiry, center, strikes)
+    response = jsonify({
+        'underlying': root,
+        'expiry': expiry,
+        'center_strike': center,
+        'underlying_price': price_feeds[chain.spec.price_ticker].last_price,
+        'strikes': rows,
+        'count': len(rows),
+        'version': version,
+        'last_update': datetime.datetime.now().isoformat()
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@flask_app.route('/api/alerts', methods=['GET'])
+def get_alerts():
+    """
+    Unusual-activity alerts of this session (volume spikes, sweeps, put/call skew shifts), oldest first
+    Pass ?since=<id> to receive only alerts raised after that one, narrowed by
+    ?kind=volume_spike|sweep|skew_shift and ?underlying=<root>; ?limit=<n> caps the
+    count (default 100, newest kept). reset is true when the cursor is no longer valid
+    (older than the retained alerts or from a previous session) and the latest alerts are returned.
+    Reads a versioned snapshot without taking data_lock; responds 304 when the client's ETag matches it.
+    """
+    kind = request.args.get('kind')
+    if kind is not None and kind not in ALERT_KINDS:
+        return jsonify({'error': f"Unknown kind {kind!r} (available: {', '.join(ALERT_KINDS)})"}), 400
+    root = request.args.get('underlying', '').upper() or None
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', 100, type=int)
+
+    last_id, alerts = activity_detector.snapshot()
+    etag = f"{tick_store.cleared_seq}-{last_id}-{since}-{kind or 'all'}-{root or 'all'}-{limit}"
+    if request.if_none_match.contains(etag):
+        response = flask_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    oldest_id = alerts[0]['id'] if alerts else last_id + 1
+    reset = since is None or since > last_id or since < oldest_id - 1
+    selected = [alert for alert in alerts
+                if (reset or alert['id'] > since)
+                and (kind is None or alert['kind'] == kind)
+                and (root is None or alert['root'] == root)]
+    selected = selected[-limit:] if limit > 0 else []
+
+    response = jsonify({
+        'alerts': selected,
+        'count': len(selected),
+        'last_id': last_id,
+        'reset': reset,
+        'last_update': datetime.datetime.now().isoformat()
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@flask_app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Latest ladder analytics: per-strike implied vol smile with delta/gamma/theta/vega
+    for both sides, per-strike gamma exposure and the net GEX across the ladder
+    """
+    snapshot = analytics_engine.latest
+    if snapshot is None:
+        return jsonify({'status': 'pending', 'smile': [], 'net_gex': None})
+
+    response = jsonify(snapshot)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@flask_app.route('/api/bars', methods=['GET'])
+def get_bars():
+    """
+    Rolling OHLCV + VWAP bars per contract
+    ?interval=1m|5m|15m (default 1m), narrowed by ?symbol=, ?strike= and ?type=CALL|PUT;
+    ?limit=<n> bars per contract (default 100, newest last, the open bar included)
+    and ?min_volume=<n> to drop thin bars (default 0)
+    """
+    interval = request.args.get('interval', '1m')
+    option_type = request.args.get('type', '').upper() or None
+    try:
+        with data_lock:
+            contracts = bar_builder.query(
+                interval,
+                symbol=request.args.get('symbol'),
+                strike=request.args.get('strike', type=int),
+                option_type=option_type,
+                limit=request.args.get('limit', 100, type=int),
+                min_volume=request.args.get('min_volume', 0, type=int)
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = jsonify({
+        'interval': interval,
+        'contracts': contracts,
+        'count': len(contracts),
         'last_update': datetime.datetime.now().isoformat()
     })
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+TICKS_STORED.set_function(lambda: len(tick_store))
+STREAM_SUBSCRIBERS.set_function(lambda: broadcaster.subscriber_count())
+LOG_RECORDS_DROPPED.set_function(dropped_log_records)
+WEBSOCKET_RUNNING.set_function(lambda: int(websocket_running))
+LAST_MESSAGE_AGE.set_function(
+    lambda: None if last_message_time is None else max(time.time() - last_message_time.timestamp(), 0.0))
+
+@flask_app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@flask_app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    API_REQUESTS.labels(endpoint, response.status_code).inc()
+    API_REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - g.get('request_started', time.perf_counter()))
+    # Streamed bodies (SSE, history) have no length up front
+    if not response.is_streamed and response.content_length is not None:
+        API_RESPONSE_BYTES.labels(endpoint).observe(response.content_length)
+    return response
+
+@flask_app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics: ingestion counters/histograms plus this process's API metrics"""
+    # Production API workers do not ingest - serve what the ingestion process last published
+    ingest_text = mirrored_ingest_metrics if SERVE_MODE == 'production' else ingest_metrics.render()
+    return flask_app.response_class(ingest_text + api_metrics.render(), content_type=CONTENT_TYPE)
 
 @flask_app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    # Calculate seconds until next refresh
-    seconds_until_refresh = None
-    if next_refresh_time:
-        time_diff = next_refresh_time - datetime.datetime.now()
-        seconds_until_refresh = max(0, int(time_diff.total_seconds()))
+    price_age = price_feed.age_seconds()
 
     return jsonify({
         'status': 'ok',
         'websocket_running': websocket_running,
-        'data_count': len(options_data),
+        'data_count': len(tick_store),
+        'stream_subscribers': broadcaster.subscriber_count(),
+        'log_records_dropped': dropped_log_records(),
         'current_strike': current_strike,
         'live_ndx_price': live_ndx_price,
-        'next_refresh_seconds': seconds_until_refresh,
-        'market_status': market_status
+        'price_source': price_feed.source_in_use,
+        'price_age_seconds': None if price_age is None else int(price_age),
+        'market_status': market_status,
+        'chains': [chain.describe() for chain in chains],
+        'websocket_connections': websocket_connections,
+        'data_gaps': mirrored_data_gaps if SERVE_MODE == 'production' else connection_supervisor.describe()
     })
 
 def start_flask_server():
     """Start Flask server in a separate thread"""
     flask_app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
 
-# WebSocket client (will be initialized dynamically)
-client = None
+# One WebSocket client per subscription shard, each run as a task on the ingestion
+# loop (index-aligned with subscription_manager.shards)
+shard_clients = []
+shard_tasks = {}
+session_connected = False  # True while the session's shard connections should be up
+# Tracks each shard's subscription set so re-centering only sends the difference
+subscription_manager = SubscriptionManager()
+def gap_opened(gap):
+    """An outage starts: keep each contract's last quote before it, where the backfill's session volume continues"""
+    _, gap.baseline = latest_quotes.snapshot()
+
+# Reconnect backoff, stall watchdog and the log of data gaps (see supervisor.py)
+connection_supervisor = ConnectionSupervisor(on_gap_opened=gap_opened)
+MINUTE_NS = 60_000_000_000
+backfill_tasks = set()  # Running REST backfills (strong references)
 
 # Debug counters
 message_count = 0
 last_message_time = None
 
-def store_data(data_dict):
-    """Store data in memory"""
+# Per-symbol throttle for the tick log line in handle_msg
+tick_log_limiter = RateLimiter(TICK_LOG_INTERVAL)
+
+def store_data(symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap,
+               volume, accumulated_volume, contract=None):
+    """
+    Store one aggregate in memory and notify stream subscribers of its sequence number
+    contract is the symbol's parsed OptionContract, when the caller has it - the stages reuse it
+    """
     with data_lock:
-        options_data.append(data_dict)
+        seq = tick_store.append(symbol, option_type, strike, timestamp_ns, open_price, high, low,
+                                close, vwap, volume, accumulated_volume)
+        for stage in pipeline_stages:
+            stage.update(symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap, volume,
+                         accumulated_volume, contract)
+    broadcaster.publish(seq)
+    if tick_writer is not None:
+        tick_writer.append(seq, symbol, option_type, strike, timestamp_ns, open_price, high, low,
+                           close, vwap, volume, accumulated_volume)
     return True
 
-def get_current_ndx_price():
+def restore_persisted_ticks():
+    """Load today's persisted segments back into the in-memory store (startup only)"""
+    day = day_key(time.time_ns())
+    start = time.perf_counter()
+    records, symbols = load_day(day)
+    with data_lock:
+        tick_store.load(records, symbols)
+        reload_pipeline_stages()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"💾 Restored {len(records):,} ticks for {day} from {TICK_DATA_DIR} in {elapsed_ms:.0f} ms")
+
+def reload_pipeline_stages(stages=pipeline_stages):
+    """
+    Rebuild pipeline stages from the rows the store retains (caller holds data_lock)
+    Bars cover every retained row; the session aggregates only the current session's
+    """
+    columns = tick_store.read_since(tick_store.first_seq - 1)
+    session_start = int(np.searchsorted(columns['seq'], tick_store.cleared_seq, side='right'))
+    session_columns = {name: column[session_start:] for name, column in columns.items()}
+    for stage in stages:
+        stage.clear()
+        stage.load(session_columns if stage in session_stages else columns, tick_store.symbols)
+
+def ingest_status():
+    """Scalar ingestion state published to API worker processes (production mode)"""
+    return {
+        'current_strike': current_strike,
+        'last_strike': last_strike,
+        'live_ndx_price': live_ndx_price,
+        'underlying_price': price_feed.last_price,
+        'underlying_prices': {ticker: feed.last_price for ticker, feed in price_feeds.items()},
+        'price_source': price_feed.source_in_use,
+        'price_age_seconds': price_feed.age_seconds(),
+        'current_base_date': current_base_date,
+        'chains': [chain.describe() for chain in chains],
+        'websocket_running': websocket_running,
+        'websocket_connections': websocket_connections,
+        'data_gaps': connection_supervisor.describe(),
+        'market_status': market_status,
+        'message_count': message_count,
+        'session_start_ns': retention.session_start_ns,
+        'metrics': ingest_metrics.render()
+    }
+
+def apply_shared_rows(columns, symbols):
+    """API worker: run ticks the ingestion process appended to the shared ring through local stages"""
+    with data_lock:
+        for stage in pipeline_stages:
+            stage.load(columns, symbols)
+    if len(columns['seq']):
+        broadcaster.publish(int(columns['seq'][-1]))
+    analytics_engine.request()
+
+def use_shared_store(store):
+    """API worker: serve from the shared ring and rebuild local stages from it"""
+    global tick_store
+
+    with data_lock:
+        tick_store = store
+        reload_pipeline_stages()
+    broadcaster.invalidate_all()
+    analytics_engine.request()
+
+def roll_over_shared_store(store):
+    """API worker: ingestion rolled over to a new session - restart the session aggregates, keep the bars"""
+    with data_lock:
+        reload_pipeline_stages(session_stages)
+    broadcaster.invalidate_all()
+    analytics_engine.request()
+
+def apply_ingest_status(status):
+    """API worker: mirror the ingestion process's scalar state into this process"""
+    global current_strike, last_strike, live_ndx_price, current_base_date, websocket_running
+    global websocket_connections, market_status, message_count, mirrored_ingest_metrics
+    global last_retention_sweep, mirrored_data_gaps
+
+    current_strike = status['current_strike']
+    last_strike = status['last_strike']
+    live_ndx_price = status['live_ndx_price']
+    current_base_date = status['current_base_date']
+    websocket_running = status['websocket_running']
+    websocket_connections = status['websocket_connections']
+    mirrored_data_gaps = status['data_gaps']
+    # Workers run with the same OPTION_CHAINS, so the chains line up one to one
+    for chain, described in zip(chains, status['chains']):
+        chain.center = described['center_strike']
+        chain.expiries = described['expiries']
+    market_status = status['market_status']
+    message_count = status['message_count']
+    mirrored_ingest_metrics = status.get('metrics', '')
+
+    price_feed.last_price = status['underlying_price']
+    for ticker, price in status['underlying_prices'].items():
+        if ticker in price_feeds:
+            price_feeds[ticker].last_price = price
+    price_feed.source_in_use = status['price_source']
+    if status['price_age_seconds'] is not None:
+        age = status['price_age_seconds'] + max(time.time() - status['written_at'], 0)
+        price_feed.last_update = time.monotonic() - age
+
+    # The shared ring is evicted by ingestion; this worker's own bars age out here
+    retention.session_start_ns = status['session_start_ns']
+    if time.monotonic() - last_retention_sweep >= RETENTION_SWEEP_SECONDS:
+        last_retention_sweep = time.monotonic()
+        with data_lock:
+            retention.sweep_bars(bar_builder, time.time_ns())
+
+def follow_ingestion():
+    """API worker thread: attach to the ingestion process's shared ring, then follow it"""
+    while True:
+        try:
+            store = SharedTickStore.attach(TICK_SHM_PATH)
+            break
+        except (OSError, ValueError):
+            time.sleep(1)  # Ingestion has not created the ring yet
+
+    use_shared_store(store)
+    logger.info(f"🔗 API worker {os.getpid()} attached to {TICK_SHM_PATH} ({len(store):,} ticks)")
+    SharedStoreFollower(store, apply_shared_rows, use_shared_store, roll_over_shared_store,
+                        apply_ingest_status).start()
+
+def start_api_worker():
+    """
+    Production mode: called once per gunicorn worker (see wsgi.py)
+    Serves straight from the ingestion process's shared tick ring
+    """
+    configure_logging()
+    activity_detector.on_alert = None  # Ingestion already logs and counts every alert
+    threading.Thread(target=follow_ingestion, daemon=True).start()
+    analytics_engine.start()
+
+def clear_options_data():
+    """Wipe stored data and invalidate every outstanding ?since= cursor"""
+    with data_lock:
+        tick_store.clear()
+        for stage in pipeline_stages:
+            stage.clear()
+    broadcaster.invalidate_all()
+
+def roll_over_session(session):
     """
-    Fetch current NDX index price from Polygon.io
-    Returns both the actual price and the price rounded to nearest 10 (strike interval)
+    New trading day: restart the session aggregates (summary, chain) and every ?since=
+    cursor; the previous session's ticks and bars age out of memory through the
+    retention windows (SESSION_ROLLOVER=clear wipes them at once instead)
+    """
+    retention.session_start_ns = int((session.open - CONNECT_LEAD).timestamp() * 1_000_000_000)
+    if SESSION_ROLLOVER == 'clear':
+        clear_options_data()
+        logger.info(f"🧹 Cleared data for new trading day: {session.date}")
+        return
+
+    with data_lock:
+        for stage in session_stages:
+            stage.clear()
+        tick_store.invalidate_cursors()
+        evicted_ticks, evicted_bars = retention.sweep(tick_store, bar_builder, time.time_ns())
+    EVICTED.labels('ticks').inc(evicted_ticks)
+    EVICTED.labels('bars').inc(evicted_bars)
+    broadcaster.invalidate_all()
+    logger.info(f"🧹 New trading day {session.date}: session aggregates reset, "
+                f"{len(tick_store):,} ticks and {bar_builder.bar_count():,} bars age out by retention")
+
+def enforce_retention():
+    """Scheduled sweep: age ticks and bars out of memory per the retention windows and caps"""
+    try:
+        with data_lock:
+            evicted_ticks, evicted_bars = retention.sweep(tick_store, bar_builder, time.time_ns())
+        if evicted_ticks or evicted_bars:
+            EVICTED.labels('ticks').inc(evicted_ticks)
+            EVICTED.labels('bars').inc(evicted_bars)
+            logger.info(f"♻️ Retention: evicted {evicted_ticks:,} ticks and {evicted_bars:,} bars "
+                        f"({len(tick_store):,} ticks, {bar_builder.bar_count():,} bars in memory)")
+    finally:
+        session_scheduler.call_later(RETENTION_SWEEP_SECONDS, enforce_retention)
+
+def analytics_inputs():
+    """Latest price and session volume of every CALL/PUT on the ladder, for the analytics engine"""
+    spot = price_feed.last_price or live_ndx_price
+    if spot is None or current_base_date is None:
+        return None
+
+    # Greeks are computed for the primary chain's nearest expiry only
+    root = primary_chain.spec.root
+    with data_lock:
+        entries = [
+            (strike, option_type == 'CALL', stats.last, stats.volume)
+            for (entry_root, expiry, strike, option_type), stats in strike_summary.entries.items()
+            if entry_root == root and expiry == current_base_date and option_type in ('CALL', 'PUT')
+        ]
+    if not entries:
+        return None
+
+    strikes, is_call, prices, volumes = zip(*entries)
+    return spot, current_base_date, strikes, is_call, prices, volumes
+
+# Implied vol / greeks / gamma exposure, recomputed off the ingestion thread
+analytics_engine = AnalyticsEngine(analytics_inputs)
+
+def get_current_price(ticker):
+    """
+    Fetch the current value of an underlying (index or stock ticker) from Polygon.io
+    Returns today's latest close, else the previous close, else None (I:NDX falls back to a fixed level)
     """
     try:
         # Get today's date for the aggregates endpoint
         today = datetime.datetime.now().strftime("%Y-%m-%d")
 
         # Use today's aggregates endpoint (most recent close price)
-        url = f"https://api.polygon.io/v2/aggs/ticker/I:NDX/range/1/day/{today}/{today}?apiKey={POLYGON_API_KEY}"
-        response = requests.get(url, timeout=10)
+        url = f"{REST_BASE_URL}/v2/aggs/ticker/{ticker}/range/1/day/{today}/{today}?apiKey={POLYGON_API_KEY}"
+        with REST_REQUEST_SECONDS.labels('aggs_today').time():
+            response = http_session.get(url, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
             if 'results' in data and len(data['results']) > 0:
                 price = data['results'][0]['c']  # Today's close price
-                strike = round(price / 10) * 10
-                print(f"✅ Fetched NDX price (today): ${price:,.2f} → Strike: ${int(strike):,}")
-                return int(strike), price
+                logger.info(f"✅ Fetched {ticker} price (today): ${price:,.2f}")
+                return price
 
         # Fallback to previous day if today's data not available yet
-        url2 = f"https://api.polygon.io/v2/aggs/ticker/I:NDX/prev?apiKey={POLYGON_API_KEY}"
-        response2 = requests.get(url2, timeout=10)
+        url2 = f"{REST_BASE_URL}/v2/aggs/ticker/{ticker}/prev?apiKey={POLYGON_API_KEY}"
+        with REST_REQUEST_SECONDS.labels('aggs_prev').time():
+            response2 = http_session.get(url2, timeout=10)
 
         if response2.status_code == 200:
             data2 = response2.json()
             if 'results' in data2 and len(data2['results']) > 0:
                 price = data2['results'][0]['c']  # Previous day close
-                strike = round(price / 10) * 10
-                print(f"✅ Fetched NDX price (previous day): ${price:,.2f} → Strike: ${int(strike):,}")
-                return int(strike), price
+                logger.info(f"✅ Fetched {ticker} price (previous day): ${price:,.2f}")
+                return price
 
     except Exception as e:
-        print(f"⚠️ Error fetching NDX price: {e}")
+        logger.warning(f"⚠️ Error fetching {ticker} price: {e}")
+
+    if ticker != INDEX_TICKER:
+        return None
 
     # Last resort fallback
-    default_strike = 25200
     default_price = 25200.0
-    print(f"⚠️ Using fallback strike: ${default_strike:,}")
-    return default_strike, default_price
-
-def check_strike_and_reconnect():
+    logger.warning(f"⚠️ Using fallback NDX price: ${default_price:,.0f}")
+    return default_price
+
+async def fetch_session_prices():
+    """Latest value of every underlying: the live feed's, else a REST lookup (concurrent, off the loop)"""
+    missing = [ticker for ticker, feed in price_feeds.items() if feed.last_price is None]
+    fetched = await asyncio.gather(*(asyncio.to_thread(get_current_price, ticker) for ticker in missing))
+    prices = {ticker: feed.last_price for ticker, feed in price_feeds.items()}
+    prices.update(zip(missing, fetched))
+    return prices
+
+def center_chains(session_date, prices):
     """
-    Background thread that checks NDX price every 10 minutes
-    ALWAYS triggers reconnection to use latest strike price
+    Set every chain's expiries for the session and center its ladder on its
+    underlying's price (see fetch_session_prices). A chain with no price yet is
+    subscribed once its feed delivers the first value. Returns the session's full ticker set.
     """
-    global current_strike, last_strike, live_ndx_price, next_refresh_time, reconnect_flag, websocket_running
-
-    while websocket_running:
-        # Set next refresh time (10 minutes from now)
-        next_refresh_time = datetime.datetime.now() + datetime.timedelta(minutes=10)
-
-        # Wait 10 minutes (600 seconds)
-        for i in range(600):
-            if not websocket_running:
-                break
-            time.sleep(1)  # Sleep 1 second at a time to allow clean shutdown
-
-        if not websocket_running:
-            break
-
-        new_strike, new_price = get_current_ndx_price()
-        strike_change = abs(new_strike - current_strike)
-
-        print(f"\n🔍 10-Minute Strike Check:")
-        print(f"   Current Strike: ${current_strike:,}")
-        print(f"   New Strike: ${new_strike:,}")
-        print(f"   Live NDX Price: ${new_price:,.2f}")
-        print(f"   Change: ${strike_change:,}")
-
-        # ALWAYS reconnect every 10 minutes with latest strike
-        print(f"🔄 10-minute interval reached - Triggering reconnection with latest strike...")
-        current_strike = new_strike
-        live_ndx_price = round(new_price)  # Round to whole number
-        reconnect_flag = True
+    global current_strike, last_strike, live_ndx_price, current_base_date
+
+    for chain in chains:
+        ticker = chain.spec.price_ticker
+        chain.set_session(session_date)
+        price = prices.get(ticker)
+        if price is None:
+            if chain.center is None:
+                logger.warning(f"⚠️ No {ticker} price yet - {chain.spec.root} subscribes on the first live value")
+            else:
+                logger.warning(f"⚠️ No {ticker} price yet - {chain.spec.root} keeps its last center ${chain.center:,}")
+            continue
+        chain.recenter(chain.tracker.nearest_strike(price))
+        if chain is primary_chain:
+            live_ndx_price = round(price)  # Round to whole number
+
+    current_strike = last_strike = primary_chain.center
+    current_base_date = primary_chain.expiries[0]
+
+    tickers = session_tickers()
+    warm_cache(tickers)
+    return tickers
+
+def session_tickers():
+    """Union of every chain's ladder tickers"""
+    tickers = set()
+    for chain in chains:
+        tickers.update(chain.tickers())
+    return sorted(tickers)
+
+def on_underlying_price(ticker, price):
+    """
+    Called for every live value from the price feed of ticker
+    Re-centers the ladders of the chains on that underlying once price drifts past
+    their threshold (RECENTER_THRESHOLD, default 1.5 strike intervals)
+    """
+    global current_strike, last_strike, live_ndx_price
+
+    moved = False
+    for chain in chains:
+        if chain.spec.price_ticker != ticker:
+            continue
+        if chain is primary_chain:
+            live_ndx_price = round(price)  # Round to whole number
+
+        new_center = chain.tracker.update(price)
+        if new_center is None or new_center == chain.center:
+            continue
+
+        logger.info(f"\n🔍 {ticker} ${price:,.2f} drifted past the threshold:")
+        logger.info(f"   {chain.spec.root} Center Strike: {'-' if chain.center is None else f'${chain.center:,}'}")
+        logger.info(f"   New Strike: ${new_center:,}")
+
+        chain.center = new_center
+        moved = True
+        if chain is primary_chain:
+            last_strike = current_strike
+            current_strike = new_center
+
+    if moved and websocket_running:
+        resubscribe()
+
+# Live underlying feeds (indices/stocks WebSocket, REST polling as fallback), one per
+# distinct price ticker; price_feed follows the primary chain's underlying
+price_feeds = {
+    ticker: UnderlyingPriceFeed(POLYGON_API_KEY, functools.partial(on_underlying_price, ticker), ticker=ticker)
+    for ticker in dict.fromkeys(chain.spec.price_ticker for chain in chains)
+}
+price_feed = price_feeds[primary_chain.spec.price_ticker]
+
+def resubscribe():
+    """
+    Move the live subscriptions to the chains' current ladders without reconnecting
+    Only the tickers that leave or enter a ladder are (un)subscribed, on the shard
+    that holds them; every strike present in both ladders keeps streaming throughout.
+    Tickers that no longer fit the existing connections open a new one.
+    """
+    global websocket_connections
+
+    tickers = session_tickers()
+    warm_cache(tickers)
+    changes = subscription_manager.update(tickers)
+
+    logger.info(f"🎯 Re-centering ladders: +{sum(len(added) for added, _ in changes)} / "
+                f"-{sum(len(removed) for _, removed in changes)} tickers over {len(changes)} connection(s)")
+
+    for index, (added, removed) in enumerate(changes):
+        if index >= len(shard_clients):
+            # The set outgrew the existing connections
+            client = initialize_websocket_client()
+            client.subscribe(*added)
+            shard_clients.append(client)
+            websocket_connections = len(shard_clients)
+            if session_connected:
+                start_shard(index)
+            continue
+
+        # Runs on the ingestion loop, so the client picks the change up on its next
+        # receive; before the socket is up it is simply sent on connect
+        if removed:
+            shard_clients[index].unsubscribe(*removed)
+        if added:
+            shard_clients[index].subscribe(*added)
 
 def initialize_websocket_client():
-    """Initialize or reinitialize the WebSocket client"""
-    global client
-
-    print("🔗 Initializing WebSocket connection...")
-    client = WebSocketClient(
+    """Create a WebSocket client for one subscription shard"""
+    logger.info("🔗 Initializing WebSocket connection...")
+    return WebSocketClient(
         api_key=POLYGON_API_KEY,
-        feed=Feed.RealTime,  # Real-time data feed
-        market=Market.Options
+        feed=WS_FEED,  # Real-time data feed (overridable for a local stand-in)
+        market=Market.Options,
+        secure=WS_SECURE,
+        # A dropped connection ends the client, so the session supervisor reconnects
+        # (with jitter) and records the outage instead of the client retrying on its own
+        max_reconnects=0
     )
-    return client
 
 def handle_msg(msgs: List[WebSocketMessage]):
     global message_count, last_message_time
 
+    started = time.perf_counter()
     message_count += len(msgs)
-    cst = pytz.timezone('America/Chicago')
-    last_message_time = datetime.datetime.now(cst)
+    MESSAGES_RECEIVED.inc(len(msgs))
+    stored = no_symbol = other_underlying = errors = 0
+
+    # One clock read per batch - every aggregate in the batch shares it
+    timestamp_ns = time.time_ns()
+    if recorder is not None:
+        recorder.record(msgs, timestamp_ns)
+    last_message_time = datetime.datetime.fromtimestamp(timestamp_ns / 1e9, CST)
+    timestamp = last_message_time.strftime('%H:%M:%S')
+    gap = connection_supervisor.heartbeat(timestamp_ns)
+    if gap is not None:
+        gap_closed(gap)
 
     if message_count % 10 == 0:
-        timestamp = datetime.datetime.now(cst).strftime('%H:%M:%S')
-        print(f"💓 [{timestamp}] Heartbeat: Received {message_count} messages so far...")
+        logger.info(f"💓 [{timestamp}] Heartbeat: Received {message_count} messages so far...")
 
-    timestamp = datetime.datetime.now(cst).strftime('%H:%M:%S')
     for m in msgs:
-        if hasattr(m, 'symbol') and hasattr(m, 'volume') and hasattr(m, 'close'):
-            symbol = getattr(m, 'symbol', 'Unknown')
-            volume = getattr(m, 'volume', 0)
-            close = getattr(m, 'close', 0)
-            accumulated_volume = getattr(m, 'accumulated_volume', 0)
-            high = getattr(m, 'high', 0)
-            low = getattr(m, 'low', 0)
-            open_price = getattr(m, 'open', 0)
-            vwap = getattr(m, 'vwap', 0)
-
-            if 'NDXP' in symbol:
-                if 'C' in symbol and symbol.count('C') == 1:
-                    option_type = 'CALL'
-                    strike_part = symbol.split('C')[1]
-                elif 'P' in symbol and symbol.count('P') >= 2:
-                    option_type = 'PUT'
-                    parts = symbol.split('P')
-                    strike_part = parts[-1]
-                else:
-                    option_type = 'UNK'
-                    strike_part = '0'
+        # Status and non-aggregate messages carry no symbol
+        symbol = getattr(m, 'symbol', None)
+        if symbol is None:
+            no_symbol += 1
+            continue
 
-                try:
-                    strike_price = int(strike_part[:5])
-                    print(f"[{timestamp}] {option_type} ${strike_price:,} | Price: ${close:.2f} | Vol: {volume} | Total Vol: {accumulated_volume}")
-
-                    # Use CST timezone for timestamps
-                    cst = pytz.timezone('America/Chicago')
-                    full_timestamp = datetime.datetime.now(cst).strftime('%Y-%m-%d %H:%M:%S')
-                    formatted_strike = f"${strike_price:,}"
-
-                    # Create data dictionary for storage
-                    data_dict = {
-                        'Timestamp': full_timestamp,
-                        'Symbol': symbol,
-                        'Option_Type': option_type,
-                        'Strike_Price': formatted_strike,
-                        'Close_Price': close,
-                        'Volume': volume,
-                        'Accumulated_Volume': accumulated_volume,
-                        'High': high,
-                        'Low': low,
-                        'Open': open_price,
-                        'VWAP': vwap
-                    }
-
-                    if volume > 20:
-                        if store_data(data_dict):
-                            print(f" 📊 Data stored in memory")
-
-                except Exception as e:
-                    print(f"Error parsing: {e}")
+        contract = parse_option_symbol(symbol)
+        if contract is None or contract.underlying not in CHAIN_ROOTS:
+            other_underlying += 1
+            continue
+
+        try:
+            volume = m.volume
+            close = m.close
+            accumulated_volume = m.accumulated_volume
+
+            # At most one tick line per contract per TICK_LOG_INTERVAL - the log
+            # call itself only enqueues, the write happens on the listener thread
+            if tick_log_limiter.allow(symbol, timestamp_ns) and logger.isEnabledFor(logging.INFO):
+                logger.info(f"[{timestamp}] {contract.option_type} ${contract.strike:,} | Price: ${close:.2f} | Vol: {volume} | Total Vol: {accumulated_volume}")
+
+            # Every tick is kept - the volume filter is applied at query time.
+            # Raw typed values only - display formatting happens in the API layer
+            store_data(symbol, contract.option_type, contract.strike, timestamp_ns, m.open or 0,
+                       m.high or 0, m.low or 0, close, m.vwap or 0, volume or 0,
+                       accumulated_volume or 0, contract)
+            stored += 1
+
+        except Exception as e:
+            errors += 1
+            logger.error(f"Error parsing {symbol}: {e}")
+
+    # Counted per batch rather than per message to keep the loop lean
+    MESSAGES_STORED.inc(stored)
+    for reason, count in (('no_symbol', no_symbol), ('other_underlying', other_underlying), ('error', errors)):
+        if count:
+            MESSAGES_FILTERED.labels(reason).inc(count)
+
+    # Coalesced - one recompute covers every batch that arrives while it runs
+    analytics_engine.request()
+    HANDLE_MSG_SECONDS.observe(time.perf_counter() - started)
 
 def is_market_hours():
-    """Check if current time is within market hours (8:29 AM - 3:01 PM CST)"""
-    cst = pytz.timezone('America/Chicago')
-    now = datetime.datetime.now(cst)
+    """True from CONNECT_LEAD before the open until CLOSE_GRACE after the close of a trading session"""
+    return in_session(lead=CONNECT_LEAD, grace=CLOSE_GRACE)
 
-    # Market opens at 8:29 AM CST
-    market_open = now.replace(hour=8, minute=29, second=0, microsecond=0)
-    # Market closes at 3:01 PM CST
-    market_close = now.replace(hour=15, minute=1, second=0, microsecond=0)
+def create_subscriptions(tickers=None):
+    """
+    Create fresh clients for every chain's ladder (tickers: a prebuilt set), one per
+    WS_MAX_TICKERS_PER_CONNECTION tickers
+    """
+    global shard_clients, websocket_connections
+
+    logger.info(f"\n📡 SUBSCRIBING {len(chains)} OPTION CHAIN(S)")
+    logger.info("-" * 60)
+    for chain in chains:
+        ladder = chain.spec.ladder
+        center = 'waiting for the first price' if chain.center is None else f"${chain.center:,}"
+        logger.info(f"📍 {chain.spec.root} ({chain.spec.price_ticker}): center {center} | "
+                    f"expiries {', '.join(chain.expiries)}")
+        logger.info(f"🪜 Ladder: ${ladder.strike_interval} strikes | "
+                    f"PUTs {ladder.puts_below} below / {ladder.puts_above} above | "
+                    f"CALLs {ladder.calls_below} below / {ladder.calls_above} above")
+
+    if tickers is None:
+        tickers = session_tickers()
+        warm_cache(tickers)
+
+    # Build each shard's whole set first and hand it over in one call -
+    # a client sends everything scheduled before connect as a single subscribe frame
+    shard_clients = []
+    for shard in subscription_manager.reset(tickers):
+        client = initialize_websocket_client()
+        client.subscribe(*shard)
+        shard_clients.append(client)
+    websocket_connections = len(shard_clients)
+
+    logger.info("-" * 60)
+    logger.info(f"✅ TOTAL SUBSCRIPTIONS: {len(tickers)} tickers over {len(shard_clients)} connection(s) "
+                f"(at most {subscription_manager.max_per_shard} each)")
+    logger.info(f"📊 Strike changes are applied in place on these connections")
+    logger.info("-" * 60)
+
+async def run_shard(index):
+    """Run shard index's client until it closes or fails, then wake the session"""
+    async def process(msgs):
+        handle_msg(msgs)
 
-    return market_open <= now <= market_close
+    try:
+        await shard_clients[index].connect(process)
+    except Exception as e:
+        # Suppress connection errors when market is closed
+        if not is_market_hours():
+            logger.info(f"ℹ️ WebSocket {index} closed (market hours ended)")
+        else:
+            logger.warning(f"⚠️ WebSocket {index} error: {e}")
+    finally:
+        session_wakeup.set()
+
+def start_shard(index):
+    """Connect shard index as a task on the ingestion loop (no-op while it is already running)"""
+    task = shard_tasks.get(index)
+    if task is not None and not task.done():
+        return
+    shard_tasks[index] = asyncio.create_task(run_shard(index))
+
+async def close_websocket_clients(timeout=5):
+    """Close every shard connection and wait until its task has finished"""
+    global session_connected, websocket_connections
+
+    session_connected = False
+    tasks = dict(shard_tasks)
+    shard_tasks.clear()
+    for index, task in tasks.items():
+        client = shard_clients[index]
+        if task.done() or client.websocket is None:
+            continue
+        try:
+            await asyncio.wait_for(client.close(), timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing WebSocket {index}: {e}")
+    # A connection still mid-handshake has no socket to close - cancel whatever is left
+    for task in tasks.values():
+        task.cancel()
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    websocket_connections = 0
+
+def gap_closed(gap):
+    """Data flows again after an outage: record it and backfill the missed minutes in the background"""
+    seconds = (gap.end_ns - gap.start_ns) / 1_000_000_000
+    WS_GAP_SECONDS.observe(seconds)
+    logger.info(f"🕳️ Data gap of {seconds:.0f}s ({gap.reason}) closed")
+    if not BACKFILL:
+        return
+    task = asyncio.get_running_loop().create_task(backfill_gap(gap))
+    backfill_tasks.add(task)
+    task.add_done_callback(backfill_tasks.discard)
 
-def clear_data_at_market_close():
-    """Clear all data when market closes to start fresh next day"""
-    global last_market_date, market_status
+def fetch_minute_aggs_timed(*args):
+    with REST_REQUEST_SECONDS.labels('aggs_minute').time():
+        return fetch_minute_aggs(*args)
 
-    cst = pytz.timezone('America/Chicago')
-    now = datetime.datetime.now(cst)
-    current_date = now.date()
+async def backfill_gap(gap):
+    """
+    Store the minute aggregates every subscribed contract had within the gap, from REST
+    Minutes the ring already holds for a contract (delivered live around the gap) are skipped
+    """
+    symbols = sorted(ticker.split('.', 1)[1] for ticker in subscription_manager.subscribed)
+    started = time.perf_counter()
+    bars = await fetch_gap_bars(POLYGON_API_KEY, symbols, gap.start_ns, gap.end_ns, fetch=fetch_minute_aggs_timed)
 
-    # If it's a new trading day and market is closed, clear the data
-    if last_market_date != current_date and not is_market_hours():
-        with data_lock:
-            options_data.clear()
-        last_market_date = current_date
-        market_status = 'closed'
-        print(f"🧹 Cleared data for new trading day: {current_date}")
-        return True
-
-    return False
-
-def create_subscriptions(strike, base_date):
-    """Create all option subscriptions based on current strike price"""
-    global client
-
-    strike_interval = 10
-
-    print(f"\n📡 SUBSCRIBING ALL TICKERS VIA SINGLE WEBSOCKET CONNECTION")
-    print(f"📍 Center Strike: ${strike:,}")
-    print(f"📅 Expiry Date: {base_date}")
-    print("-" * 60)
-
-    subscription_count = 0
-
-    # 1. Base ticker
-    original_ticker = f"AM.O:NDXP{base_date}C{strike:05d}000"
-    print(f"1. Base Ticker: {original_ticker}")
-    client.subscribe(original_ticker)
-    subscription_count += 1
-
-    # 2. Test Range
-    test_strikes = [
-        strike - 500,
-        strike - 200,
-        strike,
-        strike + 200,
-        strike + 500
-    ]
-
-    print(f"\n2. Test Range (±500 points):")
-    for test_strike in test_strikes:
-        test_call = f"AM.O:NDXP{base_date}C{test_strike:05d}000"
-        test_put = f"AM.O:NDXP{base_date}P{test_strike:05d}000"
-        print(f"   CALL: ${test_strike:,} | PUT: ${test_strike:,}")
-        client.subscribe(test_call)
-        client.subscribe(test_put)
-        subscription_count += 2
-
-    # 3. PUTs below (increased from 30 to 70 strikes)
-    print(f"\n3. PUT Options (70 strikes below ${strike:,}):")
-    for i in range(1, 71):
-        put_strike = strike - (i * strike_interval)
-        put_ticker = f"AM.O:NDXP{base_date}P{put_strike:05d}000"
-        client.subscribe(put_ticker)
-        subscription_count += 1
-
-    # 4. PUTs above (increased from 20 to 50 strikes)
-    print(f"\n4. PUT Options (50 strikes above ${strike:,}):")
-    for i in range(1, 51):
-        put_strike = strike + (i * strike_interval)
-        put_ticker = f"AM.O:NDXP{base_date}P{put_strike:05d}000"
-        client.subscribe(put_ticker)
-        subscription_count += 1
-
-    # 5. CALLs below (increased from 20 to 50 strikes)
-    print(f"\n5. CALL Options (50 strikes below ${strike:,}):")
-    for i in range(1, 51):
-        call_strike = strike - (i * strike_interval)
-        call_ticker = f"AM.O:NDXP{base_date}C{call_strike:05d}000"
-        client.subscribe(call_ticker)
-        subscription_count += 1
-
-    # 6. CALLs above (increased from 20 to 50 strikes)
-    print(f"\n6. CALL Options (50 strikes above ${strike:,}):")
-    for i in range(1, 51):
-        call_strike = strike + (i * strike_interval)
-        call_ticker = f"AM.O:NDXP{base_date}C{call_strike:05d}000"
-        client.subscribe(call_ticker)
-        subscription_count += 1
-
-    print("-" * 60)
-    print(f"✅ TOTAL SUBSCRIPTIONS: {subscription_count} tickers")
-    print(f"🔗 ALL USING SINGLE WEBSOCKET CONNECTION")
-    print(f"📊 Connection reuses same WebSocket client instance")
-    print("-" * 60)
-
-def run_websocket_client():
-    """
-    Main WebSocket client loop with dynamic reconnection
-    Reconnects every 10 minutes with latest real-time strike price
-    Only runs during market hours: 8:29 AM - 3:01 PM CST
-    """
-    global current_strike, last_strike, live_ndx_price, next_refresh_time, reconnect_flag, websocket_running, client
+    # A live tick is stamped when it arrives, just after its minute ends - the same minute key as its bar
+    with data_lock:
+        columns = tick_store.read_since(tick_store.seq_at(gap.start_ns - MINUTE_NS) - 1)
+        symbol_table = tick_store.symbols
+    stored_minutes = {(symbol_table[contract_id], timestamp_ns // MINUTE_NS) for contract_id, timestamp_ns
+                      in zip(columns['contract_id'].tolist(), columns['timestamp_ns'].tolist())}
+    # Live ticks after the gap have moved the quotes on by now - the session volume
+    # continues from each contract's quote as the gap opened (none: no trades before it)
+    baseline = gap.baseline or {}
+
+    stored = 0
+    for symbol, symbol_bars in bars.items():
+        contract = parse_option_symbol(symbol)
+        quote = baseline.get(symbol)
+        accumulated = quote.accumulated_volume if quote is not None else 0
+        for bar in symbol_bars:
+            end_ns = bar['t'] * 1_000_000 + MINUTE_NS
+            volume = int(bar.get('v', 0))
+            accumulated += volume
+            if (symbol, end_ns // MINUTE_NS) in stored_minutes:
+                continue
+            store_data(symbol, contract.option_type, contract.strike, end_ns, bar.get('o', 0), bar.get('h', 0),
+                       bar.get('l', 0), bar['c'], bar.get('vw', 0), volume, accumulated, contract)
+            stored += 1
+            if stored % 1000 == 0:
+                await asyncio.sleep(0)  # A long outage's backfill must not hold up live batches
+
+    gap.backfilled = stored
+    BACKFILLED_BARS.inc(stored)
+    if stored:
+        analytics_engine.request()
+    logger.info(f"🩹 Backfilled {stored:,} minute bars for {len(bars)} of {len(symbols)} contracts "
+                f"in {time.perf_counter() - started:.1f}s")
+
+async def prepare_session(session):
+    """
+    Pre-open warmup: fetch the underlying levels, start the live price feeds and
+    build the subscription ladders, so that connecting just before the bell only has to send them
+    """
+    global prepared_session, market_status
+
+    tickers = center_chains(session.date, await fetch_session_prices())
+    prepared_session = session.date
+
+    for feed in price_feeds.values():
+        feed.start()
+    market_status = 'pre-market'
+    logger.info(f"🌅 Pre-open warmup for {session.date:%A %B %d}: {len(chains)} chain(s), "
+                f"{len(tickers)} tickers ready")
+
+async def run_websocket_client():
+    """
+    Run one trading session
+    Keeps the shard connections for the whole session (strike moves are applied in
+    place) and only reconnects when a connection fails or stalls, with jittered
+    exponential backoff; every outage is recorded and backfilled. Returns once the
+    session is over (the scheduled close wakes it) - holidays and early closes come
+    from the market calendar
+    """
+    global websocket_running, session_connected, prepared_session
     global market_status, last_market_date
 
-    # Check if we're within market hours before starting
+    session = next_session(grace=CLOSE_GRACE)
     if not is_market_hours():
-        cst = pytz.timezone('America/Chicago')
-        now = datetime.datetime.now(cst)
-        market_open = now.replace(hour=8, minute=29, second=0, microsecond=0)
-        market_close = now.replace(hour=15, minute=1, second=0, microsecond=0)
-
-        print(f"\n⏰ MARKET IS CLOSED")
-        print(f"🕐 Current CST time: {now.strftime('%I:%M:%S %p')}")
-        print(f"📅 Current date: {now.strftime('%B %d, %Y (%A)')}")
-        print(f"🔔 Market hours: 8:29 AM - 3:01 PM CST")
-
-        if now < market_open:
-            time_until_open = market_open - now
-            hours, remainder = divmod(time_until_open.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            print(f"⏳ Market opens in: {hours}h {minutes}m {seconds}s")
-        else:
-            print(f"📊 Market closed for today. Opens tomorrow at 8:29 AM CST")
-
-        print(f"💤 WebSocket client will not start outside market hours")
+        logger.info(f"\n⏰ MARKET IS CLOSED - next session opens {session.open:%A %B %d, %I:%M %p} CST")
         websocket_running = False
         market_status = 'closed'
         return
 
-    retry_count = 0
-    max_retries = 100
+    attempt = 0
+    failed_at = None  # monotonic time the last connection failed (reconnect metrics)
 
-    # Market is open - set status and clear old data if needed
+    # Market is open - set status and roll over to the new day if needed
     market_status = 'open'
-    cst = pytz.timezone('America/Chicago')
-    today = datetime.datetime.now(cst)
-    current_date = today.date()
+    current_date = session.date
 
-    # Clear data ONLY if this is a new trading day (not the first run)
+    # Roll over ONLY on a new trading day (not the first run, which restored today's ticks)
     if last_market_date is not None and last_market_date != current_date:
-        with data_lock:
-            options_data.clear()
-        print(f"🧹 Cleared data for new trading day: {current_date}")
+        roll_over_session(session)
+    else:
+        retention.session_start_ns = int((session.open - CONNECT_LEAD).timestamp() * 1_000_000_000)
 
     # Update the last market date
     last_market_date = current_date
 
-    # Get initial strike price and live price
-    initial_strike, initial_price = get_current_ndx_price()
-    current_strike = initial_strike
-    last_strike = initial_strike
-    live_ndx_price = round(initial_price)  # Round to whole number
-
-    # Get today's date for options
-    cst = pytz.timezone('US/Central')
-    today = datetime.datetime.now(cst)
-
-    # Calculate next Friday for weekly options
-    # NDX weekly options expire on Fridays
-    days_until_friday = (4 - today.weekday()) % 7  # 4 = Friday (0=Monday)
-    if days_until_friday == 0:
-        # Today is Friday - use today for 0DTE
-        expiry_date = today
-    else:
-        # Use next Friday
-        expiry_date = today + datetime.timedelta(days=days_until_friday)
+    # Re-center on the latest values - the underlyings may have moved since the warmup
+    # (whose live prices and parsed tickers are reused when there was one)
+    if prepared_session != current_date:
+        logger.info("ℹ️ No pre-open warmup for this session - fetching underlying prices now")
+    tickers = center_chains(current_date, await fetch_session_prices())
+    prepared_session = None
 
-    base_date = expiry_date.strftime("%y%m%d")
+    logger.info(f"📅 Session: {current_date:%B %d, %Y (%A)} {session.open:%H:%M}-{session.close:%H:%M} CST"
+                f"{' (early close)' if session.early_close else ''}")
+    for chain in chains:
+        logger.info(f"📅 {chain.spec.root} expiries ({chain.spec.expiry_mode}): {', '.join(chain.expiries)}")
 
-    print(f"📅 Today's Date: {today.strftime('%B %d, %Y (%A)')}")
-    print(f"📅 Options Expiry: {expiry_date.strftime('%B %d, %Y (%A)')}")
-    print(f"📅 Expiry Code: {base_date}")
-    print(f"📊 Initial NDX Strike Level: ${current_strike:,}")
-
-    # Start background thread to check strike every 10 minutes
+    # Follow the live underlying values; a ladder re-centers as soon as its price drifts far enough
     websocket_running = True
-    monitor_thread = threading.Thread(target=check_strike_and_reconnect, daemon=True)
-    monitor_thread.start()
-    print("✅ Started 10-minute strike monitoring thread")
-
-    while retry_count < max_retries and is_market_hours():
-        try:
-            # Initialize WebSocket client
-            initialize_websocket_client()
-
-            # Create subscriptions with current strike
-            create_subscriptions(current_strike, base_date)
+    for feed in price_feeds.values():
+        feed.start()
+    logger.info(f"✅ Started live price feeds: {', '.join(price_feeds)}")
 
-            now = datetime.datetime.now(pytz.timezone('America/Chicago'))
-            market_close = now.replace(hour=15, minute=0, second=0, microsecond=0)
-            time_remaining = market_close - now
+    # The watchdog wakes this task when connections stay up but deliver nothing
+    stalled = False
 
-            print(f"\n🚀 Starting WebSocket client (Attempt {retry_count + 1})...")
-            print(f"🕐 Current CST time: {now.strftime('%H:%M:%S')}")
-            print(f"⏰ Time until 3:00 PM CST: {time_remaining}")
-            print("📡 Listening for options data on SINGLE WebSocket connection...")
-            print("💡 If no messages appear within 30 seconds, there may be no active trading on these strikes")
+    def on_stall():
+        nonlocal stalled
+        stalled = True
+        WS_GAPS.labels('stall').inc()
+        session_wakeup.set()
 
-            # Reset reconnect flag
-            reconnect_flag = False
+    open_ns = int(session.open.timestamp() * 1_000_000_000)
+    connection_supervisor.new_session(open_ns)
+    watchdog = asyncio.create_task(connection_supervisor.watch(on_stall))
 
-            # Run WebSocket in a separate thread so we can check for reconnect flag
-            def run_websocket_with_error_handling():
-                try:
-                    client.run(handle_msg)
-                except Exception as e:
-                    # Suppress connection errors when market is closed
-                    if not is_market_hours():
-                        print(f"ℹ️ WebSocket closed (market hours ended)")
-                    else:
-                        print(f"⚠️ WebSocket error: {e}")
-
-            ws_thread = threading.Thread(target=run_websocket_with_error_handling, daemon=True)
-            ws_thread.start()
-
-            # Monitor for reconnection trigger
-            while ws_thread.is_alive() and is_market_hours():
-                if reconnect_flag:
-                    print(f"\n🔄 RECONNECTION TRIGGERED!")
-                    print(f"   Old Strike: ${last_strike:,}")
-                    print(f"   New Strike: ${current_strike:,}")
-                    print(f"   Closing current connection...")
-
-                    # Close current connection
-                    try:
-                        client.close()
-                    except:
-                        pass
-
-                    last_strike = current_strike
-                    reconnect_flag = False
-
-                    print(f"✅ Connection closed. Will reconnect with new strike...")
+    try:
+        while is_market_hours():
+            reason = 'error'
+            try:
+                WS_CONNECTS.inc()
+                if failed_at is not None:
+                    WS_RECONNECTS.inc()
+                    WS_RECONNECT_SECONDS.observe(time.monotonic() - failed_at)
+                    failed_at = None
+
+                # Fresh clients for every shard (the warmup's ladders on the first attempt)
+                create_subscriptions(tickers)
+                tickers = None
+
+                attempt += 1
+                now = datetime.datetime.now(CST)
+                logger.info(f"\n🚀 Starting WebSocket clients (Attempt {attempt})...")
+                logger.info(f"🕐 Current CST time: {now.strftime('%H:%M:%S')}")
+                logger.info(f"⏰ Time until the {session.close:%I:%M %p} CST close: {session.close - now}")
+                logger.info("💡 If no messages appear within 30 seconds, there may be no active trading on these strikes")
+
+                # Each shard runs as its own task; this one sleeps until a connection
+                # ends, the watchdog calls a stall or the scheduled session close wakes it
+                session_wakeup.clear()
+                session_connected = True
+                stalled = False
+                for index in range(len(shard_clients)):
+                    start_shard(index)
+                connection_supervisor.connected(quiet_until_ns=open_ns)
+                await session_wakeup.wait()
+
+                # Whatever woke us, the remaining connections go down together
+                connection_supervisor.disconnected()
+                await close_websocket_clients()
+                if not is_market_hours():
+                    # Normal exit (market closed)
                     break
 
-                time.sleep(1)  # Check every second
-
-            if not reconnect_flag:
-                # Normal exit (market closed or thread ended)
-                break
-
-        except KeyboardInterrupt:
-            print("\n🛑 User interrupted - shutting down...")
-            websocket_running = False
-            break
-
-        except Exception as e:
-            retry_count += 1
-            print(f"\n❌ Connection error (Attempt {retry_count}): {e}")
-            if retry_count < max_retries and is_market_hours():
-                wait_time = min(retry_count * 5, 120)
-                print(f"⏳ Waiting {wait_time} seconds before retry...")
-                time.sleep(wait_time)
-            else:
-                print("🏁 Max retries reached or market closed")
-                websocket_running = False
-                break
-
-    websocket_running = False
-    print(f"\n✅ WebSocket client stopped")
+                # A connection ended (or went silent) during market hours - treat it as a failure and retry
+                reason = 'stall' if stalled else 'closed'
+                raise ConnectionError("WebSocket stalled - no data" if stalled
+                                      else "WebSocket connection ended unexpectedly")
+
+            except Exception as e:
+                failed_at = time.monotonic()
+                connection_supervisor.disconnected()
+                if connection_supervisor.open_gap is None:
+                    WS_GAPS.labels(reason).inc()
+                connection_supervisor.connection_lost(reason)
+                logger.error(f"\n❌ Connection error (Attempt {attempt}): {e}")
+                if not is_market_hours():
+                    logger.info("🏁 Market closed")
+                    break
 
-def websocket_manager():
+                # Exponential backoff with full jitter - reset once data flows again
+                wait_time = connection_supervisor.backoff.next_delay()
+                logger.info(f"⏳ Waiting {wait_time:.1f} seconds before retry "
+                            f"(backoff attempt {connection_supervisor.backoff.attempts})...")
+                # The session close cuts the wait short
+                session_wakeup.clear()
+                try:
+                    await asyncio.wait_for(session_wakeup.wait(), wait_time)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        # Also on shutdown (cancellation): nothing is left connected or running
+        watchdog.cancel()
+        await asyncio.gather(watchdog, return_exceptions=True)
+        connection_supervisor.disconnected()
+        await close_websocket_clients()
+        websocket_running = False
+        market_status = 'closed'
+        for feed in price_feeds.values():
+            await feed.stop()
+        # An outage that lasted until the close is still backfilled
+        gap = connection_supervisor.close_gap()
+        if gap is not None:
+            gap_closed(gap)
+        logger.info(f"\n✅ WebSocket clients stopped")
+
+def schedule_next_session():
+    """Queue warmup, connect and close for the session in progress or the next one"""
+    session = next_session(grace=CLOSE_GRACE)
+    now = datetime.datetime.now(CST)
+    connect_at = session.open - CONNECT_LEAD
+    warmup_at = session.open - PREOPEN_WARMUP
+
+    if now < connect_at:
+        session_scheduler.call_at(max(warmup_at, now), prepare_session, session)
+    session_scheduler.call_at(max(connect_at, now), run_websocket_client)
+    session_scheduler.call_at(session.close + CLOSE_GRACE, end_session)
+
+    logger.info(f"🗓️ Next session {session.date:%A %B %d}: warmup {warmup_at:%H:%M}, connect {connect_at:%H:%M}, "
+                f"close {session.close:%H:%M} CST{' (early close)' if session.early_close else ''}")
+
+def end_session():
+    """Scheduled close: wake the session task (it disconnects and returns), then plan the next one"""
+    session_wakeup.set()
+    schedule_next_session()
+
+async def run_ingestion():
     """
-    Manages WebSocket client lifecycle - starts it during market hours,
-    waits when market is closed, and restarts when market opens
+    The ingestion runtime: one event loop whose timers warm up before the open,
+    connect just before it and stop the clients after the (possibly early) close.
+    Nothing wakes in between - weekends and holidays are skipped entirely.
+    Cancelling it (Ctrl+C) cancels the session task, which closes every connection
+    and price feed on the way out
     """
-    while True:
-        if is_market_hours():
-            # Market is open - run WebSocket client
-            run_websocket_client()
-            # If we get here, WebSocket stopped (market closed or error)
-            # Wait a bit before checking again
-            time.sleep(60)
-        else:
-            # Market is closed - wait and check again
-            cst = pytz.timezone('America/Chicago')
-            now = datetime.datetime.now(cst)
-            market_open = now.replace(hour=8, minute=29, second=0, microsecond=0)
-
-            if now < market_open:
-                # Before market open today
-                time_until_open = (market_open - now).total_seconds()
-                print(f"\n⏰ Market opens in {time_until_open/3600:.1f} hours")
-                print(f"💤 Sleeping until market opens...")
-                # Sleep until 1 minute before market open
-                sleep_time = max(60, time_until_open - 60)
-                time.sleep(sleep_time)
-            else:
-                # After market close - wait until tomorrow
-                print(f"\n📊 Market closed for today")
-                print(f"💤 Will check again in 1 hour...")
-                time.sleep(3600)  # Check every hour
+    global session_scheduler, session_wakeup
+
+    session_scheduler = Scheduler()
+    session_wakeup = asyncio.Event()
+    schedule_next_session()
+    session_scheduler.call_later(RETENTION_SWEEP_SECONDS, enforce_retention)
+    await session_scheduler.run()
 
 if __name__ == "__main__":
+    # All output goes through the background log writer from here on
+    configure_logging()
+
     # Display startup information
-    print("\n🎯 Starting NDX Options Monitor with Dynamic Strike Adjustment...")
-    print("📊 Volume threshold: >20 for data storage")
-    print("🕒 Market hours: 8:29 AM - 3:01 PM CST")
-    print("🔗 All subscriptions using SINGLE WebSocket connection")
-    print("⚡ Auto-reconnect when strike changes >100 points")
-    print("🔍 Strike check interval: Every 10 minutes")
-    print("🌐 API available at: http://localhost:5000/api/options")
-    print("-" * 60)
-
-    # Start WebSocket manager in background thread
-    ws_thread = threading.Thread(target=websocket_manager, daemon=True)
-    ws_thread.start()
-
-    # Start Flask API server (this will run forever)
-    print("🌐 Starting Flask API server on port 5000...")
-    print("✅ Flask API server ready to accept requests")
-    start_flask_server()
+    logger.info("\n🎯 Starting NDX Options Monitor with Dynamic Strike Adjustment...")
+    logger.info(f"📊 Every tick stored; default query volume filter: >={DEFAULT_MIN_VOLUME}")
+    logger.info("🕒 Sessions follow the market calendar (8:30 AM - 3:00 PM CST, holidays and early closes)")
+    logger.info(f"⛓️ Option chains: {', '.join(f'{chain.spec.root} ({chain.spec.price_ticker})' for chain in chains)}")
+    logger.info(f"🔗 Subscriptions sharded at {subscription_manager.max_per_shard} tickers per WebSocket connection")
+    logger.info("⚡ Strike changes re-center subscriptions on the live connections")
+    logger.info("🔍 A ladder re-centers when its underlying drifts past the threshold")
+    logger.info("🌐 API available at: http://localhost:5000/api/options")
+    logger.info("-" * 60)
+
+    if SERVE_MODE == 'production':
+        # API workers map the same ring - ingestion is its only writer
+        tick_store = SharedTickStore.create(TICK_SHM_PATH, TICK_STORE_CAPACITY)
+        logger.info(f"🔗 Shared tick ring at {TICK_SHM_PATH} ({TICK_STORE_CAPACITY:,} rows)")
+
+    if TICK_RECORD_PATH:
+        recorder = TickRecorder(TICK_RECORD_PATH)
+        logger.info(f"🎙️ Recording live batches to {TICK_RECORD_PATH}")
+
+    # Reload today's ticks from disk before anything is served or ingested
+    if tick_writer is not None:
+        restore_persisted_ticks()
+        tick_writer.start()
+
+    if SERVE_MODE == 'production':
+        # Ingestion only - the API is served by gunicorn workers reading the shared ring
+        StatusPublisher(ingest_status, tick_store.write_status).start()
+        logger.info("🏭 Production mode: ingesting only, API served by gunicorn (backend/wsgi.py)")
+    else:
+        analytics_engine.start()
 
+        # The Flask dev server is a blocking WSGI server - it keeps a thread of its own
+        logger.info("🌐 Starting Flask API server on port 5000...")
+        threading.Thread(target=start_flask_server, daemon=True).start()
+
+    # Everything ingestion does runs on this one event loop until Ctrl+C
+    try:
+        asyncio.run(run_ingestion())
+    except KeyboardInterrupt:
+        logger.info("\n🛑 User interrupted - shutting down...")
+    finally:
+        if tick_writer is not None:
+            tick_writer.stop()
+        if recorder is not None:
+            recorder.close()
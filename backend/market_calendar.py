@@ -0,0 +1,136 @@
+"""
+Trading calendar for NDX index options: sessions, holidays, early closes and expiries.
+
+All times are CST (America/Chicago). A regular session runs 8:30 AM - 3:00 PM;
+on early-close days it ends at 12:00 PM. The holiday and early-close tables
+follow the published Nasdaq/NYSE schedules and need a new row each year -
+dates past the last table year fall back to weekends-only with a warning.
+
+    MARKET_EXTRA_HOLIDAYS   comma-separated YYYY-MM-DD closures not in the tables
+                            (e.g. a national day of mourning)
+    OPTIONS_EXPIRY          'daily' (default): subscribe to the session's own 0DTE
+                            expiry; 'weekly': the week's Friday expiry, moved to the
+                            previous trading day when that Friday is a holiday
+                            (default expiry rule for chains that do not set one)
+"""
+import datetime
+import logging
+import os
+from collections import namedtuple
+
+import pytz
+
+logger = logging.getLogger('ndx_monitor.calendar')
+
+CST = pytz.timezone('America/Chicago')
+
+SESSION_OPEN = datetime.time(8, 30)
+SESSION_CLOSE = datetime.time(15, 0)
+EARLY_CLOSE = datetime.time(12, 0)
+
+HOLIDAYS = {
+    2025: ('2025-01-01', '2025-01-09', '2025-01-20', '2025-02-17', '2025-04-18', '2025-05-26',
+           '2025-06-19', '2025-07-04', '2025-09-01', '2025-11-27', '2025-12-25'),
+    2026: ('2026-01-01', '2026-01-19', '2026-02-16', '2026-04-03', '2026-05-25', '2026-06-19',
+           '2026-07-03', '2026-09-07', '2026-11-26', '2026-12-25'),
+    2027: ('2027-01-01', '2027-01-18', '2027-02-15', '2027-03-26', '2027-05-31', '2027-06-18',
+           '2027-07-05', '2027-09-06', '2027-11-25', '2027-12-24'),
+}
+EARLY_CLOSES = {
+    2025: ('2025-07-03', '2025-11-28', '2025-12-24'),
+    2026: ('2026-11-27', '2026-12-24'),
+    2027: ('2027-11-26',),
+}
+
+OPTIONS_EXPIRY = os.getenv('OPTIONS_EXPIRY', 'daily').lower()
+
+Session = namedtuple('Session', ['date', 'open', 'close', 'early_close'])
+
+
+def _parse_dates(values):
+    return {datetime.date.fromisoformat(value.strip()) for value in values if value.strip()}
+
+
+_holidays = _parse_dates(day for days in HOLIDAYS.values() for day in days)
+_holidays |= _parse_dates(os.getenv('MARKET_EXTRA_HOLIDAYS', '').split(','))
+_early_closes = _parse_dates(day for days in EARLY_CLOSES.values() for day in days)
+_warned_years = set()
+
+
+def _check_table(day):
+    if day.year not in HOLIDAYS and day.year not in _warned_years:
+        _warned_years.add(day.year)
+        logger.warning(f"⚠️ No holiday table for {day.year} - only weekends are treated as closed")
+
+
+def is_trading_day(day):
+    _check_table(day)
+    return day.weekday() < 5 and day not in _holidays
+
+
+def is_early_close(day):
+    return day in _early_closes
+
+
+def session_for(day):
+    """Session on a given date, or None when the market is closed that day"""
+    if not is_trading_day(day):
+        return None
+    early = is_early_close(day)
+    return Session(
+        day,
+        CST.localize(datetime.datetime.combine(day, SESSION_OPEN)),
+        CST.localize(datetime.datetime.combine(day, EARLY_CLOSE if early else SESSION_CLOSE)),
+        early,
+    )
+
+
+def next_session(now=None, grace=datetime.timedelta(0)):
+    """The session in progress at now (until close + grace), else the next one to open"""
+    now = now or datetime.datetime.now(CST)
+    day = now.astimezone(CST).date()
+    while True:
+        session = session_for(day)
+        if session is not None and now < session.close + grace:
+            return session
+        day += datetime.timedelta(days=1)
+
+
+def previous_trading_day(day):
+    day -= datetime.timedelta(days=1)
+    while not is_trading_day(day):
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def in_session(now=None, lead=datetime.timedelta(0), grace=datetime.timedelta(0)):
+    """True from lead before the open until grace after the close of a trading day"""
+    now = now or datetime.datetime.now(CST)
+    session = session_for(now.astimezone(CST).date())
+    return session is not None and session.open - lead <= now < session.close + grace
+
+
+def options_expiry(day, mode=OPTIONS_EXPIRY):
+    """Expiry date of the contracts to follow during the session on day"""
+    if mode == 'weekly':
+        expiry = day + datetime.timedelta(days=(4 - day.weekday()) % 7)
+        # Holiday Fridays (e.g. Good Friday) move the expiry to the previous trading day
+        if not is_trading_day(expiry):
+            expiry = previous_trading_day(expiry)
+        return expiry
+    # NDXP lists an expiry every trading day - the session's own date is 0DTE
+    return day if is_trading_day(day) else next_session(CST.localize(
+        datetime.datetime.combine(day, datetime.time()))).date
+
+
+def options_expiries(day, mode=OPTIONS_EXPIRY, count=1):
+    """The next count expiry dates for the session on day (0DTE / this week's first)"""
+    expiries = [options_expiry(day, mode)]
+    while len(expiries) < count:
+        following = expiries[-1] + datetime.timedelta(days=1)
+        if mode == 'weekly':
+            # Start from the following Monday so a holiday-shifted Thursday is not reused
+            following = expiries[-1] + datetime.timedelta(days=7 - expiries[-1].weekday())
+        expiries.append(options_expiry(following, mode))
+    return expiries
+
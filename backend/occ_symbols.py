@@ -0,0 +1,56 @@
+"""
+OCC option symbol parsing, e.g. O:NDXP251017C25650000
+
+Layout after the optional "O:" prefix:
+    root (1-6 letters) | expiry YYMMDD | C or P | strike x 1000 (8 digits)
+
+The subscription set is fixed, so parsed contracts are cached per symbol and a
+repeat lookup costs one dict access.
+"""
+import re
+from collections import namedtuple
+
+OptionContract = namedtuple('OptionContract', ['symbol', 'underlying', 'expiry', 'option_type', 'strike'])
+
+OCC_PATTERN = re.compile(r'^(?:O:)?([A-Z]{1,6})(\d{6})([CP])(\d{8})$')
+OPTION_TYPE_NAMES = {'C': 'CALL', 'P': 'PUT'}
+
+# Safety valve in case a wildcard subscription floods us with unseen symbols
+MAX_CACHED_SYMBOLS = 20000
+
+_contract_cache = {}
+
+
+def parse_option_symbol(symbol):
+    """
+    Parse an OCC option symbol into an OptionContract (cached per symbol)
+    Returns None when the symbol is not an OCC option symbol
+    """
+    try:
+        return _contract_cache[symbol]
+    except KeyError:
+        pass
+
+    match = OCC_PATTERN.match(symbol)
+    if match:
+        root, expiry, side, strike_digits = match.groups()
+        strike_thousandths = int(strike_digits)
+        # Whole-dollar strikes stay ints so they format as "$25,650"
+        if strike_thousandths % 1000 == 0:
+            strike = strike_thousandths // 1000
+        else:
+            strike = strike_thousandths / 1000
+        contract = OptionContract(symbol, root, expiry, OPTION_TYPE_NAMES[side], strike)
+    else:
+        contract = None
+
+    if len(_contract_cache) >= MAX_CACHED_SYMBOLS:
+        _contract_cache.clear()
+    _contract_cache[symbol] = contract
+    return contract
+
+
+def warm_cache(tickers):
+    """Pre-parse subscription tickers (e.g. AM.O:NDXP...) so the first ticks hit the cache"""
+    for ticker in tickers:
+        parse_option_symbol(ticker.split('.', 1)[-1])
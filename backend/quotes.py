@@ -0,0 +1,77 @@
+"""
+Latest state of every contract seen this session, for /api/chain.
+
+LatestQuotes keeps one immutable Quote per contract, replaced in place by each
+stored tick (O(1): a tuple build and a dict store), so a contract that traded
+once at the open is still there at the close no matter how far the tick window
+has moved. Every update bumps a version; snapshot() hands readers a copy taken
+once per version, so API requests neither take data_lock nor re-copy the table
+while nothing has changed.
+"""
+from collections import namedtuple
+
+from occ_symbols import parse_option_symbol
+from tick_store import OPTION_TYPES
+
+Quote = namedtuple('Quote', ['symbol', 'root', 'expiry', 'strike', 'option_type', 'timestamp_ns', 'open',
+                             'high', 'low', 'close', 'vwap', 'volume', 'accumulated_volume'])
+
+
+class LatestQuotes:
+    """
+    Latest Quote per contract symbol
+    Writers serialize through data_lock like every pipeline stage; readers only call snapshot()
+    """
+
+    def __init__(self):
+        self.quotes = {}
+        self.version = 0
+        self._snapshot = (0, {})
+
+    def update(self, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap, volume,
+               accumulated_volume=0, contract=None):
+        current = self.quotes.get(symbol)
+        if current is not None and timestamp_ns < current.timestamp_ns:
+            return  # Out-of-order replay - keep the newer state
+        if contract is None:
+            contract = parse_option_symbol(symbol)
+        # Quotes are replaced, never mutated, so a reader's copy can't change under it
+        self.quotes[symbol] = Quote(symbol, contract.underlying, contract.expiry, strike, option_type,
+                                    timestamp_ns, open_price, high, low, close, vwap, volume, accumulated_volume)
+        self.version += 1
+
+    def load(self, columns, symbols):
+        """Fold a TickStore read (oldest first) into the table"""
+        for timestamp_ns, contract_id, strike, option_type, open_price, high, low, close, vwap, volume, accumulated_volume in zip(
+            columns['timestamp_ns'].tolist(),
+            columns['contract_id'].tolist(),
+            columns['strike'].tolist(),
+            columns['option_type'].tolist(),
+            columns['open'].tolist(),
+            columns['high'].tolist(),
+            columns['low'].tolist(),
+            columns['close'].tolist(),
+            columns['vwap'].tolist(),
+            columns['volume'].tolist(),
+            columns['accumulated_volume'].tolist(),
+        ):
+            self.update(symbols[contract_id], OPTION_TYPES[option_type], strike, timestamp_ns,
+                        open_price, high, low, close, vwap, volume, accumulated_volume)
+
+    def clear(self):
+        self.quotes = {}
+        self.version += 1
+
+    def snapshot(self):
+        """
+        (version, {symbol: Quote}) - safe to call from any thread without data_lock
+        The version is read before the copy, so the copy holds at least that version
+        (a concurrent update only makes it newer); the copy is shared until the next update
+        """
+        version = self.version
+        cached_version, quotes = self._snapshot
+        if cached_version != version:
+            quotes = dict(self.quotes)  # One C-level copy - no tick lands halfway through it
+            self._snapshot = (version, quotes)
+        return version, quotes
+
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Record live aggregate batches and replay them through a local stand-in for the
+Polygon options WebSocket, so the ingestion path can be exercised (and
+benchmarked) without a live connection or market hours.
+
+Recordings are JSON lines, one per batch handed to handle_msg:
+
+    {"t": <ns since the first batch>, "msgs": [{"ev": "AM", "sym": ..., "v": ..., ...}]}
+
+Messages are stored in the wire format, so a replay goes through the same
+WebSocketClient parsing as live data. A ".gz" suffix writes/reads gzip.
+
+    TICK_RECORD_PATH   record every live batch to this file (off when unset)
+
+The server can also misbehave on purpose: --drop-after N closes the first
+connection after N batches, --stall-after N keeps it open but silent, so the
+reconnect, stall watchdog and gap backfill paths can be exercised. --rest-port
+adds a local stand-in for the REST endpoints the backend uses (minute aggregates
+for the backfill, underlying prices).
+
+Usage:
+    python backend/replay.py serve <recording> [--port 8765] [--speed 1|max] [--loops 1]
+                                   [--drop-after N | --stall-after N] [--rest-port 8766]
+    python backend/replay.py synth <recording> [--batches 1000] [--interval-ms 100]
+
+Point the backend at a running replay server with
+POLYGON_WS_FEED=127.0.0.1:8765 POLYGON_WS_SECURE=false
+(and POLYGON_REST_URL=http://127.0.0.1:8766 for the REST stand-in).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+logger = logging.getLogger('ndx_monitor.replay')
+
+TICK_RECORD_PATH = os.getenv('TICK_RECORD_PATH')
+
+# EquityAgg attribute -> wire key (massive parses the wire keys back into EquityAgg)
+AGG_WIRE_FIELDS = (
+    ('event_type', 'ev'), ('symbol', 'sym'), ('volume', 'v'), ('accumulated_volume', 'av'),
+    ('official_open_price', 'op'), ('vwap', 'vw'), ('open', 'o'), ('close', 'c'), ('high', 'h'),
+    ('low', 'l'), ('aggregate_vwap', 'a'), ('average_size', 'z'), ('start_timestamp', 's'),
+    ('end_timestamp', 'e'), ('otc', 'otc'), ('fractional_volume', 'dv'),
+    ('fractional_accumulated_volume', 'dav'),
+)
+
+DEFAULT_PORT = 8765
+
+
+def open_recording(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def to_wire(msg):
+    """Wire-format dict for an aggregate message, or None for anything else"""
+    if getattr(msg, 'symbol', None) is None:
+        return None
+    wire = {}
+    for attribute, key in AGG_WIRE_FIELDS:
+        value = getattr(msg, attribute, None)
+        if value is not None:
+            # EventType is a str enum - store its plain value
+            wire[key] = getattr(value, 'value', value)
+    return wire
+
+
+class TickRecorder:
+    """Appends every batch handed to record() to a recording file (thread-safe)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.batches = 0
+        self._file = open_recording(path, 'a')
+        self._start_ns = None
+        self._lock = threading.Lock()
+
+    def record(self, msgs, received_ns=None):
+        received_ns = received_ns or time.time_ns()
+        batch = [wire for wire in map(to_wire, msgs) if wire is not None]
+        if not batch:
+            return
+        with self._lock:
+            if self._start_ns is None:
+                self._start_ns = received_ns
+            self._file.write(json.dumps({'t': received_ns - self._start_ns, 'msgs': batch},
+                                        separators=(',', ':')) + '\n')
+            self.batches += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_recording(path):
+    """Yield (offset_ns, wire messages) for every batch in a recording"""
+    with open_recording(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                batch = json.loads(line)
+                yield batch['t'], batch['msgs']
+
+
+def synthetic_batches(batches=1000, interval_ms=100, center_strike=25650, base_date='251017',
+                      strikes_each_side=115, strike_interval=10):
+    """
+    Deterministic AM batches for a full strike ladder, one batch every interval_ms
+    Volumes, prices and which contracts trade vary with the batch number only, so
+    every run produces the same recording
+    """
+    for n in range(batches):
+        start_ms = 1_760_710_000_000 + n * interval_ms
+        msgs = []
+        for i in range(-strikes_each_side, strikes_each_side + 1):
+            # Roughly a third of the ladder trades in any one batch
+            if (i + n) % 3:
+                continue
+            strike = center_strike + i * strike_interval
+            side = 'C' if (i + n) % 2 == 0 else 'P'
+            close = round(max(0.05, 12.5 - i * 0.1 + (n % 17) * 0.05), 2)
+            msgs.append({
+                'ev': 'AM', 'sym': f"O:NDXP{base_date}{side}{strike:05d}000",
+                'v': 5 + (i * 7 + n) % 60, 'av': 1000 + n * 3, 'op': 12.0, 'vw': close,
+                'o': close, 'c': close, 'h': round(close + 0.1, 2), 'l': round(close - 0.05, 2),
+                'a': close, 'z': 3, 's': start_ms, 'e': start_ms + 60_000,
+            })
+        yield n * interval_ms * 1_000_000, msgs
+
+
+def write_recording(path, batches):
+    """Write (offset_ns, wire messages) pairs as a recording; returns the batch count"""
+    count = 0
+    with open_recording(path, 'w') as f:
+        for offset_ns, msgs in batches:
+            f.write(json.dumps({'t': offset_ns, 'msgs': msgs}, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+
+class ReplayServer:
+    """
+    Local stand-in for the Polygon options WebSocket
+    Speaks the same connect/auth/subscribe handshake, then replays a recording to
+    each client once it has subscribed: at recorded pace scaled by speed, or as
+    fast as the socket takes it when speed is 0. The connection is closed normally
+    at the end, so WebSocketClient.connect() returns.
+    on_send(index, sent_ns) is called as each batch goes out (for latency probes).
+    limit replays only the first limit batches of the recording.
+    drop_after / stall_after make the first connection fail after that many batches:
+    closed with an error code, or left open without sending anything more.
+    """
+
+    def __init__(self, path, host='127.0.0.1', port=DEFAULT_PORT, speed=1.0, loops=1, on_send=None,
+                 limit=None, drop_after=None, stall_after=None):
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loops = loops
+        self.on_send = on_send
+        self.drop_after = drop_after
+        self.stall_after = stall_after
+        self.connections = 0
+        # Frames are encoded once up front so replay speed is not limited by JSON encoding
+        self.frames = []
+        self.message_count = 0
+        for offset_ns, msgs in read_recording(path):
+            self.frames.append((offset_ns, json.dumps(msgs, separators=(',', ':'))))
+            self.message_count += len(msgs)
+            if limit is not None and len(self.frames) >= limit:
+                break
+        self.ready = threading.Event()
+        self._loop = None
+        self._stop = None
+
+    @property
+    def feed(self):
+        """Value for POLYGON_WS_FEED / WebSocketClient(feed=...)"""
+        return f"{self.host}:{self.port}"
+
+    async def _handler(self, websocket):
+        self.connections += 1
+        faulty = self.connections == 1
+        await websocket.send(json.dumps([{'ev': 'status', 'status': 'connected',
+                                          'message': 'Connected Successfully'}]))
+        try:
+            await websocket.recv()  # auth - any key is accepted
+            await websocket.send(json.dumps([{'ev': 'status', 'status': 'auth_success',
+                                              'message': 'authenticated'}]))
+            subscribed = asyncio.Event()
+            acknowledge = asyncio.create_task(self._acknowledge(websocket, subscribed))
+            await subscribed.wait()
+            if faulty and self.stall_after is not None:
+                await self._replay(websocket, self.stall_after)
+                await asyncio.Future()  # Silent until the client gives up on us
+            if faulty and self.drop_after is not None:
+                await self._replay(websocket, self.drop_after)
+                await websocket.close(1011, 'injected failure')
+                return
+            await self._replay(websocket)
+            acknowledge.cancel()
+            await websocket.close()
+        except ConnectionClosed:
+            pass
+
+    async def _acknowledge(self, websocket, subscribed):
+        """Answer (un)subscribe requests for as long as the client is connected"""
+        async for raw in websocket:
+            request = json.loads(raw)
+            await websocket.send(json.dumps([{'ev': 'status', 'status': 'success',
+                                              'message': f"{request.get('action')}d to: {request.get('params')}"}]))
+            subscribed.set()
+
+    async def _replay(self, websocket, limit=None):
+        index = 0
+        for _ in range(self.loops):
+            start = time.perf_counter()
+            for offset_ns, frame in self.frames:
+                if limit is not None and index >= limit:
+                    return
+                if self.speed:
+                    delay = start + offset_ns / 1e9 / self.speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if self.on_send is not None:
+                    self.on_send(index, time.perf_counter_ns())
+                await websocket.send(frame)
+                index += 1
+
+    async def serve_forever(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        async with serve(self._handler, self.host, self.port, max_size=None) as server:
+            # Port 0 picks a free port
+            self.port = server.sockets[0].getsockname()[1]
+            self.ready.set()
+            await self._stop.wait()
+
+    def start(self):
+        """Serve on a background thread; returns once the socket is listening"""
+        thread = threading.Thread(target=asyncio.run, args=(self.serve_forever(),), daemon=True)
+        thread.start()
+        self.ready.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+
+class FakeRestServer:
+    """
+    Local stand-in for the Polygon REST endpoints the backend calls
+        /v2/aggs/ticker/<option>/range/1/minute/<from>/<to>   deterministic minute bars
+        /v2/aggs/ticker/<ticker>/range/1/day/..., .../prev    daily close of an underlying
+        /v3/snapshot/indices, /v2/snapshot/.../tickers/<t>    latest underlying value
+    Every option contract trades every minute, with volume and price derived from
+    its symbol and the minute, so a backfill can be checked bar by bar.
+    delay_seconds slows every request down; max_in_flight records the most
+    requests served at once (concurrency probes).
+    """
+
+    MINUTE_AGGS = re.compile(r'^/v2/aggs/ticker/([^/]+)/range/1/minute/(\d+)/(\d+)$')
+    DAILY_AGGS = re.compile(r'^/v2/aggs/ticker/([^/]+)/(range/1/day/.+|prev)$')
+    STOCK_SNAPSHOT = re.compile(r'^/v2/snapshot/locale/us/markets/stocks/tickers/([^/]+)$')
+
+    def __init__(self, host='127.0.0.1', port=0, prices=None, delay_seconds=0.0):
+        self.prices = prices or {'I:NDX': 25650.0}
+        self.delay_seconds = delay_seconds
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+
+    @property
+    def base_url(self):
+        """Value for POLYGON_REST_URL"""
+        return f"http://{self.host}:{self.port}"
+
+    @staticmethod
+    def minute_bar(symbol, start_ms):
+        seed = zlib.crc32(f"{symbol}{start_ms}".encode())
+        close = round(1 + seed % 2000 / 100, 2)
+        return {'v': 1 + seed % 97, 'vw': close, 'o': close, 'c': close, 'h': round(close + 0.1, 2),
+                'l': round(close - 0.05, 2), 't': start_ms, 'n': 1 + seed % 7}
+
+    def respond(self, path, params):
+        """(status, JSON body) for one request"""
+        match = self.MINUTE_AGGS.match(path)
+        if match:
+            symbol, start_ms, end_ms = match.group(1), int(match.group(2)), int(match.group(3))
+            first = -(-start_ms // 60_000) * 60_000
+            bars = [self.minute_bar(symbol, minute) for minute in range(first, end_ms + 1, 60_000)]
+            return 200, {'ticker': symbol, 'status': 'OK', 'resultsCount': len(bars), 'results': bars}
+        match = self.DAILY_AGGS.match(path) or self.STOCK_SNAPSHOT.match(path)
+        if match and match.group(1) in self.prices:
+            price = self.prices[match.group(1)]
+            if path.startswith('/v2/snapshot'):
+                return 200, {'ticker': {'ticker': match.group(1), 'lastTrade': {'p': price}}}
+            return 200, {'status': 'OK', 'results': [{'c': price}]}
+        if path == '/v3/snapshot/indices':
+            tickers = params.get('ticker.any_of', '').split(',')
+            return 200, {'results': [{'ticker': ticker, 'value': self.prices[ticker]}
+                                     for ticker in tickers if ticker in self.prices]}
+        return 404, {'status': 'NOT_FOUND'}
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    if fake.delay_seconds:
+                        time.sleep(fake.delay_seconds)
+                    url = urlparse(self.path)
+                    params = dict(parse_qsl(url.query))
+                    status, body = fake.respond(url.path, params)
+                    payload = json.dumps(body).encode()
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass  # Keep test output quiet
+
+        return Handler
+
+    def start(self):
+        """Serve on a background thread"""
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay options aggregate batches")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="Replay a recording over a local WebSocket")
+    serve_parser.add_argument('recording')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--speed', default='1', help="Pace multiplier, or 'max'")
+    serve_parser.add_argument('--loops', type=int, default=1, help="Times to replay the recording per client")
+    serve_parser.add_argument('--drop-after', type=int, help="Close the first connection after N batches")
+    serve_parser.add_argument('--stall-after', type=int, help="Stop sending on the first connection after N batches")
+    serve_parser.add_argument('--rest-port', type=int, help="Also serve the REST stand-in on this port")
+
+    synth_parser = commands.add_parser('synth', help="Write a deterministic synthetic recording")
+    synth_parser.add_argument('recording')
+    synth_parser.add_argument('--batches', type=int, default=1000)
+    synth_parser.add_argument('--interval-ms', type=int, default=100)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'synth':
+        count = write_recording(args.recording, synthetic_batches(args.batches, args.interval_ms))
+        logger.info(f"📼 Wrote {count} batches to {args.recording}")
+        return
+
+    speed = 0.0 if args.speed == 'max' else float(args.speed)
+    server = ReplayServer(args.recording, args.host, args.port, speed, args.loops,
+                          drop_after=args.drop_after, stall_after=args.stall_after)
+    logger.info(f"📼 Replaying {len(server.frames)} batches ({server.message_count:,} messages) "
+                f"at {'max speed' if not speed else f'{speed}x'}")
+    logger.info(f"🔗 POLYGON_WS_FEED={server.feed} POLYGON_WS_SECURE=false")
+    if args.rest_port is not None:
+        rest = FakeRestServer(args.host, args.rest_port).start()
+        logger.info(f"🔗 POLYGON_REST_URL={rest.base_url}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Tiered retention of in-memory data.
+
+    hot   raw ticks in the TickStore ring (/api/options, /api/stream)
+    warm  OHLCV bars compacted from every tick (bars.py, /api/bars) - coarser
+          intervals can be kept longer than the raw ticks and the fine bars
+    cold  the append-only tick log on disk (tick_log.py, /api/history) - everything
+
+Memory is bounded per tier: the ring is preallocated (TICK_MEMORY_MB sizes it)
+and completed bars are capped by BAR_MEMORY_MB. On top of that each tier has a
+time window, enforced by a periodic sweep; a window of 'session' keeps data
+from the current session's connect onwards, so at a new trading day the
+previous session ages out of memory (it stays on disk) instead of being wiped.
+
+    TICK_MEMORY_MB           memory for the raw tick ring (~81 bytes per tick); used
+                             when TICK_STORE_CAPACITY is not set (default: 1,048,576 ticks)
+    RAW_RETENTION            minutes raw ticks stay in memory, or 'session' (default)
+    BAR_RETENTION            per-interval window for bars, e.g. '1m=120,5m=session,15m=1440'
+                             (minutes or 'session'; intervals not listed: 'session')
+    BAR_MEMORY_MB            cap on completed bars (~300 bytes each; default 0: only BAR_HISTORY)
+    BAR_EVICTION             what goes first when bars exceed BAR_MEMORY_MB: 'finest' (default;
+                             the coarser bars still cover that time) or 'oldest' (any interval)
+    SESSION_ROLLOVER         'evict' (default): a new trading day resets the session aggregates
+                             and lets the windows above age out the previous session;
+                             'clear': wipe every tier's memory at once
+    RETENTION_SWEEP_SECONDS  how often the windows and caps are enforced (default 60)
+"""
+import os
+
+from bars import BAR_INTERVALS
+from tick_store import ROW_BYTES
+
+NANOS_PER_MINUTE = 60 * 1_000_000_000
+DEFAULT_TICK_CAPACITY = 1_048_576
+BAR_BYTES = 300  # Measured: one Bar with its float/int fields, in a deque
+
+TICK_MEMORY_MB = float(os.getenv('TICK_MEMORY_MB', 0))
+BAR_MEMORY_MB = float(os.getenv('BAR_MEMORY_MB', 0))
+BAR_EVICTION = os.getenv('BAR_EVICTION', 'finest').lower()
+SESSION_ROLLOVER = os.getenv('SESSION_ROLLOVER', 'evict').lower()
+RETENTION_SWEEP_SECONDS = float(os.getenv('RETENTION_SWEEP_SECONDS', 60))
+
+if SESSION_ROLLOVER not in ('evict', 'clear'):
+    raise ValueError(f"SESSION_ROLLOVER must be 'evict' or 'clear', got {SESSION_ROLLOVER!r}")
+
+
+def parse_window(text):
+    """Minutes -> nanoseconds, 'session' -> None"""
+    text = text.strip().lower()
+    if text == 'session':
+        return None
+    minutes = float(text)
+    if minutes <= 0:
+        raise ValueError(f"Retention window must be positive minutes or 'session', got {text!r}")
+    return int(minutes * NANOS_PER_MINUTE)
+
+
+def parse_bar_windows(text, intervals=BAR_INTERVALS):
+    windows = {interval: None for interval in intervals}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        interval, _, window = part.partition('=')
+        interval = interval.strip()
+        if interval not in windows:
+            raise ValueError(f"BAR_RETENTION names unknown bar interval {interval!r}")
+        windows[interval] = parse_window(window)
+    return windows
+
+
+def ring_capacity(memory_mb=TICK_MEMORY_MB):
+    """Ticks the raw ring holds for a memory budget (the default capacity when there is none)"""
+    if memory_mb <= 0:
+        return DEFAULT_TICK_CAPACITY
+    return max(int(memory_mb * 2 ** 20 // ROW_BYTES), 1024)
+
+
+class RetentionPolicy:
+    """Time windows and caps for the hot and warm tiers; sweep() enforces them"""
+
+    def __init__(self, raw_window=None, bar_windows=None, bar_memory_mb=BAR_MEMORY_MB,
+                 bar_eviction=BAR_EVICTION):
+        if bar_eviction not in ('finest', 'oldest'):
+            raise ValueError(f"BAR_EVICTION must be 'finest' or 'oldest', got {bar_eviction!r}")
+        self.raw_window = raw_window
+        self.bar_windows = bar_windows or {}
+        self.max_bars = int(bar_memory_mb * 2 ** 20 // BAR_BYTES) if bar_memory_mb > 0 else None
+        self.bar_eviction = bar_eviction
+        # Epoch ns the current session's data starts at; 'session' windows keep
+        # everything until the first session of this process sets it
+        self.session_start_ns = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(parse_window(os.getenv('RAW_RETENTION', 'session')),
+                   parse_bar_windows(os.getenv('BAR_RETENTION', '')))
+
+    def cutoff_ns(self, window, now_ns):
+        """Oldest timestamp a window keeps (None: keep everything)"""
+        if window is None:
+            return self.session_start_ns
+        return now_ns - window
+
+    def sweep_raw(self, store, now_ns):
+        """Evict raw ticks outside the raw window; returns how many"""
+        cutoff = self.cutoff_ns(self.raw_window, now_ns)
+        return store.evict_before(cutoff) if cutoff is not None else 0
+
+    def sweep_bars(self, bar_builder, now_ns):
+        """Evict bars outside their interval's window, then down to the memory cap; returns how many"""
+        cutoffs = {interval: self.cutoff_ns(window, now_ns) for interval, window in self.bar_windows.items()}
+        evicted = bar_builder.evict_before(cutoffs)
+        if self.max_bars is not None:
+            evicted += bar_builder.evict_to_fit(self.max_bars, self.bar_eviction)
+        return evicted
+
+    def sweep(self, store, bar_builder, now_ns):
+        """Enforce every window and cap (caller holds data_lock); returns (raw ticks, bars) evicted"""
+        return self.sweep_raw(store, now_ns), self.sweep_bars(bar_builder, now_ns)
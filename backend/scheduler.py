@@ -0,0 +1,84 @@
+"""
+Session timers (warmup, connect, close) on the ingestion event loop.
+
+Callbacks are queued for a wall-clock time and run in order by the run() task.
+It sleeps until the earliest deadline and wakes early only when a new timer is
+added, so an idle weekend costs a handful of wakeups instead of a polling loop.
+Long sleeps are capped so that a suspended host or a clock step is noticed
+within MAX_SLEEP_SECONDS (the loop's own clock is monotonic and would miss both).
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import time
+
+logger = logging.getLogger('ndx_monitor.scheduler')
+
+MAX_SLEEP_SECONDS = 3600
+
+
+class Scheduler:
+    """
+    call_at()/call_later() and run() all belong to one event loop. A callback that
+    returns a coroutine is run as its own task, so a long session does not hold up later timers
+    """
+
+    def __init__(self):
+        self._timers = []
+        self._order = itertools.count()  # Ties run in the order they were added
+        self._changed = asyncio.Event()
+        self._tasks = set()  # Strong references to running coroutine callbacks
+
+    def call_at(self, when, callback, *args):
+        """Run callback(*args) at when (aware datetime or epoch seconds); returns a handle for cancel()"""
+        deadline = when.timestamp() if hasattr(when, 'timestamp') else float(when)
+        timer = [deadline, next(self._order), callback, args]
+        heapq.heappush(self._timers, timer)
+        self._changed.set()
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(time.time() + delay, callback, *args)
+
+    def cancel(self, timer):
+        timer[2] = None  # Skipped when it comes due
+
+    async def run(self):
+        """Run due callbacks until cancelled; cancelling also cancels the coroutines they started"""
+        try:
+            while True:
+                while self._timers and self._timers[0][0] <= time.time():
+                    _, _, callback, args = heapq.heappop(self._timers)
+                    if callback is not None:
+                        self._run_callback(callback, args)
+
+                delay = self._timers[0][0] - time.time() if self._timers else MAX_SLEEP_SECONDS
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), min(max(delay, 0), MAX_SLEEP_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _run_callback(self, callback, args):
+        name = getattr(callback, '__name__', callback)
+        try:
+            result = callback(*args)
+        except Exception as e:
+            logger.error(f"❌ Scheduled {name} failed: {e}")
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._tasks.add(task)
+            task.add_done_callback(lambda done: self._finished(name, done))
+
+    def _finished(self, name, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Scheduled {name} failed: {task.exception()}")
@@ -0,0 +1,129 @@
+"""
+API serialization of tick store reads.
+
+The store keeps raw typed columns; display strings (CST timestamps, "$25,650"
+strikes, CALL/PUT labels) are only produced here, when a response is built.
+"""
+import datetime
+import numpy as np
+import pytz
+from tick_store import OPTION_TYPES
+
+CST = pytz.timezone('America/Chicago')
+
+NANOS_PER_SECOND = 1_000_000_000
+
+
+def format_timestamp(timestamp_ns):
+    """Epoch nanoseconds -> 'YYYY-MM-DD HH:MM:SS' in CST"""
+    return datetime.datetime.fromtimestamp(timestamp_ns // NANOS_PER_SECOND, CST).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def format_option_rows(columns, symbols):
+    """Format a TickStore read as the row dicts the dashboard consumes"""
+    rows = []
+    # Many rows share the same second - format each distinct second once
+    timestamp_text = {}
+
+    for seq, timestamp_ns, contract_id, strike, option_type, open_price, high, low, close, vwap, volume, accumulated_volume in zip(
+        columns['seq'].tolist(),
+        columns['timestamp_ns'].tolist(),
+        columns['contract_id'].tolist(),
+        columns['strike'].tolist(),
+        columns['option_type'].tolist(),
+        columns['open'].tolist(),
+        columns['high'].tolist(),
+        columns['low'].tolist(),
+        columns['close'].tolist(),
+        columns['vwap'].tolist(),
+        columns['volume'].tolist(),
+        columns['accumulated_volume'].tolist(),
+    ):
+        second = timestamp_ns // NANOS_PER_SECOND
+        formatted_timestamp = timestamp_text.get(second)
+        if formatted_timestamp is None:
+            formatted_timestamp = format_timestamp(timestamp_ns)
+            timestamp_text[second] = formatted_timestamp
+
+        rows.append({
+            'Seq': seq,
+            'Timestamp': formatted_timestamp,
+            'Symbol': symbols[contract_id],
+            'Option_Type': OPTION_TYPES[option_type],
+            'Strike_Price': f"${strike:,}",
+            'Close_Price': close,
+            'Volume': volume,
+            'Accumulated_Volume': accumulated_volume,
+            'High': high,
+            'Low': low,
+            'Open': open_price,
+            'VWAP': vwap
+        })
+
+    return rows
+
+
+def format_option_columns(columns, symbols):
+    """
+    Format a TickStore read as one array per field (the compact ?format=columnar shape)
+    contract indexes the symbols list sent alongside; option_type indexes option_types
+    """
+    contract_ids, contract = np.unique(columns['contract_id'], return_inverse=True)
+    return {
+        'symbols': [symbols[contract_id] for contract_id in contract_ids.tolist()],
+        'option_types': list(OPTION_TYPES),
+        'columns': {
+            'seq': columns['seq'],
+            'timestamp_ms': columns['timestamp_ns'] // 1_000_000,
+            'contract': contract.astype(np.int32),
+            'option_type': columns['option_type'],
+            'strike': columns['strike'],
+            'open': columns['open'],
+            'high': columns['high'],
+            'low': columns['low'],
+            'close': columns['close'],
+            'vwap': columns['vwap'],
+            'volume': columns['volume'],
+            'accumulated_volume': columns['accumulated_volume'],
+        }
+    }
+
+
+def format_chain_rows(quotes, root, expiry, center, strikes):
+    """
+    Call/put chain rows for the given strikes (ascending) of one root and expiry,
+    from a LatestQuotes snapshot. Strikes with no quote yet keep a null side, so
+    the chain is always complete
+    """
+    by_strike = {}
+    for quote in quotes.values():
+        if quote.root == root and quote.expiry == expiry:
+            by_strike.setdefault(quote.strike, {})[quote.option_type] = quote
+
+    rows = []
+    for strike in strikes:
+        sides = by_strike.get(strike, {})
+        rows.append({
+            'strike': strike,
+            'strike_label': f"${strike:,}",
+            'atm': strike == center,
+            'call': _format_quote(sides.get('CALL')),
+            'put': _format_quote(sides.get('PUT')),
+        })
+    return rows
+
+
+def _format_quote(quote):
+    if quote is None:
+        return None
+    return {
+        'symbol': quote.symbol,
+        'timestamp': format_timestamp(quote.timestamp_ns),
+        'last': quote.close,
+        'open': quote.open,
+        'high': quote.high,
+        'low': quote.low,
+        'vwap': quote.vwap,
+        'volume': quote.volume,
+        'day_volume': quote.accumulated_volume,
+    }
@@ -0,0 +1,254 @@
+"""
+Tick ring buffer in shared memory: one writer (ingestion), any number of readers.
+
+SharedTickStore is a TickStore whose columns, symbol table and sequence counters
+live in a memory-mapped file (on /dev/shm by default, i.e. RAM), so API worker
+processes map the very same pages the ingestion process writes - no copies, no
+cross-process locks.
+
+Consistency is a seqlock on the ring cursor:
+    writer  header[WRITING_SEQ] = seq  ->  write the row  ->  header[LAST_SEQ] = seq
+    reader  reads up to LAST_SEQ, copies, then drops any copied row the writer may
+            have lapped meanwhile (seq <= WRITING_SEQ - capacity)
+Rows up to LAST_SEQ are complete, and a row is only overwritten once the writer
+is a full ring ahead of it, so readers never see a torn row and never block.
+The status block (scalar ingestion state as JSON) uses a classic version seqlock.
+
+    TICK_SHM_PATH         file backing the ring (default /dev/shm/ndx-options-ticks,
+                          or TICK_DATA_DIR/ticks.shm when /dev/shm does not exist)
+    TICK_SHM_MAX_SYMBOLS  contract symbols the shared table can hold (default 16384)
+"""
+import json
+import mmap
+import os
+import threading
+import time
+
+import numpy as np
+
+from tick_log import TICK_DATA_DIR
+from tick_store import TICK_COLUMNS, TickStore, select_rows
+
+DEFAULT_SHM_PATH = ('/dev/shm/ndx-options-ticks' if os.path.isdir('/dev/shm')
+                    else os.path.join(TICK_DATA_DIR, 'ticks.shm'))
+TICK_SHM_PATH = os.getenv('TICK_SHM_PATH', DEFAULT_SHM_PATH)
+MAX_SYMBOLS = int(os.getenv('TICK_SHM_MAX_SYMBOLS', 16384))
+
+MAGIC = 0x4E44585449434B31  # 'NDXTICK1'
+SYMBOL_BYTES = 32
+STATUS_BYTES = 65536  # Ingest status JSON, including the ingestion metrics text
+ALIGN = 64
+
+# Header slots (int64 each)
+H_MAGIC, H_CAPACITY, H_MAX_SYMBOLS, H_GENERATION, H_LAST_SEQ, H_WRITING_SEQ, H_FIRST_SEQ, \
+    H_CLEARED_SEQ, H_SYMBOL_COUNT, H_STATUS_VERSION, H_STATUS_LENGTH, H_WIPED_SEQ = range(12)
+HEADER_SLOTS = 16
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _layout(capacity, max_symbols):
+    """Byte offsets of every region, plus the total size"""
+    offsets = {}
+    offset = HEADER_SLOTS * 8
+    offsets['symbols'] = offset = _aligned(offset)
+    offset += max_symbols * SYMBOL_BYTES
+    offsets['status'] = offset = _aligned(offset)
+    offset += STATUS_BYTES
+    for name, dtype in TICK_COLUMNS:
+        offsets[name] = offset = _aligned(offset)
+        offset += capacity * np.dtype(dtype).itemsize
+    return offsets, _aligned(offset)
+
+
+class SharedTickStore(TickStore):
+    """
+    TickStore backed by a shared memory-mapped file
+    Use SharedTickStore.create() in the ingestion process and SharedTickStore.attach()
+    in readers; readers get read-only views and must not call the write methods
+    """
+
+    def __init__(self, path, mapping, writable):
+        self.path = path
+        self._mapping = mapping
+        self.writable = writable
+        self._header = np.ndarray(HEADER_SLOTS, dtype=np.int64, buffer=mapping)
+        if int(self._header[H_MAGIC]) != MAGIC:
+            raise ValueError(f"{path} is not a tick ring")
+
+        self.capacity = int(self._header[H_CAPACITY])
+        self.max_symbols = int(self._header[H_MAX_SYMBOLS])
+        self.generation = int(self._header[H_GENERATION])
+        self.inode = os.stat(path).st_ino
+
+        offsets, _ = _layout(self.capacity, self.max_symbols)
+        self._symbol_table = np.ndarray(self.max_symbols, dtype=f'S{SYMBOL_BYTES}', buffer=mapping,
+                                        offset=offsets['symbols'])
+        self._status = np.ndarray(STATUS_BYTES, dtype=np.uint8, buffer=mapping, offset=offsets['status'])
+        self.columns = {name: np.ndarray(self.capacity, dtype=dtype, buffer=mapping, offset=offsets[name])
+                        for name, dtype in TICK_COLUMNS}
+
+        self._symbols = []
+        self._contract_ids = {}
+        self._symbols_lock = threading.Lock()
+        # Only the writer looks rows up by time - the watermarks stay in its own memory
+        # (np.zeros pages are never committed in readers)
+        self.watermarks = np.zeros(self.capacity, dtype=np.int64)
+        self.high_water_ns = 0
+
+    @classmethod
+    def create(cls, path=TICK_SHM_PATH, capacity=1_048_576, max_symbols=MAX_SYMBOLS):
+        """
+        Writer side: (re)initialize the ring at path
+        A ring of the same size is reset in place (readers notice the new generation);
+        otherwise the file is replaced (readers notice the new inode)
+        """
+        _, size = _layout(capacity, max_symbols)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) != size:
+            # Never shrink or grow a file readers may have mapped - replace it instead
+            os.unlink(path)
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            mapping = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+        header = np.ndarray(HEADER_SLOTS, dtype=np.int64, buffer=mapping)
+        header[H_MAGIC] = 0  # Readers ignore the ring while it is being reset
+        header[H_CAPACITY] = capacity
+        header[H_MAX_SYMBOLS] = max_symbols
+        header[H_GENERATION] = time.time_ns()
+        header[H_LAST_SEQ] = 0
+        header[H_WRITING_SEQ] = 0
+        header[H_FIRST_SEQ] = 1
+        header[H_CLEARED_SEQ] = 0
+        header[H_WIPED_SEQ] = 0
+        header[H_SYMBOL_COUNT] = 0
+        header[H_STATUS_VERSION] = 0
+        header[H_STATUS_LENGTH] = 0
+        header[H_MAGIC] = MAGIC
+        return cls(path, mapping, writable=True)
+
+    @classmethod
+    def attach(cls, path=TICK_SHM_PATH):
+        """Reader side: map an existing ring read-only"""
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(path, mapping, writable=False)
+
+    def replaced(self):
+        """True when the writer has reset or replaced the ring since this mapping was made"""
+        try:
+            if os.stat(self.path).st_ino != self.inode:
+                return True
+        except FileNotFoundError:
+            return False
+        return int(self._header[H_GENERATION]) != self.generation
+
+    # Sequence counters live in the shared header
+    @property
+    def last_seq(self):
+        return int(self._header[H_LAST_SEQ])
+
+    @last_seq.setter
+    def last_seq(self, value):
+        self._header[H_LAST_SEQ] = value
+
+    @property
+    def first_seq(self):
+        return int(self._header[H_FIRST_SEQ])
+
+    @first_seq.setter
+    def first_seq(self, value):
+        self._header[H_FIRST_SEQ] = value
+
+    @property
+    def cleared_seq(self):
+        return int(self._header[H_CLEARED_SEQ])
+
+    @cleared_seq.setter
+    def cleared_seq(self, value):
+        self._header[H_CLEARED_SEQ] = value
+
+    @property
+    def wiped_seq(self):
+        return int(self._header[H_WIPED_SEQ])
+
+    @wiped_seq.setter
+    def wiped_seq(self, value):
+        self._header[H_WIPED_SEQ] = value
+
+    @property
+    def symbols(self):
+        """Contract symbols by id, synced from the shared table on access"""
+        count = int(self._header[H_SYMBOL_COUNT])
+        if count > len(self._symbols):
+            with self._symbols_lock:
+                known = len(self._symbols)
+                if count > known:
+                    self._symbols.extend(raw.decode() for raw in self._symbol_table[known:count])
+        return self._symbols
+
+    def contract_id(self, symbol):
+        contract_id = self._contract_ids.get(symbol)
+        if contract_id is None:
+            contract_id = len(self._symbols)
+            if contract_id >= self.max_symbols:
+                raise RuntimeError(f"Shared symbol table full ({self.max_symbols}) - raise TICK_SHM_MAX_SYMBOLS")
+            # The symbol is published before any row can reference it
+            self._symbol_table[contract_id] = symbol.encode()
+            self._symbols.append(symbol)
+            self._contract_ids[symbol] = contract_id
+            self._header[H_SYMBOL_COUNT] = contract_id + 1
+        return contract_id
+
+    def append(self, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap,
+               volume, accumulated_volume):
+        self._header[H_WRITING_SEQ] = self.last_seq + 1
+        return super().append(symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap,
+                              volume, accumulated_volume)
+
+    def extend(self, records, symbols):
+        self._header[H_WRITING_SEQ] = self.last_seq + len(records)
+        super().extend(records, symbols)
+
+    def read_range(self, start_seq, end_seq):
+        result = super().read_range(start_seq, end_seq)
+        # Drop rows the writer may have lapped while we were copying them
+        oldest_intact = int(self._header[H_WRITING_SEQ]) - self.capacity + 1
+        seqs = result['seq']
+        if len(seqs) and seqs[0] < oldest_intact:
+            result = select_rows(result, seqs >= oldest_intact)
+        return result
+
+    def write_status(self, status):
+        """Writer side: publish the scalar ingestion state"""
+        payload = json.dumps(status).encode()
+        if len(payload) > STATUS_BYTES:
+            raise ValueError(f"Status too large for the shared block ({len(payload)} bytes)")
+        header = self._header
+        header[H_STATUS_VERSION] += 1  # Odd: write in progress
+        self._status[:len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+        header[H_STATUS_LENGTH] = len(payload)
+        header[H_STATUS_VERSION] += 1  # Even: consistent again
+
+    def read_status(self, retries=100):
+        """Reader side: latest published status dict, or None if none was published yet"""
+        header = self._header
+        for _ in range(retries):
+            version = int(header[H_STATUS_VERSION])
+            if version == 0:
+                return None
+            if version % 2:
+                continue
+            payload = self._status[:int(header[H_STATUS_LENGTH])].tobytes()
+            if int(header[H_STATUS_VERSION]) == version:
+                return json.loads(payload)
+        return None
@@ -0,0 +1,107 @@
+"""
+Strike ladder subscriptions for the options WebSocket.
+
+The ladder is rebuilt whenever the at-the-money strike moves; SubscriptionManager
+diffs it against what the live connections already have, so re-centering only
+sends the handful of tickers that actually changed. The subscription set is
+split across connections of at most WS_MAX_TICKERS_PER_CONNECTION tickers each.
+
+    WS_MAX_TICKERS_PER_CONNECTION   subscription budget of one WebSocket connection (default 1000)
+"""
+import math
+import os
+import threading
+from collections import namedtuple
+
+# Shape of the strike ladder: spacing between strikes and how many strikes of
+# each side to subscribe below/above the center (the center strike is always included)
+LadderSpec = namedtuple('LadderSpec', ['strike_interval', 'puts_below', 'puts_above', 'calls_below', 'calls_above'])
+
+DEFAULT_LADDER = LadderSpec(
+    strike_interval=int(os.getenv('STRIKE_INTERVAL', 10)),
+    puts_below=int(os.getenv('LADDER_PUTS_BELOW', 70)),
+    puts_above=int(os.getenv('LADDER_PUTS_ABOVE', 50)),
+    calls_below=int(os.getenv('LADDER_CALLS_BELOW', 50)),
+    calls_above=int(os.getenv('LADDER_CALLS_ABOVE', 50)),
+)
+
+MAX_TICKERS_PER_CONNECTION = int(os.getenv('WS_MAX_TICKERS_PER_CONNECTION', 1000))
+
+
+def option_ticker(base_date, side, strike, root='NDXP'):
+    """AM (minute aggregate) subscription ticker for one contract"""
+    return f"AM.O:{root}{base_date}{side}{round(strike * 1000):08d}"
+
+
+def build_ladder_tickers(strike, base_date, ladder=DEFAULT_LADDER, root='NDXP'):
+    """Deduplicated, sorted tickers for the ladder centered on strike"""
+    interval = ladder.strike_interval
+    tickers = set()
+
+    for i in range(-ladder.puts_below, ladder.puts_above + 1):
+        tickers.add(option_ticker(base_date, 'P', strike + i * interval, root))
+
+    for i in range(-ladder.calls_below, ladder.calls_above + 1):
+        tickers.add(option_ticker(base_date, 'C', strike + i * interval, root))
+
+    return sorted(tickers)
+
+
+class SubscriptionManager:
+    """
+    Remembers which tickers each live connection (shard) is subscribed to and
+    computes minimal changes. A ticker stays on its shard until it is dropped, so
+    re-centering one chain only touches the shards holding the tickers that changed
+    """
+
+    def __init__(self, max_per_shard=MAX_TICKERS_PER_CONNECTION):
+        self.max_per_shard = max_per_shard
+        self.shards = []
+        self._lock = threading.Lock()
+
+    @property
+    def subscribed(self):
+        with self._lock:
+            return set().union(*self.shards)
+
+    def reset(self, tickers=()):
+        """
+        Split the full subscription set of freshly created connections into shards
+        Returns the sorted tickers of each shard (evenly sized, none over the budget)
+        """
+        tickers = sorted(set(tickers))
+        count = math.ceil(len(tickers) / self.max_per_shard)
+        size = math.ceil(len(tickers) / count) if count else 0
+        shards = [tickers[i:i + size] for i in range(0, len(tickers), size)] if size else []
+        with self._lock:
+            self.shards = [set(shard) for shard in shards]
+        return shards
+
+    def update(self, tickers):
+        """
+        Switch to a new desired ticker set
+        Returns [(added, removed)] per shard - the only tickers each connection needs
+        to (un)subscribe. Shards past the previous count are new connections to open.
+        """
+        desired = set(tickers)
+        with self._lock:
+            changes = []
+            for shard in self.shards:
+                removed = shard - desired
+                shard -= removed
+                changes.append((set(), removed))
+
+            # New tickers fill the emptiest shards first, then new shards
+            missing = sorted(desired.difference(*self.shards))
+            for ticker in missing:
+                candidates = [i for i, shard in enumerate(self.shards) if len(shard) < self.max_per_shard]
+                if candidates:
+                    index = min(candidates, key=lambda i: len(self.shards[i]))
+                else:
+                    self.shards.append(set())
+                    changes.append((set(), set()))
+                    index = len(self.shards) - 1
+                self.shards[index].add(ticker)
+                changes[index][0].add(ticker)
+
+        return [(sorted(added), sorted(removed)) for added, removed in changes]
@@ -0,0 +1,129 @@
+"""
+Running per-(strike, option type) aggregates for the dashboard charts.
+
+StrikeSummary is updated once per stored tick in O(1) (a dict lookup and a few
+additions), so /api/summary hands out ~240 ready-made entries per chain and
+expiry instead of the browser re-aggregating the raw rows on every refresh.
+"""
+from occ_symbols import parse_option_symbol
+from tick_store import OPTION_TYPES
+
+
+class StrikeStats:
+    """Aggregate of every tick stored for one strike and option type"""
+    __slots__ = ('volume', 'ticks', 'last', 'high', 'low', 'notional', 'last_timestamp_ns')
+
+    def __init__(self):
+        self.volume = 0
+        self.ticks = 0
+        self.last = None
+        self.high = None
+        self.low = None
+        self.notional = 0.0  # sum(vwap * volume), for the volume-weighted average price
+        self.last_timestamp_ns = 0
+
+
+def _combine(first, second):
+    """Aggregate of two StrikeStats of the same strike and type (different expiries)"""
+    combined = StrikeStats()
+    combined.volume = first.volume + second.volume
+    combined.ticks = first.ticks + second.ticks
+    combined.notional = first.notional + second.notional
+    latest = first if first.last_timestamp_ns >= second.last_timestamp_ns else second
+    combined.last = latest.last
+    combined.last_timestamp_ns = latest.last_timestamp_ns
+    # Every entry has seen at least one tick, so high/low are always set
+    combined.high = max(first.high, second.high)
+    combined.low = min(first.low, second.low)
+    return combined
+
+
+class StrikeSummary:
+    """
+    Per-(root, expiry, strike, option type) volume, last price, VWAP, high/low and tick count
+    Not thread-safe on its own - callers serialize access (see data_lock in main.py)
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def update(self, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap, volume,
+               accumulated_volume=0, contract=None):
+        # Parsed once by the caller when it has it; otherwise cached per symbol (one dict lookup)
+        if contract is None:
+            contract = parse_option_symbol(symbol)
+        key = (contract.underlying, contract.expiry, strike, option_type)
+        stats = self.entries.get(key)
+        if stats is None:
+            stats = self.entries[key] = StrikeStats()
+
+        stats.volume += volume
+        stats.ticks += 1
+        stats.notional += vwap * volume
+        if timestamp_ns >= stats.last_timestamp_ns:
+            stats.last = close
+            stats.last_timestamp_ns = timestamp_ns
+        if stats.high is None or high > stats.high:
+            stats.high = high
+        if stats.low is None or low < stats.low:
+            stats.low = low
+
+    def load(self, columns, symbols):
+        """Fold a TickStore read (or persisted records) into the aggregates"""
+        for timestamp_ns, contract_id, strike, option_type, open_price, high, low, close, vwap, volume in zip(
+            columns['timestamp_ns'].tolist(),
+            columns['contract_id'].tolist(),
+            columns['strike'].tolist(),
+            columns['option_type'].tolist(),
+            columns['open'].tolist(),
+            columns['high'].tolist(),
+            columns['low'].tolist(),
+            columns['close'].tolist(),
+            columns['vwap'].tolist(),
+            columns['volume'].tolist(),
+        ):
+            self.update(symbols[contract_id], OPTION_TYPES[option_type], strike, timestamp_ns,
+                        open_price, high, low, close, vwap, volume)
+
+    def clear(self):
+        self.entries.clear()
+
+    def snapshot(self, root=None, expiry=None):
+        """Plain (strikes, totals) copy of one chain/expiry (None: all), safe to serialize outside the lock"""
+        selected = sorted(
+            (key[2:], stats) for key, stats in self.entries.items()
+            if (root is None or key[0] == root) and (expiry is None or key[1] == expiry)
+        )
+        # Several expiries of a root fold into one entry per strike and type
+        merged = {}
+        for key, stats in selected:
+            merged[key] = _combine(merged[key], stats) if key in merged else stats
+
+        strikes = [
+            {
+                'strike': strike,
+                'type': option_type,
+                'volume': stats.volume,
+                'ticks': stats.ticks,
+                'last': stats.last,
+                'vwap': stats.notional / stats.volume if stats.volume else stats.last,
+                'high': stats.high,
+                'low': stats.low
+            }
+            for (strike, option_type), stats in sorted(merged.items())
+        ]
+        type_volume = {name: 0 for name in OPTION_TYPES}
+        type_ticks = {name: 0 for name in OPTION_TYPES}
+        for (_, option_type), stats in merged.items():
+            type_volume[option_type] += stats.volume
+            type_ticks[option_type] += stats.ticks
+        call_volume = type_volume['CALL']
+        put_volume = type_volume['PUT']
+        totals = {
+            'call_volume': call_volume,
+            'put_volume': put_volume,
+            'call_ticks': type_ticks['CALL'],
+            'put_ticks': type_ticks['PUT'],
+            'put_call_ratio': round(put_volume / call_volume, 4) if call_volume else None
+        }
+        return strikes, totals
@@ -0,0 +1,160 @@
+"""
+Supervision of the options WebSocket connections during a session.
+
+    backoff   reconnects wait uniform(0, min(cap, base * 2**attempt)) seconds ("full
+              jitter"), so a provider outage does not end in every client
+              reconnecting in lockstep; the attempts reset once data flows again
+    watchdog  a connection that stays open but delivers nothing is as dead as a
+              closed one - no batch for WS_STALL_SECONDS during the session counts
+              as a stall and forces a reconnect
+    gaps      every outage is recorded as the interval between the last batch
+              before it and the first batch after it, so the missing minutes can
+              be backfilled (backfill.py) and are visible in /api/health
+
+    WS_BACKOFF_BASE_SECONDS  ceiling of the first reconnect delay (default 1)
+    WS_BACKOFF_MAX_SECONDS   cap on the reconnect delay (default 60)
+    WS_STALL_SECONDS         seconds without a batch that count as a stalled connection (default 120)
+    WS_GAPS_KEPT             recorded gaps kept for /api/health (default 50)
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+
+logger = logging.getLogger('ndx_monitor.supervisor')
+
+WS_BACKOFF_BASE_SECONDS = float(os.getenv('WS_BACKOFF_BASE_SECONDS', 1))
+WS_BACKOFF_MAX_SECONDS = float(os.getenv('WS_BACKOFF_MAX_SECONDS', 60))
+WS_STALL_SECONDS = float(os.getenv('WS_STALL_SECONDS', 120))
+WS_GAPS_KEPT = int(os.getenv('WS_GAPS_KEPT', 50))
+
+NANOS_PER_SECOND = 1_000_000_000
+
+
+class Backoff:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, base=WS_BACKOFF_BASE_SECONDS, cap=WS_BACKOFF_MAX_SECONDS, rng=random.random):
+        self.base = base
+        self.cap = cap
+        self.rng = rng
+        self.attempts = 0
+
+    def next_delay(self):
+        """Seconds to wait before the next attempt (each call counts one attempt)"""
+        ceiling = min(self.cap, self.base * 2 ** min(self.attempts, 32))
+        self.attempts += 1
+        return self.rng() * ceiling
+
+    def reset(self):
+        self.attempts = 0
+
+
+class Gap:
+    """Epoch ns interval with no data: from the last batch before an outage to the first one after it"""
+    __slots__ = ('start_ns', 'end_ns', 'reason', 'backfilled', 'baseline')
+
+    def __init__(self, start_ns, reason):
+        self.start_ns = start_ns
+        self.end_ns = None  # Open until data flows again
+        self.reason = reason
+        self.backfilled = None  # Bars stored by the backfill (None until it has run)
+        self.baseline = None  # State captured as the gap opened (on_gap_opened), for the backfill
+
+    def as_dict(self):
+        return {
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'seconds': None if self.end_ns is None else round((self.end_ns - self.start_ns) / NANOS_PER_SECOND, 1),
+            'reason': self.reason,
+            'backfilled': self.backfilled,
+        }
+
+
+class ConnectionSupervisor:
+    """
+    Reconnect delays, stall detection and the gap log of one ingestion process
+    Everything runs on the ingestion event loop; heartbeat() is called once per batch and costs O(1)
+    on_gap_opened(gap) is called as each outage starts, before any data from after it can arrive
+    """
+
+    def __init__(self, stall_seconds=WS_STALL_SECONDS, backoff=None, gaps_kept=WS_GAPS_KEPT,
+                 on_gap_opened=None):
+        self.on_gap_opened = on_gap_opened
+        self.stall_ns = int(stall_seconds * NANOS_PER_SECOND)
+        self.backoff = backoff or Backoff()
+        self.gaps = deque(maxlen=gaps_kept)
+        self.open_gap = None
+        self.session_start_ns = None
+        self.last_data_ns = None
+        self.watch_from_ns = None  # No stall is called before this (connect time or the open bell)
+        self.stalls = 0
+
+    def new_session(self, start_ns):
+        """A session starts at start_ns (the open): an outage before its first batch dates from there"""
+        self.session_start_ns = start_ns
+        self.last_data_ns = None
+        self.open_gap = None
+        self.backoff.reset()
+
+    def connected(self, quiet_until_ns=None):
+        """Connections were (re)started; nothing is expected before quiet_until_ns (e.g. the open)"""
+        now_ns = time.time_ns()
+        self.watch_from_ns = max(now_ns, quiet_until_ns or 0)
+
+    def disconnected(self):
+        self.watch_from_ns = None
+
+    def heartbeat(self, now_ns):
+        """A batch arrived; returns the gap it closes (to be backfilled), if any"""
+        self.last_data_ns = now_ns
+        gap = self.open_gap
+        if gap is None:
+            return None
+        gap.end_ns = now_ns
+        self.open_gap = None
+        self.backoff.reset()
+        return gap
+
+    def connection_lost(self, reason, now_ns=None):
+        """Record the start of an outage (a no-op while one is already open); returns the open gap"""
+        if self.open_gap is None:
+            now_ns = now_ns or time.time_ns()
+            start_ns = self.last_data_ns or self.session_start_ns or now_ns
+            self.open_gap = Gap(min(start_ns, now_ns), reason)
+            self.gaps.append(self.open_gap)
+            if self.on_gap_opened is not None:
+                self.on_gap_opened(self.open_gap)
+        return self.open_gap
+
+    def close_gap(self, now_ns=None):
+        """Session over with an outage still open: end it now; returns it (or None)"""
+        gap, self.open_gap = self.open_gap, None
+        if gap is not None:
+            gap.end_ns = now_ns or time.time_ns()
+        return gap
+
+    def stalled(self, now_ns):
+        if self.watch_from_ns is None:
+            return False
+        since = max(self.watch_from_ns, self.last_data_ns or 0)
+        return now_ns - since > self.stall_ns
+
+    async def watch(self, on_stall):
+        """Watchdog task: calls on_stall() once per stalled connection, until cancelled"""
+        interval = min(max(self.stall_ns / NANOS_PER_SECOND / 4, 0.05), 5)
+        while True:
+            await asyncio.sleep(interval)
+            now_ns = time.time_ns()
+            if self.stalled(now_ns):
+                self.stalls += 1
+                idle = (now_ns - max(self.watch_from_ns, self.last_data_ns or 0)) / NANOS_PER_SECOND
+                logger.warning(f"🫀 No data for {idle:.0f}s - treating the connection as stalled")
+                self.connection_lost('stall', now_ns)
+                self.disconnected()  # Quiet until the connections are restarted
+                on_stall()
+
+    def describe(self):
+        return [gap.as_dict() for gap in self.gaps]
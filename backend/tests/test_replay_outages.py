@@ -0,0 +1,231 @@
+"""
+Outage handling end to end, against the replay.py stand-ins: the session loop
+in main.py reconnects after a dropped or silent options stream and records each
+gap, backfill.py fills the missed minutes from FakeRestServer without
+duplicating minutes delivered live, and the underlying price feed falls back to
+REST polling and returns to its stream
+"""
+import asyncio
+import datetime
+import os
+import threading
+import time
+import types
+
+import pytest
+
+from replay import FakeRestServer, ReplayServer, synthetic_batches, write_recording
+
+STREAM_PRICE = 25_000.0
+REST_PRICE = 25_650.0
+
+# The backend modules read their endpoints, chains and timings at import - set them first
+rest_server = FakeRestServer(prices={'I:NDX': REST_PRICE})
+os.environ.update({
+    'TICK_PERSIST': 'false', 'POLYGON_REST_URL': rest_server.base_url, 'UNDERLYING_SOURCE': 'poll',
+    'UNDERLYING_POLL_SECONDS': '3600', 'OPTION_CHAINS': 'NDXP I:NDX daily*1',
+    'PREOPEN_WARMUP_SECONDS': '2', 'CONNECT_LEAD_SECONDS': '1', 'CLOSE_GRACE_SECONDS': '1',
+    'WS_STALL_SECONDS': '1', 'WS_BACKOFF_BASE_SECONDS': '0.5', 'WS_BACKOFF_MAX_SECONDS': '1',
+})
+
+import main  # noqa: E402
+import market_calendar  # noqa: E402
+from supervisor import Backoff  # noqa: E402
+from underlying import UnderlyingPriceFeed  # noqa: E402
+
+MINUTE_NS = 60_000_000_000
+
+
+@pytest.fixture(scope='module')
+def rest():
+    rest_server.start()
+    yield rest_server
+    rest_server.stop()
+
+
+@pytest.fixture
+def fresh_main(rest):
+    main.clear_options_data()
+    main.connection_supervisor.gaps.clear()
+    main.connection_supervisor.stalls = 0
+    return main
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = str(tmp_path / 'session.jsonl')
+    write_recording(path, synthetic_batches(100, 100))
+    return path
+
+
+def run_session(main, monkeypatch, feed, seconds=6):
+    """Run the ingestion loop through one short session that opens in 3s, as if the market were open"""
+    now = datetime.datetime.now(market_calendar.CST)
+    session = market_calendar.Session(now.date(), now + datetime.timedelta(seconds=3),
+                                      now + datetime.timedelta(seconds=3 + seconds), False)
+    tomorrow = market_calendar.Session(now.date() + datetime.timedelta(days=1), now + datetime.timedelta(days=1),
+                                       now + datetime.timedelta(days=1, hours=6), False)
+
+    def next_session(now=None, grace=datetime.timedelta(0)):
+        now = now or datetime.datetime.now(market_calendar.CST)
+        return session if now < session.close + grace else tomorrow
+
+    def in_session(now=None, lead=datetime.timedelta(0), grace=datetime.timedelta(0)):
+        now = now or datetime.datetime.now(market_calendar.CST)
+        return session.open - lead <= now < session.close + grace
+
+    monkeypatch.setattr(main, 'next_session', next_session)
+    monkeypatch.setattr(main, 'in_session', in_session)
+    monkeypatch.setattr(main, 'WS_FEED', feed)
+    monkeypatch.setattr(main, 'WS_SECURE', False)
+
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(main.run_ingestion())
+    thread = threading.Thread(target=loop.run_until_complete,
+                              args=(asyncio.gather(task, return_exceptions=True),), daemon=True)
+    thread.start()
+    try:
+        # Past the close and its grace, with the session task done and its backfills finished
+        deadline = time.monotonic() + seconds + 20
+        time.sleep(seconds + 5)
+        while (main.websocket_running or main.backfill_tasks) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not main.websocket_running and not main.backfill_tasks
+    finally:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join(10)
+        loop.close()
+
+
+def rows_by_minute(main):
+    """{(symbol, minute): [live row count, backfilled row count]} over the whole store"""
+    columns = main.tick_store.read_since(0)
+    symbols = main.tick_store.symbols
+    counts = {}
+    for contract_id, timestamp_ns in zip(columns['contract_id'].tolist(), columns['timestamp_ns'].tolist()):
+        # Backfilled bars are stamped exactly on their minute's end, live ticks on arrival
+        backfilled = timestamp_ns % MINUTE_NS == 0
+        counts.setdefault((symbols[contract_id], timestamp_ns // MINUTE_NS), [0, 0])[backfilled] += 1
+    return counts
+
+
+def check_backfill(main, gaps):
+    counts = rows_by_minute(main)
+    assert all(backfilled == 0 or (live == 0 and backfilled == 1) for live, backfilled in counts.values())
+    assert sum(backfilled for _, backfilled in counts.values()) == sum(gap['backfilled'] for gap in gaps)
+
+
+def test_dropped_stream_is_reconnected_and_the_gap_recorded(fresh_main, monkeypatch, recording, rest):
+    main = fresh_main
+    server = ReplayServer(recording, port=0, speed=1, loops=50, drop_after=20).start()
+    requests_before = rest.requests
+    try:
+        run_session(main, monkeypatch, server.feed)
+    finally:
+        server.stop()
+
+    assert server.connections == 2
+    gaps = main.connection_supervisor.describe()
+    assert [gap['reason'] for gap in gaps] == ['closed']
+    assert gaps[0]['end_ns'] > gaps[0]['start_ns']
+    assert gaps[0]['backfilled'] is not None
+    # The backfill asked REST for every subscribed contract
+    assert rest.requests - requests_before >= len(main.subscription_manager.subscribed)
+    # Data kept flowing once the second connection was up
+    assert main.tick_store.read_since(0)['timestamp_ns'].max() > gaps[0]['end_ns']
+    check_backfill(main, gaps)
+
+
+def test_silent_stream_is_called_stalled_and_reconnected(fresh_main, monkeypatch, recording):
+    main = fresh_main
+    server = ReplayServer(recording, port=0, speed=1, loops=50, stall_after=20).start()
+    try:
+        run_session(main, monkeypatch, server.feed)
+    finally:
+        server.stop()
+
+    assert server.connections == 2
+    assert main.connection_supervisor.stalls == 1
+    gaps = main.connection_supervisor.describe()
+    assert [gap['reason'] for gap in gaps] == ['stall']
+    # Nothing arrived for at least WS_STALL_SECONDS before the watchdog gave up on the connection
+    assert gaps[0]['end_ns'] - gaps[0]['start_ns'] >= 1_000_000_000
+    assert gaps[0]['backfilled'] is not None
+    check_backfill(main, gaps)
+
+
+def test_backfill_skips_minutes_delivered_live(fresh_main, monkeypatch):
+    main = fresh_main
+    symbols = [f"O:NDXP251017{side}{strike:05d}000" for side, strike in (('C', 25650), ('P', 25640), ('C', 25700))]
+    monkeypatch.setattr(main, 'subscription_manager', types.SimpleNamespace(subscribed={f"AM.{s}" for s in symbols}))
+    base_ns = (time.time_ns() // MINUTE_NS - 10) * MINUTE_NS
+    live, skipped = symbols[0], base_ns + 3 * MINUTE_NS
+
+    def store_live(symbol, timestamp_ns, volume, accumulated_volume):
+        contract = main.parse_option_symbol(symbol)
+        main.store_data(symbol, contract.option_type, contract.strike, timestamp_ns, 1.0, 1.0, 1.0, 1.0, 1.0,
+                        volume, accumulated_volume, contract)
+
+    # Before the outage: its quote is where the backfilled session volume continues
+    store_live(live, base_ns + 10_000_000_000, 10, 1000)
+    supervisor = main.connection_supervisor
+    supervisor.new_session(base_ns)
+    supervisor.heartbeat(base_ns + 30_000_000_000)
+    gap = supervisor.connection_lost('closed', now_ns=base_ns + 31_000_000_000)
+    # A minute inside the gap that still arrived live (e.g. over another shard's connection)
+    store_live(live, skipped + 20_000_000_000, 7, 1500)
+    assert supervisor.heartbeat(base_ns + 5 * MINUTE_NS + 30_000_000_000) is gap
+
+    asyncio.run(main.backfill_gap(gap))
+
+    # The bars that ended within the gap (minutes 1-5), each stamped at its end
+    bar_starts_ms = [(base_ns + minute * MINUTE_NS) // 1_000_000 for minute in range(5)]
+    assert gap.backfilled == len(symbols) * len(bar_starts_ms) - 1
+    counts = rows_by_minute(main)
+    assert counts[(live, skipped // MINUTE_NS)] == [1, 0]
+    for symbol in symbols:
+        for start_ms in bar_starts_ms:
+            minute = start_ms * 1_000_000 // MINUTE_NS + 1
+            if (symbol, minute) != (live, skipped // MINUTE_NS):
+                assert counts[(symbol, minute)] == [0, 1]
+
+    # Session volume continues from the quote before the gap, skipped minutes included
+    _, quotes = main.latest_quotes.snapshot()
+    volumes = [FakeRestServer.minute_bar(live, start_ms)['v'] for start_ms in bar_starts_ms]
+    assert quotes[live].accumulated_volume == 1000 + sum(volumes)
+    other = symbols[1]
+    assert quotes[other].accumulated_volume == sum(FakeRestServer.minute_bar(other, start_ms)['v']
+                                                   for start_ms in bar_starts_ms)
+
+
+def test_price_feed_polls_while_the_stream_is_down(rest, tmp_path):
+    path = str(tmp_path / 'index.jsonl')
+    write_recording(path, ((n * 100_000_000, [{'ev': 'V', 'T': 'I:NDX', 'val': STREAM_PRICE + n}])
+                           for n in range(5)))
+    server = ReplayServer(path, port=0, speed=1, drop_after=3).start()
+    seen = []
+
+    async def follow():
+        feed = UnderlyingPriceFeed('key', lambda price: seen.append((feed.source_in_use, price)), source='stream',
+                                   poll_seconds=0.2, feed=server.feed, secure=False, base_url=rest.base_url,
+                                   stream_backoff=Backoff(1, 2, rng=lambda: 1.0))
+        feed.start()
+        await asyncio.sleep(4)
+        await feed.stop()
+        return feed
+
+    try:
+        feed = asyncio.run(follow())
+    finally:
+        server.stop()
+
+    sources = [source for source, _ in seen]
+    switches = [source for i, source in enumerate(sources) if i == 0 or source != sources[i - 1]]
+    assert switches[:3] == ['stream', 'poll', 'stream']
+    assert server.connections >= 2
+    # Dropped after 3 values, then polled REST, then the second connection replayed all 5
+    assert [price for source, price in seen if source == 'stream'][:8] == \
+        [STREAM_PRICE + n for n in (0, 1, 2, 0, 1, 2, 3, 4)]
+    assert all(price == REST_PRICE for source, price in seen if source == 'poll')
+    # A stream that delivered is retried after the base polling period, not a growing one
+    assert feed.stream_backoff.attempts == 1
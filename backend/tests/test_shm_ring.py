@@ -0,0 +1,158 @@
+"""
+SharedTickStore seqlock: a writer process laps a small ring while this process
+reads it (directly and through a SharedStoreFollower); no torn or overwritten
+row and no half-written status may ever come back
+"""
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from follower import SharedStoreFollower
+from shm_ring import H_STATUS_VERSION, H_WRITING_SEQ, SharedTickStore
+from tick_store import OPTION_TYPE_CODES
+
+SYMBOLS = 50
+STATUS_EVERY = 97
+
+
+def row_values(seq):
+    """Every column of row seq is derived from seq, so a mixed-up row cannot pass check_rows"""
+    return (f'O:SYM{seq % SYMBOLS}', 'CALL' if seq % 2 else 'PUT', seq % 5000, seq,
+            seq + 0.25, seq + 0.5, seq - 0.5, seq + 0.125, seq + 0.0625, seq * 2, seq * 3)
+
+
+def status_values(seq):
+    # The payload length changes every time, so a torn read cannot parse into a matching dict
+    return {'seq': seq, 'written_at': seq, 'padding': 'x' * (seq % 500)}
+
+
+def write_rows(path, capacity, rows, ready):
+    store = SharedTickStore.create(path, capacity, max_symbols=SYMBOLS)
+    ready.set()
+    for seq in range(1, rows + 1):
+        store.append(*row_values(seq))
+        if seq % STATUS_EVERY == 0:
+            store.write_status(status_values(seq))
+
+
+def check_rows(columns, symbols):
+    """Assert every row holds the values written for its seq; returns the seqs"""
+    seq = columns['seq']
+    if not len(seq):
+        return seq
+    assert (np.diff(seq) == 1).all()
+    assert (columns['timestamp_ns'] == seq).all()
+    assert (columns['strike'] == seq % 5000).all()
+    assert (columns['option_type'] == np.where(seq % 2, OPTION_TYPE_CODES['CALL'], OPTION_TYPE_CODES['PUT'])).all()
+    assert (columns['open'] == seq + 0.25).all()
+    assert (columns['high'] == seq + 0.5).all()
+    assert (columns['low'] == seq - 0.5).all()
+    assert (columns['close'] == seq + 0.125).all()
+    assert (columns['vwap'] == seq + 0.0625).all()
+    assert (columns['volume'] == seq * 2).all()
+    assert (columns['accumulated_volume'] == seq * 3).all()
+    assert [symbols[contract_id] for contract_id in columns['contract_id'].tolist()] == \
+        [f'O:SYM{s % SYMBOLS}' for s in seq.tolist()]
+    return seq
+
+
+def check_status(status):
+    if status is not None:
+        assert status == status_values(status['seq'])
+
+
+@pytest.fixture
+def ring_path(tmp_path):
+    return str(tmp_path / 'ticks.shm')
+
+
+def test_concurrent_reader_never_sees_torn_or_lapped_rows(ring_path):
+    capacity = 64
+    rows = 300_000
+    context = multiprocessing.get_context('spawn')
+    ready = context.Event()
+    writer = context.Process(target=write_rows, args=(ring_path, capacity, rows, ready))
+    writer.start()
+    try:
+        assert ready.wait(30)
+        store = SharedTickStore.attach(ring_path)
+
+        followed = []
+        statuses = []
+
+        def on_rows(columns, symbols):
+            seq = check_rows(columns, symbols)
+            if len(seq):
+                assert not followed or seq[0] > followed[-1]
+                followed.append(int(seq[-1]))
+
+        def on_reset(_):
+            raise AssertionError('the ring was never reset')
+
+        follower = SharedStoreFollower(store, on_rows, on_reset, on_reset, statuses.append)
+
+        reads = lapped = 0
+        while writer.is_alive() or store.last_seq < rows:
+            last_seq = store.last_seq
+            if last_seq == rows and not writer.is_alive():
+                break
+            # Ask for the whole ring: its oldest rows are the ones being overwritten
+            seq = check_rows(store.read_range(store.first_seq, last_seq), store.symbols)
+            reads += 1
+            if len(seq) < min(last_seq, capacity):
+                lapped += 1
+            if len(seq):
+                assert seq[-1] == last_seq and seq[0] > last_seq - capacity
+            check_status(store.read_status())
+            follower.poll()
+        writer.join(30)
+    finally:
+        if writer.is_alive():
+            writer.kill()
+
+    assert writer.exitcode == 0
+    follower.poll()
+    assert reads > 0 and followed[-1] == rows
+    assert statuses and all(status == status_values(status['seq']) for status in statuses)
+    assert lapped > 0, 'the writer never lapped a read - the cutoff went untested'
+
+
+def test_read_range_drops_the_row_being_overwritten(ring_path):
+    capacity = 8
+    writer = SharedTickStore.create(ring_path, capacity, max_symbols=SYMBOLS)
+    for seq in range(1, 21):
+        writer.append(*row_values(seq))
+    reader = SharedTickStore.attach(ring_path)
+
+    # Idle writer: the whole ring (seqs 13-20) is intact
+    assert check_rows(reader.read_range(1, 20), reader.symbols).tolist() == list(range(13, 21))
+
+    # Writer halfway through appending seq 21, which reuses the slot of seq 13
+    writer._header[H_WRITING_SEQ] = 21
+    writer.columns['timestamp_ns'][(21 - 1) % capacity] = 21
+    assert check_rows(reader.read_range(1, 20), reader.symbols).tolist() == list(range(14, 21))
+
+    # A batch of three in flight claims the slots of seqs 13-15
+    writer._header[H_WRITING_SEQ] = 23
+    assert reader.read_range(1, 20)['seq'].tolist() == list(range(16, 21))
+
+
+def test_read_status_skips_a_write_in_progress(ring_path):
+    writer = SharedTickStore.create(ring_path, 8, max_symbols=SYMBOLS)
+    reader = SharedTickStore.attach(ring_path)
+    assert reader.read_status() is None
+
+    writer.write_status(status_values(1))
+    assert int(reader._header[H_STATUS_VERSION]) == 2
+    assert reader.read_status() == status_values(1)
+
+    # Odd version: the writer is mid-update, so the reader gives up rather than parse it
+    writer._header[H_STATUS_VERSION] += 1
+    assert reader.read_status(retries=5) is None
+    writer._header[H_STATUS_VERSION] += 1
+
+    writer.write_status(status_values(2))
+    assert int(reader._header[H_STATUS_VERSION]) == 6
+    assert reader.read_status() == status_values(2)
@@ -0,0 +1,220 @@
+"""
+Append-only on-disk log of stored ticks, one directory per trading day.
+
+    {TICK_DATA_DIR}/{YYYYMMDD}/symbols.txt            contract symbols, line number = file contract id
+    {TICK_DATA_DIR}/{YYYYMMDD}/segment-000001.ticks   fixed-width RECORD_DTYPE records
+
+store_data hands records to TickLogWriter, which queues them and lets a
+background thread write them in batches every TICK_FLUSH_SECONDS, so the
+ingestion path never touches the disk. Segments are plain arrays of fixed-width
+records, so load_day can np.memmap them straight back into columns on startup.
+"""
+import datetime
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+import pytz
+
+from tick_store import TICK_COLUMNS, OPTION_TYPE_CODES
+
+logger = logging.getLogger('ndx_monitor.tick_log')
+
+TICK_DATA_DIR = os.getenv('TICK_DATA_DIR', os.path.join('data', 'ticks'))
+TICK_PERSIST = os.getenv('TICK_PERSIST', 'true').lower() != 'false'
+TICK_FLUSH_SECONDS = float(os.getenv('TICK_FLUSH_SECONDS', 1.0))
+SEGMENT_ROWS = int(os.getenv('TICK_SEGMENT_ROWS', 65536))
+
+CST = pytz.timezone('America/Chicago')
+
+# On-disk record: the store's columns plus the sequence number, packed with no padding
+RECORD_DTYPE = np.dtype([('seq', np.int64)] + [(name, dtype) for name, dtype in TICK_COLUMNS])
+
+SYMBOLS_FILE = 'symbols.txt'
+SEGMENT_SUFFIX = '.ticks'
+
+
+def day_key(timestamp_ns):
+    """Trading-day directory name (CST date) for an epoch-ns timestamp"""
+    return datetime.datetime.fromtimestamp(timestamp_ns / 1e9, CST).strftime('%Y%m%d')
+
+
+def segment_paths(day_dir):
+    """Segment files of one day in write order"""
+    if not os.path.isdir(day_dir):
+        return []
+    names = sorted(n for n in os.listdir(day_dir) if n.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(day_dir, n) for n in names]
+
+
+def read_symbols(day_dir):
+    path = os.path.join(day_dir, SYMBOLS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f]
+
+
+def map_segment(path):
+    """Memory-map one segment as a read-only RECORD_DTYPE array (ignores a torn trailing record)"""
+    rows = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if rows == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(rows,))
+
+
+def load_day(day, data_dir=TICK_DATA_DIR):
+    """
+    Read back every persisted record of one trading day (day = 'YYYYMMDD')
+    Returns (records, symbols) where records['contract_id'] indexes symbols
+    """
+    day_dir = os.path.join(data_dir, day)
+    segments = [map_segment(path) for path in segment_paths(day_dir)]
+    segments = [segment for segment in segments if len(segment)]
+    if not segments:
+        return np.zeros(0, dtype=RECORD_DTYPE), []
+    records = segments[0] if len(segments) == 1 else np.concatenate(segments)
+    return records, read_symbols(day_dir)
+
+
+class _DayFiles:
+    """Open files and contract-id table for the day currently being written"""
+
+    def __init__(self, data_dir, day):
+        self.dir = os.path.join(data_dir, day)
+        os.makedirs(self.dir, exist_ok=True)
+
+        self.symbols = read_symbols(self.dir)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.symbols_file = open(os.path.join(self.dir, SYMBOLS_FILE), 'a', encoding='utf-8')
+
+        # Continue the last segment of the day if it still has room (restart mid-session)
+        existing = segment_paths(self.dir)
+        self.segment_index = len(existing)
+        self.segment_rows = 0
+        self.segment_file = None
+        if existing:
+            rows = os.path.getsize(existing[-1]) // RECORD_DTYPE.itemsize
+            if rows < SEGMENT_ROWS:
+                self.segment_rows = rows
+                self.segment_file = open(existing[-1], 'r+b')
+                # Drop a torn trailing record left by a crash
+                self.segment_file.truncate(rows * RECORD_DTYPE.itemsize)
+                self.segment_file.seek(0, os.SEEK_END)
+
+    def symbol_id(self, symbol):
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_ids[symbol] = symbol_id
+            self.symbols_file.write(symbol + '\n')
+        return symbol_id
+
+    def write(self, records):
+        # Symbols must be on disk before any record that references them
+        self.symbols_file.flush()
+        start = 0
+        while start < len(records):
+            if self.segment_file is None or self.segment_rows >= SEGMENT_ROWS:
+                self._roll_segment()
+            count = min(len(records) - start, SEGMENT_ROWS - self.segment_rows)
+            self.segment_file.write(records[start:start + count].tobytes())
+            self.segment_rows += count
+            start += count
+        self.segment_file.flush()
+
+    def _roll_segment(self):
+        if self.segment_file is not None:
+            self.segment_file.close()
+        self.segment_index += 1
+        path = os.path.join(self.dir, f"segment-{self.segment_index:06d}{SEGMENT_SUFFIX}")
+        self.segment_file = open(path, 'ab')
+        self.segment_rows = 0
+
+    def close(self):
+        self.symbols_file.close()
+        if self.segment_file is not None:
+            self.segment_file.close()
+
+
+class TickLogWriter:
+    """Queues stored ticks and appends them to the day's segments from a background thread"""
+
+    def __init__(self, data_dir=TICK_DATA_DIR, flush_seconds=TICK_FLUSH_SECONDS):
+        self.data_dir = data_dir
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self._queue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._day = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def append(self, seq, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap,
+               volume, accumulated_volume):
+        """Queue one stored tick (never blocks, safe to call from the ingestion thread)"""
+        self._queue.put((seq, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap,
+                         volume, accumulated_volume))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self._flush()
+        self._flush()
+        if self._day is not None:
+            self._day.close()
+
+    def _flush(self):
+        pending = []
+        try:
+            while True:
+                pending.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not pending:
+            return
+
+        try:
+            # Split the batch by trading day (only ever more than one group across midnight)
+            start = 0
+            while start < len(pending):
+                day = day_key(pending[start][4])
+                end = start + 1
+                if day_key(pending[-1][4]) == day:
+                    end = len(pending)
+                else:
+                    while end < len(pending) and day_key(pending[end][4]) == day:
+                        end += 1
+                self._write_day(day, pending[start:end])
+                start = end
+            self.written += len(pending)
+        except Exception as e:
+            logger.error(f"❌ Error writing tick log: {e}")
+
+    def _write_day(self, day, rows):
+        if self._day is None or not self._day.dir.endswith(day):
+            if self._day is not None:
+                self._day.close()
+            self._day = _DayFiles(self.data_dir, day)
+
+        records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+        codes = OPTION_TYPE_CODES
+        unknown = codes['UNK']
+        day_files = self._day
+        records[:] = [
+            (seq, timestamp_ns, day_files.symbol_id(symbol), strike, codes.get(option_type, unknown),
+             open_price, high, low, close, vwap, volume, accumulated_volume)
+            for seq, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap,
+            volume, accumulated_volume in rows
+        ]
+        day_files.write(records)
@@ -0,0 +1,255 @@
+"""
+Columnar ring-buffer store for option aggregates.
+
+Each field lives in its own typed NumPy column, so a full trading session fits in
+a fixed, bounded amount of memory. Rows are addressed by a monotonically increasing
+sequence number: the row for seq lives at index (seq - 1) % capacity, which makes
+"everything after cursor N" a contiguous slice copy.
+
+Rows are kept in arrival order, which is not quite time order: a REST backfill
+appends minutes older than the live rows before it. Time lookups therefore go
+through a watermark per row (the newest timestamp stored up to and including
+it), which never decreases along the ring.
+"""
+import numpy as np
+
+# Option type is stored as a small integer code
+OPTION_TYPES = ('CALL', 'PUT', 'UNK')
+OPTION_TYPE_CODES = {name: code for code, name in enumerate(OPTION_TYPES)}
+
+# Column name -> dtype (timestamp is epoch nanoseconds, contract_id indexes TickStore.symbols)
+TICK_COLUMNS = (
+    ('timestamp_ns', np.int64),
+    ('contract_id', np.int32),
+    ('strike', np.int32),
+    ('option_type', np.int8),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('vwap', np.float64),
+    ('volume', np.int64),
+    ('accumulated_volume', np.int64),
+)
+
+# Ring memory per row: every column plus the writer's timestamp watermark
+ROW_BYTES = sum(np.dtype(dtype).itemsize for _, dtype in TICK_COLUMNS) + np.dtype(np.int64).itemsize
+
+
+class TickStore:
+    """
+    Fixed-capacity ring buffer of option aggregates with one array per column
+    Not thread-safe on its own - callers serialize access (see data_lock in main.py)
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # np.zeros pages are only committed by the OS once written to
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in TICK_COLUMNS}
+        self.symbols = []
+        self._contract_ids = {}
+        self.last_seq = 0       # Sequence number of the newest row (0 = nothing stored yet)
+        self.first_seq = 1      # Sequence number of the oldest retained row
+        self.cleared_seq = 0    # Highest sequence number no ?since= cursor may continue from
+        self.wiped_seq = 0      # Highest sequence number wiped by clear()
+        self.watermarks = np.zeros(capacity, dtype=np.int64)  # Newest timestamp_ns up to each row
+        self.high_water_ns = 0  # Newest timestamp_ns ever stored
+
+    def __len__(self):
+        return self.last_seq - self.first_seq + 1
+
+    def contract_id(self, symbol):
+        """Intern a contract symbol and return its integer id"""
+        contract_id = self._contract_ids.get(symbol)
+        if contract_id is None:
+            contract_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self._contract_ids[symbol] = contract_id
+        return contract_id
+
+    def append(self, symbol, option_type, strike, timestamp_ns, open_price, high, low, close, vwap,
+               volume, accumulated_volume):
+        """Append one aggregate and return its sequence number"""
+        seq = self.last_seq + 1
+        i = (seq - 1) % self.capacity
+        c = self.columns
+        c['timestamp_ns'][i] = timestamp_ns
+        c['contract_id'][i] = self.contract_id(symbol)
+        c['strike'][i] = strike
+        c['option_type'][i] = OPTION_TYPE_CODES.get(option_type, OPTION_TYPE_CODES['UNK'])
+        c['open'][i] = open_price
+        c['high'][i] = high
+        c['low'][i] = low
+        c['close'][i] = close
+        c['vwap'][i] = vwap
+        c['volume'][i] = volume
+        c['accumulated_volume'][i] = accumulated_volume
+        if timestamp_ns > self.high_water_ns:
+            self.high_water_ns = timestamp_ns
+        self.watermarks[i] = self.high_water_ns
+
+        self.last_seq = seq
+        if seq - self.first_seq >= self.capacity:
+            # Ring is full - the oldest row was just overwritten
+            self.first_seq = seq - self.capacity + 1
+        return seq
+
+    def load(self, records, symbols):
+        """
+        Bulk-load persisted rows (oldest first) into an empty store, keeping their
+        sequence numbers so cursors handed out before a restart stay valid
+        records is a structured array with a 'seq' field plus every TICK_COLUMNS
+        field; records['contract_id'] indexes symbols
+        """
+        if len(records) == 0:
+            return
+        records = records[-self.capacity:]
+
+        seqs = records['seq']
+        first_seq = int(seqs[0])
+        last_seq = int(seqs[-1])
+        if last_seq - first_seq + 1 != len(records):
+            # Gaps in the persisted sequence - renumber so ring positions stay contiguous
+            first_seq = self.last_seq + 1
+
+        self.first_seq = first_seq
+        self.last_seq = first_seq - 1
+        self.cleared_seq = self.wiped_seq = first_seq - 1
+        self.extend(records, symbols)
+
+    def extend(self, records, symbols):
+        """
+        Bulk-append persisted rows that continue this store's sequence
+        (records[0]['seq'] == last_seq + 1 - callers check before extending)
+        """
+        if len(records) == 0:
+            return
+        watermarks = np.maximum(np.maximum.accumulate(records['timestamp_ns']), self.high_water_ns)
+        self.high_water_ns = int(watermarks[-1])
+        if len(records) > self.capacity:
+            # Only the newest capacity rows survive - skip straight past the rest
+            self.last_seq += len(records) - self.capacity
+            records = records[-self.capacity:]
+            watermarks = watermarks[-self.capacity:]
+
+        # Map the file's contract ids onto this store's interned ids
+        id_map = np.array([self.contract_id(symbol) for symbol in symbols], dtype=np.int32)
+
+        # Rows land in one contiguous ring range, split in two if it wraps
+        start = self.last_seq % self.capacity
+        head = min(len(records), self.capacity - start)
+        for name, column in self.columns.items():
+            values = id_map[records['contract_id']] if name == 'contract_id' else records[name]
+            column[start:start + head] = values[:head]
+            column[:len(records) - head] = values[head:]
+        self.watermarks[start:start + head] = watermarks[:head]
+        self.watermarks[:len(records) - head] = watermarks[head:]
+
+        self.last_seq += len(records)
+        if self.last_seq - self.first_seq >= self.capacity:
+            self.first_seq = self.last_seq - self.capacity + 1
+
+    def read_range(self, start_seq, end_seq):
+        """
+        Copy rows start_seq..end_seq (inclusive) out of the ring
+        Returns a dict of column arrays plus a 'seq' column
+        """
+        start_seq = max(start_seq, self.first_seq)
+        end_seq = min(end_seq, self.last_seq)
+        if end_seq < start_seq:
+            return empty_columns()
+
+        start = (start_seq - 1) % self.capacity
+        count = end_seq - start_seq + 1
+        stop = start + count
+
+        result = {}
+        for name, column in self.columns.items():
+            if stop <= self.capacity:
+                result[name] = column[start:stop].copy()
+            else:
+                # Range wraps around the end of the ring
+                result[name] = np.concatenate((column[start:], column[:stop - self.capacity]))
+        result['seq'] = np.arange(start_seq, end_seq + 1, dtype=np.int64)
+        return result
+
+    def read_since(self, since):
+        """Copy every retained row with seq > since"""
+        return self.read_range(since + 1, self.last_seq)
+
+    def read_last(self, count):
+        """Copy the newest count rows"""
+        return self.read_range(self.last_seq - count + 1, self.last_seq)
+
+    def read_last_matching(self, count, min_volume):
+        """
+        Copy the newest count rows with volume >= min_volume
+        Scans backwards in chunks, so a loose filter only touches the newest rows
+        """
+        if min_volume <= 0:
+            return self.read_last(count)
+
+        parts = []
+        found = 0
+        end_seq = self.last_seq
+        chunk = max(count * 4, 4096)
+        while end_seq >= self.first_seq and found < count:
+            start_seq = max(self.first_seq, end_seq - chunk + 1)
+            part = self.read_range(start_seq, end_seq)
+            part = select_rows(part, part['volume'] >= min_volume)
+            parts.append(part)
+            found += len(part['seq'])
+            end_seq = start_seq - 1
+
+        if not parts:
+            return empty_columns()
+        parts.reverse()
+        merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        return select_rows(merged, slice(max(found - count, 0), None))
+
+    def clear(self):
+        """Drop every row; sequence numbers keep counting from where they were"""
+        self.cleared_seq = self.wiped_seq = self.last_seq
+        self.first_seq = self.last_seq + 1
+
+    def invalidate_cursors(self):
+        """Make every outstanding ?since= cursor fall back to a snapshot, keeping the rows"""
+        self.cleared_seq = self.last_seq
+
+    def seq_at(self, timestamp_ns):
+        """
+        Sequence number of the first retained row whose watermark reaches timestamp_ns
+        (last_seq + 1 when there is none): every row before it is stamped before
+        timestamp_ns, every row stamped at or after it comes later. Rows backfilled
+        out of order may follow it while older - a retention cut keeps them until
+        the cut passes the live rows stored before them, never drops them early.
+        The watermarks never decrease, so it is a binary search per ring segment
+        """
+        count = len(self)
+        if count == 0:
+            return self.last_seq + 1
+        timestamps = self.watermarks
+        start = (self.first_seq - 1) % self.capacity
+        head = min(count, self.capacity - start)
+        offset = int(np.searchsorted(timestamps[start:start + head], timestamp_ns))
+        if offset == head and count > head:
+            offset += int(np.searchsorted(timestamps[:count - head], timestamp_ns))
+        return self.first_seq + offset
+
+    def evict_before(self, timestamp_ns):
+        """Drop the oldest rows stamped before timestamp_ns (up to seq_at) and return how many"""
+        first_seq = self.seq_at(timestamp_ns)
+        evicted = first_seq - self.first_seq
+        self.first_seq = first_seq
+        return evicted
+
+
+def empty_columns():
+    result = {name: np.zeros(0, dtype=dtype) for name, dtype in TICK_COLUMNS}
+    result['seq'] = np.zeros(0, dtype=np.int64)
+    return result
+
+
+def select_rows(columns, rows):
+    """Apply a boolean mask or slice to every column of a read"""
+    return {name: column[rows] for name, column in columns.items()}
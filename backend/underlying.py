@@ -0,0 +1,223 @@
+"""
+Live underlying price feeds and at-the-money strike tracking.
+
+Index values (I:NDX, I:SPX) are consumed from the Polygon indices WebSocket
+(V.I:NDX, one value per second), stock/ETF prices (QQQ) from the stocks
+WebSocket's per-second aggregates, each on its own connection. If the stream is
+unavailable (e.g. the plan has no access) or drops, the feed falls back to
+polling the REST snapshot endpoint over a pooled keep-alive HTTP session, and
+retries the stream after a jittered, exponentially growing polling period.
+
+Every endpoint is configurable so the feed can be pointed at a local stand-in:
+    POLYGON_REST_URL         REST base URL (default https://api.polygon.io)
+    POLYGON_WS_FEED          WebSocket host (default: the real-time feed host)
+    POLYGON_WS_SECURE        'false' to use ws:// instead of wss://
+    UNDERLYING_SOURCE        'stream' (default) or 'poll'
+    UNDERLYING_POLL_SECONDS  REST poll interval in poll mode (default 5)
+    UNDERLYING_STREAM_RETRY_SECONDS / UNDERLYING_STREAM_RETRY_MAX_SECONDS
+                             polling period before the stream is retried: random
+                             up to base * 2**failures, capped (default 30 / 600)
+    RECENTER_THRESHOLD       points the price must drift from the center strike
+                             before the ladder is re-centered (default 1.5 strike
+                             intervals, i.e. 15 for the NDX ladder)
+"""
+import asyncio
+import logging
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from massive import WebSocketClient
+from massive.websocket.models import Feed, Market
+
+from supervisor import Backoff
+
+logger = logging.getLogger('ndx_monitor.underlying')
+
+REST_BASE_URL = os.getenv('POLYGON_REST_URL', 'https://api.polygon.io').rstrip('/')
+WS_FEED = os.getenv('POLYGON_WS_FEED', Feed.RealTime.value)
+WS_SECURE = os.getenv('POLYGON_WS_SECURE', 'true').lower() != 'false'
+UNDERLYING_SOURCE = os.getenv('UNDERLYING_SOURCE', 'stream').lower()
+UNDERLYING_POLL_SECONDS = float(os.getenv('UNDERLYING_POLL_SECONDS', 5))
+UNDERLYING_STREAM_RETRY_SECONDS = float(os.getenv('UNDERLYING_STREAM_RETRY_SECONDS', 30))
+UNDERLYING_STREAM_RETRY_MAX_SECONDS = float(os.getenv('UNDERLYING_STREAM_RETRY_MAX_SECONDS', 600))
+RECENTER_THRESHOLD = float(os.environ['RECENTER_THRESHOLD']) if os.getenv('RECENTER_THRESHOLD') else None
+
+INDEX_TICKER = 'I:NDX'
+
+# One pooled session for every REST call - keeps TLS connections alive between requests
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+http_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def fetch_index_snapshot(api_key, ticker=INDEX_TICKER, base_url=REST_BASE_URL, timeout=5):
+    """Latest index value from the REST snapshot endpoint, or None if unavailable"""
+    response = http_session.get(
+        f"{base_url}/v3/snapshot/indices",
+        params={'ticker.any_of': ticker, 'apiKey': api_key},
+        timeout=timeout
+    )
+    if response.status_code != 200:
+        return None
+    results = response.json().get('results') or []
+    if results and results[0].get('value') is not None:
+        return float(results[0]['value'])
+    return None
+
+
+def fetch_stock_snapshot(api_key, ticker, base_url=REST_BASE_URL, timeout=5):
+    """Latest trade price of a stock/ETF from the REST snapshot endpoint, or None if unavailable"""
+    response = http_session.get(
+        f"{base_url}/v2/snapshot/locale/us/markets/stocks/tickers/{ticker}",
+        params={'apiKey': api_key},
+        timeout=timeout
+    )
+    if response.status_code != 200:
+        return None
+    snapshot = response.json().get('ticker') or {}
+    price = (snapshot.get('lastTrade') or {}).get('p') or (snapshot.get('day') or {}).get('c')
+    return float(price) if price else None
+
+
+def is_index(ticker):
+    return ticker.startswith('I:')
+
+
+class AtmTracker:
+    """Tracks the center strike and only moves it once price drifts past a threshold"""
+
+    def __init__(self, strike_interval, threshold=RECENTER_THRESHOLD):
+        self.strike_interval = strike_interval
+        self.threshold = threshold if threshold is not None else strike_interval * 1.5
+        self.center = None
+
+    def nearest_strike(self, price):
+        return int(round(price / self.strike_interval) * self.strike_interval)
+
+    def reset(self, center):
+        self.center = center
+
+    def update(self, price):
+        """Returns the new center strike when a re-center is due, otherwise None"""
+        if self.center is None:
+            self.center = self.nearest_strike(price)
+            return self.center
+        if abs(price - self.center) <= self.threshold:
+            return None
+        new_center = self.nearest_strike(price)
+        if new_center == self.center:
+            return None
+        self.center = new_center
+        return new_center
+
+
+class UnderlyingPriceFeed:
+    """Delivers live underlying prices to on_price(price) from a task on the ingestion event loop"""
+
+    def __init__(self, api_key, on_price, source=UNDERLYING_SOURCE, poll_seconds=UNDERLYING_POLL_SECONDS,
+                 ticker=INDEX_TICKER, feed=WS_FEED, secure=WS_SECURE, base_url=REST_BASE_URL,
+                 stream_backoff=None):
+        self.api_key = api_key
+        self.on_price = on_price
+        self.source = source
+        self.poll_seconds = poll_seconds
+        self.ticker = ticker
+        self.feed = feed
+        self.secure = secure
+        self.base_url = base_url
+        self.stream_backoff = stream_backoff or Backoff(UNDERLYING_STREAM_RETRY_SECONDS,
+                                                        UNDERLYING_STREAM_RETRY_MAX_SECONDS)
+
+        self.source_in_use = None
+        self.last_price = None
+        self.last_update = None  # time.monotonic() of the last value
+        self._task = None
+        self._client = None
+
+    def start(self):
+        """Start following the price on the running event loop (no-op while already following)"""
+        if self._task is not None and not self._task.done():
+            return  # Already following (started at the pre-open warmup)
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self, timeout=5):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        if self._client is not None and self._client.websocket is not None:
+            try:
+                await asyncio.wait_for(self._client.close(), timeout)
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing {self.ticker} stream: {e}")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    def age_seconds(self):
+        if self.last_update is None:
+            return None
+        return time.monotonic() - self.last_update
+
+    def _publish(self, price):
+        self.last_price = price
+        self.last_update = time.monotonic()
+        try:
+            self.on_price(price)
+        except Exception as e:
+            logger.error(f"❌ Error handling {self.ticker} price {price}: {e}")
+
+    async def run(self):
+        if self.source != 'stream':
+            await self._run_poll()
+            return
+        while True:
+            connected_at = time.monotonic()
+            try:
+                await self._run_stream()
+                problem = "stream ended"
+            except Exception as e:
+                problem = f"stream unavailable ({e})"
+            if self.last_update is not None and self.last_update >= connected_at:
+                self.stream_backoff.reset()  # It did deliver - not a stream we lack access to
+            # Prices keep flowing from REST in the meantime
+            poll_for = max(self.poll_seconds, self.stream_backoff.next_delay())
+            logger.warning(f"⚠️ {self.ticker} {problem} - polling REST for {poll_for:.0f}s before retrying the stream")
+            await self._run_poll(poll_for)
+
+    async def _run_stream(self):
+        self.source_in_use = 'stream'
+        # Indices stream values (V.), stocks per-second aggregates (A.) whose close is the price
+        if is_index(self.ticker):
+            market, channel, field = Market.Indices, 'V', 'value'
+        else:
+            market, channel, field = Market.Stocks, 'A', 'close'
+        logger.info(f"📈 Streaming {self.ticker} from the {market.value} WebSocket")
+
+        async def process(msgs):
+            for m in msgs:
+                value = getattr(m, field, None)
+                if value is not None:
+                    self._publish(float(value))
+
+        # A dropped connection ends connect(), so run() falls back to polling at once
+        self._client = WebSocketClient(api_key=self.api_key, feed=self.feed, market=market,
+                                       secure=self.secure, max_reconnects=0)
+        self._client.subscribe(f"{channel}.{self.ticker}")
+        await self._client.connect(process)
+
+    async def _run_poll(self, duration=None):
+        """Poll the REST snapshot - for duration seconds, or for good when it is None"""
+        self.source_in_use = 'poll'
+        logger.info(f"📈 Polling {self.ticker} every {self.poll_seconds:g}s over a keep-alive session")
+        fetch = fetch_index_snapshot if is_index(self.ticker) else fetch_stock_snapshot
+        until = None if duration is None else time.monotonic() + duration
+        while until is None or time.monotonic() < until:
+            try:
+                # requests is blocking - the call runs on the default executor
+                price = await asyncio.to_thread(fetch, self.api_key, self.ticker, self.base_url)
+                if price is not None:
+                    self._publish(price)
+            except Exception as e:
+                logger.warning(f"⚠️ Error polling {self.ticker}: {e}")
+            await asyncio.sleep(self.poll_seconds)
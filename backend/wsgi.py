@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production serving (SERVE_MODE=production).
+
+    gunicorn -c backend/gunicorn.conf.py
+
+Each gunicorn worker imports this module and serves straight from the shared
+tick ring written by the ingestion process (python backend/main.py), so
+API requests never compete with tick handling for the same interpreter.
+"""
+import main
+
+main.start_api_worker()
+app = main.flask_app
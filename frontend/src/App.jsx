@@ -1,36 +1,63 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import Dashboard from './components/Dashboard'
-import { fetchGoogleSheetData, fetchHealthStatus } from './services/googleSheets'
+import { fetchOptionsDelta, fetchHealthStatus, fetchSummary, openOptionsStream } from './services/googleSheets'
 import './App.css'
 
+// Keep the same window the backend used to serve as a full snapshot
+const MAX_ROWS = 1000
+
 function App() {
   const [data, setData] = useState([])
+  const [summary, setSummary] = useState({ strikes: [], totals: {} })
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [lastUpdate, setLastUpdate] = useState(null)
   const [currentStrike, setCurrentStrike] = useState(null)
   const [liveNdxPrice, setLiveNdxPrice] = useState(null)
-  const [nextRefreshSeconds, setNextRefreshSeconds] = useState(null)
+  const [priceAgeSeconds, setPriceAgeSeconds] = useState(null)
   const [marketStatus, setMarketStatus] = useState('closed')
+  const cursorRef = useRef(0)
+  const streamingRef = useRef(false)
+
+  const applyDelta = (delta) => {
+    if (delta.reset) {
+      setData(delta.data)
+    } else if (delta.data.length > 0) {
+      setData(prev => prev.concat(delta.data).slice(-MAX_ROWS))
+    }
+    cursorRef.current = delta.seq
+    setLastUpdate(new Date())
+    setError(null)
+  }
+
+  const loadSummary = async () => {
+    // Per-strike aggregates for the chart and stats cards
+    try {
+      setSummary(await fetchSummary())
+    } catch (summaryErr) {
+      console.error('Error fetching summary:', summaryErr)
+    }
+  }
+
+  const loadHealth = async () => {
+    // Health data (current strike, live price, price age, market status)
+    try {
+      const health = await fetchHealthStatus()
+      setCurrentStrike(health.current_strike)
+      setLiveNdxPrice(health.live_ndx_price)
+      setPriceAgeSeconds(health.price_age_seconds)
+      setMarketStatus(health.market_status || 'closed')
+    } catch (healthErr) {
+      console.error('Error fetching health status:', healthErr)
+    }
+  }
 
   const loadData = async () => {
     try {
       setLoading(true)
-      const sheetData = await fetchGoogleSheetData()
-      setData(sheetData)
-      setLastUpdate(new Date())
-      setError(null)
-
-      // Also fetch health data (current strike, live price, refresh countdown, market status)
-      try {
-        const health = await fetchHealthStatus()
-        setCurrentStrike(health.current_strike)
-        setLiveNdxPrice(health.live_ndx_price)
-        setNextRefreshSeconds(health.next_refresh_seconds)
-        setMarketStatus(health.market_status || 'closed')
-      } catch (healthErr) {
-        console.error('Error fetching health status:', healthErr)
-      }
+      // Only pull records newer than the last sequence number we have seen
+      applyDelta(await fetchOptionsDelta(cursorRef.current))
+      await Promise.all([loadHealth(), loadSummary()])
     } catch (err) {
       console.error('Error loading data:', err)
       setError(err.message)
@@ -41,23 +68,40 @@ function App() {
 
   useEffect(() => {
     loadData()
-    
+
+    // Ticks are pushed over the stream; polling only fills in while it is down
+    const stream = openOptionsStream({
+      onDelta: applyDelta,
+      onStatus: (connected) => { streamingRef.current = connected }
+    })
+
     // Auto-refresh every 5 seconds
-    const interval = setInterval(loadData, 5000)
-    
-    return () => clearInterval(interval)
+    const interval = setInterval(() => {
+      if (streamingRef.current) {
+        loadHealth()
+        loadSummary()
+      } else {
+        loadData()
+      }
+    }, 5000)
+
+    return () => {
+      clearInterval(interval)
+      if (stream) stream.close()
+    }
   }, [])
 
   return (
     <div className="app">
       <Dashboard
         data={data}
+        summary={summary}
         loading={loading}
         error={error}
         lastUpdate={lastUpdate}
         currentStrike={currentStrike}
         liveNdxPrice={liveNdxPrice}
-        nextRefreshSeconds={nextRefreshSeconds}
+        priceAgeSeconds={priceAgeSeconds}
         marketStatus={marketStatus}
         onRefresh={loadData}
       />
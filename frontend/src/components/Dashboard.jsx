@@ -6,7 +6,7 @@ import DataTable from './DataTable'
 import VolumeChart from './VolumeChart'
 import './Dashboard.css'
 
-function Dashboard({ data, loading, error, lastUpdate, currentStrike, liveNdxPrice, nextRefreshSeconds, marketStatus, onRefresh }) {
+function Dashboard({ data, summary, loading, error, lastUpdate, currentStrike, liveNdxPrice, priceAgeSeconds, marketStatus, onRefresh }) {
   const [filterType, setFilterType] = useState('ALL')
   const [minVolume, setMinVolume] = useState(0)
   const [searchStrike, setSearchStrike] = useState('')
@@ -39,29 +39,35 @@ function Dashboard({ data, loading, error, lastUpdate, currentStrike, liveNdxPri
     })
   }, [data, filterType, minVolume, searchStrike])
 
+  // Server-side aggregates, narrowed by the type and strike filters
+  // (Min Volume is a per-tick filter, so it only applies to the table)
+  const filteredSummary = useMemo(() => {
+    const cleanSearch = searchStrike.replace(/[^0-9]/g, '')
+    return summary.strikes.filter(entry => {
+      if (filterType !== 'ALL' && entry.type !== filterType) {
+        return false
+      }
+      if (cleanSearch && !String(entry.strike).includes(cleanSearch)) {
+        return false
+      }
+      return true
+    })
+  }, [summary, filterType, searchStrike])
+
   // Calculate statistics
   const stats = useMemo(() => {
-    const totalTrades = filteredData.length
-    const uniqueStrikes = new Set(filteredData.map(r => r.Strike_Price)).size
-    const totalVolume = filteredData.reduce((sum, r) => sum + (parseInt(r.Volume) || 0), 0)
-    const avgVolume = totalTrades > 0 ? Math.floor(totalVolume / totalTrades) : 0
-
-    const callCount = filteredData.filter(r => r.Option_Type === 'CALL').length
-    const putCount = filteredData.filter(r => r.Option_Type === 'PUT').length
+    const totals = summary.totals
 
     return {
-      totalTrades,
-      uniqueStrikes,
-      avgVolume,
-      totalVolume,
-      callCount,
-      putCount,
+      callCount: totals.call_ticks || 0,
+      putCount: totals.put_ticks || 0,
+      putCallRatio: totals.put_call_ratio,
       currentStrike,
       liveNdxPrice,
-      nextRefreshSeconds,
+      priceAgeSeconds,
       lastUpdate
     }
-  }, [filteredData, currentStrike, liveNdxPrice, nextRefreshSeconds, lastUpdate])
+  }, [summary, currentStrike, liveNdxPrice, priceAgeSeconds, lastUpdate])
 
   if (error) {
     return (
@@ -98,7 +104,7 @@ function Dashboard({ data, loading, error, lastUpdate, currentStrike, liveNdxPri
         />
 
         <div className="charts-section">
-          <VolumeChart data={filteredData} />
+          <VolumeChart summary={filteredSummary} />
         </div>
 
         <DataTable data={filteredData} loading={loading} marketStatus={marketStatus} />
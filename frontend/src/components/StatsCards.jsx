@@ -2,12 +2,13 @@ import { formatNumber } from '../services/googleSheets'
 import './StatsCards.css'
 
 function StatsCards({ stats }) {
-  // Format countdown timer
-  const formatCountdown = (seconds) => {
+  // Format how long ago the backend last received an NDX value
+  const formatAge = (seconds) => {
     if (seconds === null || seconds === undefined) return 'Loading...'
+    if (seconds < 60) return `${seconds}s ago`
     const mins = Math.floor(seconds / 60)
     const secs = seconds % 60
-    return `${mins}:${secs.toString().padStart(2, '0')}`
+    return `${mins}:${secs.toString().padStart(2, '0')} ago`
   }
 
   const cards = [
@@ -24,8 +25,8 @@ function StatsCards({ stats }) {
       color: 'cyan'
     },
     {
-      title: 'Next Refresh',
-      value: formatCountdown(stats.nextRefreshSeconds),
+      title: 'NDX Updated',
+      value: formatAge(stats.priceAgeSeconds),
       icon: '⏱️',
       color: 'teal'
     },
@@ -40,6 +41,12 @@ function StatsCards({ stats }) {
       value: formatNumber(stats.putCount),
       icon: '📉',
       color: 'red'
+    },
+    {
+      title: 'Put/Call Ratio',
+      value: stats.putCallRatio === null || stats.putCallRatio === undefined ? '—' : stats.putCallRatio.toFixed(2),
+      icon: '⚖️',
+      color: 'purple'
     }
   ]
 
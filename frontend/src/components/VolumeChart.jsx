@@ -1,39 +1,34 @@
 import { useMemo } from 'react'
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts'
-import { parseStrikePrice } from '../services/googleSheets'
+import { formatNumber } from '../services/googleSheets'
 import './VolumeChart.css'
 
-function VolumeChart({ data }) {
+function VolumeChart({ summary }) {
   const chartData = useMemo(() => {
-    // Group by strike price and option type
+    // Summary entries are already aggregated per strike and type on the server
     const grouped = {}
 
-    data.forEach(row => {
-      const strike = row.Strike_Price
-      if (!strike) return
-
-      if (!grouped[strike]) {
-        grouped[strike] = {
-          strike,
-          strikeNum: parseStrikePrice(strike),
+    summary.forEach(entry => {
+      if (!grouped[entry.strike]) {
+        grouped[entry.strike] = {
+          strike: `$${formatNumber(entry.strike)}`,
+          strikeNum: entry.strike,
           CALL: 0,
           PUT: 0
         }
       }
 
-      const volume = parseInt(row.Volume) || 0
-      if (row.Option_Type === 'CALL') {
-        grouped[strike].CALL += volume
-      } else if (row.Option_Type === 'PUT') {
-        grouped[strike].PUT += volume
+      if (entry.type === 'CALL' || entry.type === 'PUT') {
+        grouped[entry.strike][entry.type] += entry.volume
       }
     })
 
-    // Convert to array and sort by strike price
+    // Top 20 strikes by total volume, shown in strike order
     return Object.values(grouped)
+      .sort((a, b) => (b.CALL + b.PUT) - (a.CALL + a.PUT))
+      .slice(0, 20)
       .sort((a, b) => a.strikeNum - b.strikeNum)
-      .slice(0, 20) // Show top 20 strikes
-  }, [data])
+  }, [summary])
 
   if (chartData.length === 0) {
     return null
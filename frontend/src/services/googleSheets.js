@@ -29,6 +29,122 @@ export async function fetchGoogleSheetData() {
   }
 }
 
+/**
+ * Fetch only the options records stored after the given sequence cursor.
+ * Returns { data, seq, reset } - when reset is true, data is a full snapshot
+ * that replaces whatever the caller already holds.
+ */
+export async function fetchOptionsDelta(since) {
+  try {
+    // Columnar responses are several times smaller than row objects
+    const url = `${API_BASE_URL}/options?since=${since}&format=columnar`
+
+    const response = await fetch(url)
+
+    if (!response.ok) {
+      throw new Error(`Failed to fetch data: ${response.statusText}`)
+    }
+
+    const result = await response.json()
+
+    return {
+      data: result.columns ? columnarToRows(result) : (result.data || []),
+      seq: result.seq || 0,
+      reset: Boolean(result.reset)
+    }
+
+  } catch (error) {
+    console.error('Error fetching options data:', error)
+    throw error
+  }
+}
+
+// 'YYYY-MM-DD HH:MM:SS' in CST, matching the backend's row format
+const cstTimestamp = new Intl.DateTimeFormat('sv-SE', {
+  timeZone: 'America/Chicago',
+  year: 'numeric', month: '2-digit', day: '2-digit',
+  hour: '2-digit', minute: '2-digit', second: '2-digit',
+  hour12: false
+})
+
+/**
+ * Expand a ?format=columnar response into the row objects the dashboard uses
+ */
+export function columnarToRows(result) {
+  const { symbols, option_types: optionTypes, columns } = result
+  const rows = new Array(columns.seq.length)
+
+  for (let i = 0; i < rows.length; i++) {
+    rows[i] = {
+      Seq: columns.seq[i],
+      Timestamp: cstTimestamp.format(new Date(columns.timestamp_ms[i])),
+      Symbol: symbols[columns.contract[i]],
+      Option_Type: optionTypes[columns.option_type[i]],
+      Strike_Price: `$${formatNumber(columns.strike[i])}`,
+      Close_Price: columns.close[i],
+      Volume: columns.volume[i],
+      Accumulated_Volume: columns.accumulated_volume[i],
+      High: columns.high[i],
+      Low: columns.low[i],
+      Open: columns.open[i],
+      VWAP: columns.vwap[i]
+    }
+  }
+
+  return rows
+}
+
+/**
+ * Subscribe to pushed options records (Server-Sent Events).
+ * onDelta receives the same { data, seq, reset } shape as fetchOptionsDelta;
+ * onStatus(connected) reports whether the stream is currently live.
+ * Returns the EventSource, or null when the browser has no SSE support.
+ */
+export function openOptionsStream({ onDelta, onStatus }) {
+  if (typeof EventSource === 'undefined') return null
+
+  const source = new EventSource(`${API_BASE_URL}/stream`)
+
+  source.addEventListener('ticks', (event) => {
+    const result = JSON.parse(event.data)
+    onDelta({
+      data: result.data || [],
+      seq: result.seq || 0,
+      reset: Boolean(result.reset)
+    })
+  })
+  source.onopen = () => onStatus(true)
+  // EventSource reconnects on its own and resumes via Last-Event-ID
+  source.onerror = () => onStatus(false)
+
+  return source
+}
+
+/**
+ * Fetch the server-side per-(strike, type) aggregates.
+ * Returns { strikes, totals } - strikes holds one entry per strike and option type.
+ */
+export async function fetchSummary() {
+  try {
+    const url = `${API_BASE_URL}/summary`
+    const response = await fetch(url)
+
+    if (!response.ok) {
+      throw new Error(`Failed to fetch summary: ${response.statusText}`)
+    }
+
+    const result = await response.json()
+
+    return {
+      strikes: result.strikes || [],
+      totals: result.totals || {}
+    }
+  } catch (error) {
+    console.error('Error fetching summary:', error)
+    throw error
+  }
+}
+
 /**
  * Fetch health status from backend
  */
@@ -32,30 +32,46 @@ app.listen(PORT, '0.0.0.0', () => {
 });
 
 // Start the Python backend in a separate process
-console.log('🐍 Starting Python backend...');
-const pythonProcess = spawn('python', ['backend/main.py'], {
-  stdio: 'inherit',
-  env: process.env
-});
+// SERVE_MODE=production: main.py only ingests and gunicorn workers serve the API
+const productionMode = (process.env.SERVE_MODE || '').toLowerCase() === 'production';
+const backendProcesses = [];
 
-pythonProcess.on('error', (error) => {
-  console.error('❌ Failed to start Python backend:', error);
-});
+function startBackendProcess(name, command, args) {
+  const child = spawn(command, args, {
+    stdio: 'inherit',
+    env: process.env
+  });
 
-pythonProcess.on('exit', (code) => {
-  console.log(`🐍 Python backend exited with code ${code}`);
-});
+  child.on('error', (error) => {
+    console.error(`❌ Failed to start ${name}:`, error);
+  });
+
+  child.on('exit', (code) => {
+    console.log(`🐍 ${name} exited with code ${code}`);
+  });
+
+  backendProcesses.push(child);
+  return child;
+}
+
+console.log('🐍 Starting Python backend...');
+startBackendProcess('Python backend', 'python', ['backend/main.py']);
+
+if (productionMode) {
+  console.log('🏭 Starting gunicorn API workers...');
+  startBackendProcess('Gunicorn API', 'gunicorn', ['-c', 'backend/gunicorn.conf.py']);
+}
 
 // Handle graceful shutdown
 process.on('SIGTERM', () => {
   console.log('🛑 SIGTERM received, shutting down gracefully...');
-  pythonProcess.kill('SIGTERM');
+  backendProcesses.forEach(child => child.kill('SIGTERM'));
   process.exit(0);
 });
 
 process.on('SIGINT', () => {
   console.log('🛑 SIGINT received, shutting down gracefully...');
-  pythonProcess.kill('SIGINT');
+  backendProcesses.forEach(child => child.kill('SIGINT'));
   process.exit(0);
 });
 